@@ -9,10 +9,12 @@ from __future__ import annotations
 import csv
 import logging
 import time
-import uuid
+from collections.abc import Iterable
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 if TYPE_CHECKING:
     from src.models.sensor import Sensor
 
@@ -45,14 +47,18 @@ class CSVBatchGenerator:
 
         Returns the absolute path of the created file.
         """
+        rows = (reading.to_tuple() for reading in readings)
+        return self._write_rows(rows, len(readings), filename)
+
+    def _write_rows(self, rows: Iterable[Iterable[object]], count: int, filename: str) -> Path:
+        """Write rows ordered as ``_CSV_COLUMNS`` to a CSV file under the output dir."""
         filepath = self._output_dir / filename
         with filepath.open("w", newline="", encoding="utf-8") as fh:
-            writer = csv.DictWriter(fh, fieldnames=_CSV_COLUMNS)
-            writer.writeheader()
-            for reading in readings:
-                writer.writerow(reading.to_dict())
+            writer = csv.writer(fh)
+            writer.writerow(_CSV_COLUMNS)
+            writer.writerows(rows)
 
-        logger.info("Wrote %d readings to %s", len(readings), filepath)
+        logger.info("Wrote %d readings to %s", count, filepath)
         return filepath.resolve()
 
     def generate_historical(
@@ -68,32 +74,27 @@ class CSVBatchGenerator:
         sensor in the provided list.  The file is named with the
         platform id and a timestamp.
         """
-        from src.patterns.signal import generate_reading as gen_value
+        from src.patterns.signal import generate_series
 
         now_ms = int(time.time() * 1000)
         start_ms = now_ms - (hours_back * 3600 * 1000)
         step_ms = interval_seconds * 1000
 
-        readings: list[SensorReading] = []
-        ts = start_ms
-
-        while ts <= now_ms:
-            t_hours = (ts - start_ms) / (3600 * 1000)
-            for sensor in sensors:
-                value = gen_value(sensor, t_hours, pattern="normal")
-                readings.append(
-                    SensorReading(
-                        reading_id=str(uuid.uuid4()),
-                        platform_id=platform_id,
-                        sensor_id=sensor.sensor_id,
-                        sensor_type=sensor.sensor_type.value,
-                        value=round(value, 4),
-                        unit=sensor.unit,
-                        timestamp=ts,
-                        quality_flag="GOOD",
-                    )
-                )
-            ts += step_ms
+        timestamps = np.arange(start_ms, now_ms + 1, step_ms, dtype=np.int64)
+        t_hours = (timestamps - start_ms) / (3600 * 1000)
+
+        # One row per (timestamp, sensor), timestamp-major; each sensor's
+        # series is generated in one call and written into its column
+        readings = SensorReading.batch(len(timestamps) * len(sensors))
+        readings["platform_id"] = platform_id
+        grid = readings.reshape(len(timestamps), len(sensors))
+        for col, sensor in enumerate(sensors):
+            column = grid[:, col]
+            column["sensor_id"] = sensor.sensor_id
+            column["sensor_type"] = sensor.sensor_type.value
+            column["unit"] = sensor.unit
+            column["timestamp"] = timestamps
+            column["value"] = np.round(generate_series(sensor, t_hours), 4)
 
         filename = f"{platform_id}_historical_{int(time.time())}.csv"
-        return self.generate_batch(readings, filename)
+        return self._write_rows(readings.tolist(), len(readings), filename)
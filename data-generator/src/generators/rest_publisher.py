@@ -79,7 +79,7 @@ class RESTPublisher:
         if not readings:
             return 0
 
-        payload = "[" + ",".join(r.to_json() for r in readings) + "]"
+        payload = b"[" + b",".join(r.to_json() for r in readings) + b"]"
 
         try:
             response = self._session.post(
@@ -14,7 +14,6 @@ import logging
 import signal
 import sys
 import time
-import uuid
 from collections.abc import Sequence
 
 import click
@@ -25,7 +24,7 @@ from src.generators.rest_publisher import RESTPublisher
 from src.models.platform import PLATFORMS
 from src.models.reading import SensorReading
 from src.models.sensor import Sensor, generate_sensors_for_platform
-from src.patterns.signal import generate_reading
+from src.patterns.signal import SensorArrays, generate_reading, generate_readings_batch
 
 logger = logging.getLogger(__name__)
 
@@ -101,7 +100,7 @@ def _select_pattern(anomaly_prob: float, rng: object) -> tuple[str, str]:
 
 
 def _generate_cycle(
-    sensors_by_platform: dict[str, list[Sensor]],
+    arrays_by_platform: dict[str, SensorArrays],
     t_hours: float,
     anomaly_prob: float,
 ) -> tuple[list[SensorReading], int]:
@@ -116,17 +115,18 @@ def _generate_cycle(
     anomaly_count = 0
     now_ms = int(time.time() * 1000)
 
-    for platform_id, sensors in sensors_by_platform.items():
-        for sensor in sensors:
+    for platform_id, arrays in arrays_by_platform.items():
+        # Normal values for the whole platform in one call; the few sensors
+        # picked for an anomaly pattern are regenerated individually
+        normal_values = generate_readings_batch(arrays, t_hours).tolist()
+        for sensor, value in zip(arrays.sensors, normal_values, strict=True):
             pattern, quality = _select_pattern(anomaly_prob, rng)
             if pattern != "normal":
                 anomaly_count += 1
-
-            value = generate_reading(sensor, t_hours, pattern=pattern)
+                value = generate_reading(sensor, t_hours, pattern=pattern)
 
             readings.append(
                 SensorReading(
-                    reading_id=str(uuid.uuid4()),
                     platform_id=platform_id,
                     sensor_id=sensor.sensor_id,
                     sensor_type=sensor.sensor_type.value,
@@ -251,6 +251,9 @@ def main(
         sensors = generate_sensors_for_platform(pid)
         sensors_by_platform[pid] = sensors
         total_sensors += len(sensors)
+    arrays_by_platform = {
+        pid: SensorArrays.from_sensors(sensors) for pid, sensors in sensors_by_platform.items()
+    }
 
     logger.info(
         "Initialized %d platforms, %d sensors total | interval=%ds | anomaly_prob=%.2f | mode=%s",
@@ -290,7 +293,7 @@ def main(
             t_hours = (cycle_start - start_time) / 3600.0
 
             readings, anomalies = _generate_cycle(
-                sensors_by_platform,
+                arrays_by_platform,
                 t_hours,
                 anomaly_probability,
             )
@@ -0,0 +1,33 @@
+"""Frozen, slotted dataclass decorator shared by the domain models."""
+
+from __future__ import annotations
+
+from dataclasses import FrozenInstanceError, dataclass, field
+from typing import TypeVar, dataclass_transform
+
+T = TypeVar("T")
+
+
+@dataclass_transform(frozen_default=True, field_specifiers=(field,))
+def frozen_dataclass(cls: type[T]) -> type[T]:
+    """Build ``cls`` as a ``frozen=True, slots=True`` dataclass.
+
+    Slots drop the per-instance ``__dict__``, which matters for models that
+    are created per reading or per sensor.  On Python 3.11 the generated
+    frozen ``__setattr__`` raises ``TypeError`` instead of
+    ``FrozenInstanceError`` for names that are not fields once the class
+    has been rebuilt with slots, so both hooks are replaced with ones that
+    reject every assignment.  ``__init__`` is unaffected: dataclasses
+    populate frozen instances through ``object.__setattr__``.
+    """
+    cls = dataclass(frozen=True, slots=True)(cls)
+
+    def __setattr__(self: T, name: str, value: object) -> None:
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self: T, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    cls.__setattr__ = __setattr__  # type: ignore[method-assign,assignment]
+    cls.__delattr__ = __delattr__  # type: ignore[method-assign,assignment]
+    return cls
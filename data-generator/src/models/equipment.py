@@ -8,7 +8,7 @@ systems, and power generators.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from src.models._frozen import frozen_dataclass
 
 _EQUIPMENT_TEMPLATES: list[tuple[str, str, str, str, str]] = [
     ("COMP", "Gas Compressor", "Compressor", "Rolls-Royce", "RB211-6762"),
@@ -24,7 +24,7 @@ _EQUIPMENT_TEMPLATES: list[tuple[str, str, str, str, str]] = [
 ]
 
 
-@dataclass(frozen=True)
+@frozen_dataclass
 class Equipment:
     """A single piece of equipment installed on a platform."""
 
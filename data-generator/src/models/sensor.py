@@ -6,11 +6,16 @@ temperature, pressure, vibration, and flow-rate measurement types.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import field
 from enum import StrEnum
+from typing import TYPE_CHECKING
 
+from src.models._frozen import frozen_dataclass
 from src.models.equipment import get_equipment_for_platform
 
+if TYPE_CHECKING:
+    from src.patterns.signal import SignalConfig
+
 
 class SensorType(StrEnum):
     """Physical measurement types collected by platform sensors."""
@@ -89,7 +94,7 @@ _SENSOR_SPECS: dict[str, list[tuple[SensorType, str, float, float, str]]] = {
 }
 
 
-@dataclass(frozen=True)
+@frozen_dataclass
 class Sensor:
     """A single sensor installed on a piece of equipment."""
 
@@ -101,6 +106,8 @@ class Sensor:
     min_range: float
     max_range: float
     subtype: str = ""
+    # Signal config resolved on first use by patterns.signal._get_config
+    _config: SignalConfig | None = field(default=None, init=False, repr=False, compare=False)
 
 
 def generate_sensors_for_platform(platform_id: str) -> list[Sensor]:
@@ -2,20 +2,26 @@
 
 from src.patterns.signal import (
     SENSOR_CONFIGS,
+    SensorArrays,
     SignalConfig,
     generate_degradation,
     generate_failure,
     generate_normal,
     generate_reading,
+    generate_readings_batch,
     generate_seasonal,
+    generate_series,
 )
 
 __all__ = [
     "SENSOR_CONFIGS",
+    "SensorArrays",
     "SignalConfig",
     "generate_degradation",
     "generate_failure",
     "generate_normal",
     "generate_reading",
+    "generate_readings_batch",
     "generate_seasonal",
+    "generate_series",
 ]
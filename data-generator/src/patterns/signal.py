@@ -9,7 +9,8 @@ behaviour so that generated values are physically plausible.
 from __future__ import annotations
 
 import math
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 import numpy as np
@@ -26,6 +27,11 @@ class SignalConfig:
     noise_std: float
     seasonal_amplitude: float = 0.0
     seasonal_period_hours: float = 24.0
+    # Angular frequency in rad/hour, derived from seasonal_period_hours
+    _omega: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_omega", 2.0 * math.pi / self.seasonal_period_hours)
 
 
 # ── Realistic defaults per (sensor_type, subtype) ──────────────────────
@@ -142,54 +148,111 @@ SENSOR_CONFIGS: dict[tuple[str, str], SignalConfig] = {
 # Fallback config used when no specific mapping is found.
 _DEFAULT_CONFIG = SignalConfig(setpoint=50.0, noise_std=5.0)
 
-_rng = np.random.default_rng()
+# PCG64DXSM is numpy's recommended successor to the default PCG64.  Noise is
+# drawn as float32, which is ample for simulated sensor noise and halves the
+# bytes generated per sample; scaling happens in float64.
+_rng = np.random.Generator(np.random.PCG64DXSM())
+
+# Default pattern parameters, shared by the scalar and batch generators
+_DRIFT_RATE = 0.5
+_SPIKE_FACTOR = 3.0
+
+# Scalar noise is served from a pre-drawn block of standard normals so that
+# the per-reading path does not pay for a Generator call each time.
+_NOISE_BLOCK_SIZE = 4096
+_noise_block: list[float] = []
+_noise_index = 0
+_noise_rng: np.random.Generator | None = None
+
+
+def _next_noise() -> float:
+    """Return the next standard-normal sample, refilling the block as needed.
+
+    The block is also redrawn when ``_rng`` has been replaced (e.g. reseeded
+    in tests), so a fresh generator always yields its own sequence.
+    """
+    global _noise_block, _noise_index, _noise_rng
+    if _noise_index >= len(_noise_block) or _noise_rng is not _rng:
+        _noise_block = _rng.standard_normal(_NOISE_BLOCK_SIZE, dtype=np.float32).tolist()
+        _noise_rng = _rng
+        _noise_index = 0
+    sample = _noise_block[_noise_index]
+    _noise_index += 1
+    return sample
 
 
 def _get_config(sensor: Sensor) -> SignalConfig:
-    """Look up the signal config for a sensor, falling back to a default."""
-    key = (sensor.sensor_type.value, sensor.subtype)
-    return SENSOR_CONFIGS.get(key, _DEFAULT_CONFIG)
+    """Look up the signal config for a sensor, falling back to a default.
+
+    The result is cached on the sensor, so the tuple key is only built and
+    hashed the first time each sensor is seen.
+    """
+    config = sensor._config
+    if config is None:
+        key = (sensor.sensor_type.value, sensor.subtype)
+        config = SENSOR_CONFIGS.get(key, _DEFAULT_CONFIG)
+        object.__setattr__(sensor, "_config", config)
+    return config
+
+
+def _standard_normal(size: int) -> np.ndarray:
+    """Draw *size* float32 standard normals, widened to float64 for scaling."""
+    return _rng.standard_normal(size, dtype=np.float32).astype(np.float64)
 
 
 # ── Signal generators ──────────────────────────────────────────────────
 
 
-def generate_normal(config: SignalConfig, t_hours: float) -> float:
-    """Gaussian noise around the setpoint with optional seasonal component."""
-    base = config.setpoint + float(_rng.normal(0, config.noise_std))
-    seasonal = _seasonal_component(config, t_hours)
-    return base + seasonal
+def generate_normal(
+    config: SignalConfig,
+    t_hours: float | np.ndarray,
+    size: int | None = None,
+) -> float | np.ndarray:
+    """Gaussian noise around the setpoint with optional seasonal component.
+
+    With ``size`` set, all ``size`` noise samples are drawn in one call and
+    an array is returned; ``t_hours`` may then be a scalar or an array of
+    that length.
+    """
+    if size is None:
+        base = config.setpoint + config.noise_std * _next_noise()
+        return base + _seasonal_component(config, t_hours)
+    noise = _standard_normal(size)
+    return config.setpoint + config.noise_std * noise + _seasonal_component(config, t_hours)
 
 
 def generate_degradation(
     config: SignalConfig,
-    t_hours: float,
-    drift_rate: float = 0.5,
-) -> float:
+    t_hours: float | np.ndarray,
+    drift_rate: float = _DRIFT_RATE,
+    size: int | None = None,
+) -> float | np.ndarray:
     """Linear drift from the setpoint simulating equipment degradation."""
     drift = drift_rate * t_hours
-    return generate_normal(config, t_hours) + drift
+    return generate_normal(config, t_hours, size) + drift
 
 
-def generate_failure(config: SignalConfig, spike_factor: float = 3.0) -> float:
+def generate_failure(config: SignalConfig, spike_factor: float = _SPIKE_FACTOR) -> float:
     """Sudden spike well outside normal range -- simulates abrupt failure."""
     direction = 1.0 if _rng.random() > 0.5 else -1.0
     spike = direction * spike_factor * config.noise_std
     return config.setpoint + spike
 
 
-def generate_seasonal(config: SignalConfig, t_hours: float) -> float:
-    """Pure sinusoidal variation without noise overlay."""
+def generate_seasonal(config: SignalConfig, t_hours: float | np.ndarray) -> float | np.ndarray:
+    """Pure sinusoidal variation without noise overlay.
+
+    Passing an array of ``t_hours`` evaluates the whole curve in one call.
+    """
     return config.setpoint + _seasonal_component(config, t_hours)
 
 
-def _seasonal_component(config: SignalConfig, t_hours: float) -> float:
+def _seasonal_component(config: SignalConfig, t_hours: float | np.ndarray) -> float | np.ndarray:
     """Compute the sinusoidal seasonal offset."""
     if config.seasonal_amplitude == 0.0:
         return 0.0
-    return config.seasonal_amplitude * math.sin(
-        2.0 * math.pi * t_hours / config.seasonal_period_hours
-    )
+    sin = np.sin if isinstance(t_hours, np.ndarray) else math.sin
+    return config.seasonal_amplitude * sin(config._omega * t_hours)
 
 
 # ── Dispatcher ─────────────────────────────────────────────────────────
@@ -221,3 +284,90 @@ def generate_reading(
 
     # Clamp to physical sensor range
     return max(sensor.min_range, min(sensor.max_range, value))
+
+
+def generate_series(
+    sensor: Sensor,
+    t_hours: np.ndarray,
+    pattern: str = "normal",
+) -> np.ndarray:
+    """Generate one value per entry of *t_hours* using the requested pattern.
+
+    Array counterpart of ``generate_reading``: the ``normal``, ``degradation``
+    and ``seasonal`` patterns are computed in one vectorised pass, and the
+    result is clamped to the sensor's physical min/max range.
+    """
+    config = _get_config(sensor)
+    size = len(t_hours)
+
+    match pattern:
+        case "degradation":
+            values = generate_degradation(config, t_hours, size=size)
+        case "failure":
+            values = np.array([generate_failure(config) for _ in range(size)])
+        case "seasonal":
+            values = generate_seasonal(config, t_hours)
+        case _:
+            values = generate_normal(config, t_hours, size=size)
+
+    # Seasonal output is a scalar for sensors without a seasonal component
+    return np.clip(np.broadcast_to(values, (size,)), sensor.min_range, sensor.max_range)
+
+
+@dataclass(frozen=True, eq=False)
+class SensorArrays:
+    """Per-sensor signal parameters gathered into arrays for batch generation.
+
+    Built once per sensor inventory with ``from_sensors`` so that each tick
+    only does array arithmetic.
+    """
+
+    sensors: tuple[Sensor, ...]
+    setpoints: np.ndarray
+    noise_std: np.ndarray
+    seasonal_amplitude: np.ndarray
+    omega: np.ndarray
+    min_range: np.ndarray
+    max_range: np.ndarray
+
+    @classmethod
+    def from_sensors(cls, sensors: Sequence[Sensor]) -> SensorArrays:
+        """Resolve each sensor's config and stack the parameters column-wise."""
+        configs = [_get_config(sensor) for sensor in sensors]
+        return cls(
+            sensors=tuple(sensors),
+            setpoints=np.array([c.setpoint for c in configs]),
+            noise_std=np.array([c.noise_std for c in configs]),
+            seasonal_amplitude=np.array([c.seasonal_amplitude for c in configs]),
+            omega=np.array([c._omega for c in configs]),
+            min_range=np.array([sensor.min_range for sensor in sensors]),
+            max_range=np.array([sensor.max_range for sensor in sensors]),
+        )
+
+
+def generate_readings_batch(
+    arrays: SensorArrays,
+    t_hours: float,
+    pattern: str = "normal",
+) -> np.ndarray:
+    """Generate one value per sensor at a single point in time.
+
+    Batch counterpart of ``generate_reading`` across sensors: noise for every
+    sensor is drawn in one call and the result is clamped with a single
+    ``np.clip``.
+    """
+    size = len(arrays.sensors)
+    seasonal = arrays.setpoints + arrays.seasonal_amplitude * np.sin(arrays.omega * t_hours)
+
+    match pattern:
+        case "degradation":
+            values = seasonal + arrays.noise_std * _standard_normal(size) + _DRIFT_RATE * t_hours
+        case "failure":
+            direction = np.where(_rng.random(size) > 0.5, 1.0, -1.0)
+            values = arrays.setpoints + direction * _SPIKE_FACTOR * arrays.noise_std
+        case "seasonal":
+            values = seasonal
+        case _:
+            values = seasonal + arrays.noise_std * _standard_normal(size)
+
+    return np.clip(values, arrays.min_range, arrays.max_range)
@@ -0,0 +1,265 @@
+"""Shared NiFi REST client for the fix-* bootstrap scripts.
+
+The fix-* scripts patch a running dev flow in place. Session setup, processor and
+connection helpers, and the stop/start barriers live here so each script only
+carries its own fix-up steps.
+"""
+
+import os
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+try:
+    import orjson
+
+    _jloads = orjson.loads
+except ImportError:
+    import json
+
+    _jloads = json.loads
+
+NIFI_URL = os.environ.get("NIFI_URL", "https://localhost:8443")
+
+ROOT_PG_ID = "83e6edba-019c-1000-c32f-bcc77a22e032"
+PG07_ID = "83ffc788-019c-1000-e688-33bc08e3068f"
+TSDB_POOL_ID = "83ffc101-019c-1000-34e4-c49af5bfc412"
+
+# Bulk connection deletes are independent of each other and run concurrently
+DELETE_WORKERS = 8
+
+
+def _queued(conn):
+    """Number of FlowFiles queued on a connection entity, per its status snapshot."""
+    return conn.get("status", {}).get("aggregateSnapshot", {}).get("flowFilesQueued", 0)
+
+
+def make_session():
+    """Create the JSON session shared by every call in a script run.
+
+    A single host is ever contacted, so one pool suffices; it keeps one
+    keep-alive connection per bulk-delete worker so TLS handshakes happen once
+    per run instead of once per request.
+    """
+    s = requests.Session()
+    s.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
+    s.verify = False
+    s.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=DELETE_WORKERS))
+    return s
+
+
+class NiFiClient:
+    """Minimal NiFi REST API client for in-place flow fix-ups."""
+
+    def __init__(self, nifi_url=NIFI_URL):
+        self.base = f"{nifi_url}/nifi-api"
+        self.s = make_session()
+        self.client_id = str(uuid.uuid4())
+        # proc_id -> (revision version, processor name), refreshed from each PUT response
+        self._rev_cache = {}
+
+    def get_json(self, path):
+        """GET path and decode the body with the fastest available JSON parser."""
+        return _jloads(self.s.get(f"{self.base}{path}").content)
+
+    # ---- Lookups ----
+
+    def processors(self, pg_id):
+        """Return dict mapping processor name -> processor ID."""
+        procs = self.get_json(f"/process-groups/{pg_id}/processors").get("processors", [])
+        return {p["component"]["name"]: p["id"] for p in procs}
+
+    def connections(self, pg_id):
+        return self.get_json(f"/process-groups/{pg_id}/connections").get("connections", [])
+
+    def input_port_id(self, pg_id):
+        ports = self.get_json(f"/process-groups/{pg_id}/input-ports").get("inputPorts", [])
+        return ports[0]["id"] if ports else None
+
+    def controller_services(self, pg_id):
+        """Return dict mapping service name -> service ID."""
+        svcs = self.get_json(f"/flow/process-groups/{pg_id}/controller-services")
+        return {c["component"]["name"]: c["id"] for c in svcs.get("controllerServices", [])}
+
+    # ---- Processors ----
+
+    def create_processor(self, pg_id, name, proc_type, position, properties,
+                         auto_terminated=None, comments=""):
+        payload = {
+            "revision": {"version": 0},
+            "component": {
+                "name": name,
+                "type": proc_type,
+                "position": position,
+                "config": {
+                    "properties": properties,
+                    "autoTerminatedRelationships": auto_terminated or [],
+                },
+                "comments": comments,
+            },
+        }
+        resp = self.s.post(f"{self.base}/process-groups/{pg_id}/processors", json=payload)
+        print(f"  Created {name}: {resp.status_code}")
+        if resp.status_code not in (200, 201):
+            print(f"    {resp.text[:500]}")
+            raise SystemExit(1)
+        return _jloads(resp.content)["id"]
+
+    def update_processor(self, proc_id, properties=None, auto_terminated=None,
+                         known_revision=None):
+        if known_revision is not None:
+            version, name = known_revision, proc_id[:8]
+        elif proc_id in self._rev_cache:
+            version, name = self._rev_cache[proc_id]
+        else:
+            data = self.get_json(f"/processors/{proc_id}")
+            version, name = data["revision"]["version"], data["component"]["name"]
+        config = {}
+        if properties is not None:
+            config["properties"] = properties
+        if auto_terminated is not None:
+            config["autoTerminatedRelationships"] = auto_terminated
+        payload = {
+            "revision": {"version": version, "clientId": self.client_id},
+            "component": {"id": proc_id, "config": config},
+        }
+        resp = self.s.put(f"{self.base}/processors/{proc_id}", json=payload)
+        print(f"  {name}: {resp.status_code}")
+        if resp.status_code != 200:
+            print(f"    {resp.text[:300]}")
+            self._rev_cache.pop(proc_id, None)
+            return False
+        self._rev_cache[proc_id] = (_jloads(resp.content)["revision"]["version"], name)
+        return True
+
+    def delete_processor(self, proc_id):
+        data = self.get_json(f"/processors/{proc_id}")
+        if "id" not in data:
+            return True
+        rev = data["revision"]["version"]
+        resp = self.s.delete(f"{self.base}/processors/{proc_id}?version={rev}")
+        print(f"  Deleted processor {data['component']['name']}: {resp.status_code}")
+        self._rev_cache.pop(proc_id, None)
+        return resp.status_code == 200
+
+    # ---- Connections ----
+
+    def create_connection(self, pg_id, src_id, dst_id, rels,
+                          src_type="PROCESSOR", dst_type="PROCESSOR"):
+        payload = {
+            "revision": {"version": 0},
+            "component": {
+                "source": {"id": src_id, "groupId": pg_id, "type": src_type},
+                "destination": {"id": dst_id, "groupId": pg_id, "type": dst_type},
+                "selectedRelationships": rels,
+            },
+        }
+        resp = self.s.post(f"{self.base}/process-groups/{pg_id}/connections", json=payload)
+        ok = resp.status_code in (200, 201)
+        print(f"  Connected {src_id[:8]} -> {dst_id[:8]} [{','.join(rels)}]: {resp.status_code}")
+        if not ok:
+            print(f"    {resp.text[:200]}")
+        return ok
+
+    def drain_connection(self, conn_id, max_s=30):
+        """Drop every FlowFile queued on a connection and wait for the drop to finish."""
+        resp = self.s.post(f"{self.base}/flowfile-queues/{conn_id}/drop-requests")
+        if resp.status_code not in (200, 201, 202):
+            print(f"  Drain {conn_id[:8]} failed: {resp.status_code}")
+            return
+        drop = _jloads(resp.content)["dropRequest"]
+        url = f"{self.base}/flowfile-queues/{conn_id}/drop-requests/{drop['id']}"
+        deadline = time.monotonic() + max_s
+        while not drop.get("finished") and time.monotonic() < deadline:
+            time.sleep(0.25)
+            drop = self.get_json(url[len(self.base):])["dropRequest"]
+        self.s.delete(url)
+
+    def delete_connection(self, conn_id, rev=None, queued=None):
+        """Delete a connection, draining its queue first if it still holds FlowFiles.
+
+        NiFi refuses to delete a non-empty connection, and stopping the flow
+        does not empty it. rev and queued (the connection's revision version
+        and flowFilesQueued) come from a listing when available; otherwise
+        the connection is fetched.
+        """
+        if rev is None or queued is None:
+            conn = self.get_json(f"/connections/{conn_id}")
+            rev, queued = conn["revision"]["version"], _queued(conn)
+        if queued > 0:
+            print(f"  Draining {queued} FlowFiles from {conn_id[:8]}...")
+            self.drain_connection(conn_id)
+        resp = self.s.delete(f"{self.base}/connections/{conn_id}?version={rev}")
+        print(f"  Del conn {conn_id[:8]}: {resp.status_code}")
+        return resp.status_code == 200
+
+    def delete_connection_between(self, pg_id, src_id, dst_id):
+        for conn in self.connections(pg_id):
+            comp = conn["component"]
+            if comp["source"]["id"] == src_id and comp["destination"]["id"] == dst_id:
+                return self.delete_connection(
+                    conn["id"], conn["revision"]["version"], _queued(conn)
+                )
+        print("  Connection not found")
+        return False
+
+    def delete_connections_touching(self, pg_id, *proc_ids):
+        """Delete every connection with any of proc_ids as source or destination.
+
+        The PG's connections are listed once and indexed by endpoint; the
+        matching DELETEs then run concurrently.
+        """
+        touching = defaultdict(list)
+        for conn in self.connections(pg_id):
+            comp = conn["component"]
+            touching[comp["source"]["id"]].append(conn)
+            touching[comp["destination"]["id"]].append(conn)
+        doomed = {c["id"]: c for pid in proc_ids for c in touching[pid]}
+        with ThreadPoolExecutor(DELETE_WORKERS) as pool:
+            list(pool.map(
+                self.delete_connection,
+                doomed,
+                (c["revision"]["version"] for c in doomed.values()),
+                (_queued(c) for c in doomed.values()),
+            ))
+
+    # ---- Run state ----
+
+    def set_state(self, pg_id, state):
+        resp = self.s.put(
+            f"{self.base}/flow/process-groups/{pg_id}", json={"id": pg_id, "state": state}
+        )
+        print(f"{state}: {resp.status_code}")
+        return resp.status_code == 200
+
+    def wait_stopped(self, pg_id, max_s=10):
+        """Poll the PG until no threads are active, up to max_s seconds."""
+        deadline = time.monotonic() + max_s
+        while time.monotonic() < deadline:
+            status = self.get_json(f"/flow/process-groups/{pg_id}/status")
+            if status["processGroupStatus"]["aggregateSnapshot"]["activeThreadCount"] == 0:
+                return
+            time.sleep(0.25)
+
+    def wait_running(self, pg_id, max_s=10):
+        """Poll the PG until at least one component reports RUNNING, up to max_s seconds."""
+        deadline = time.monotonic() + max_s
+        while time.monotonic() < deadline:
+            if self.get_json(f"/process-groups/{pg_id}").get("runningCount", 0) > 0:
+                return
+            time.sleep(0.25)
+
+    def stop(self, pg_id=ROOT_PG_ID):
+        self.set_state(pg_id, "STOPPED")
+        self.wait_stopped(pg_id)
+
+    def start(self, pg_id=ROOT_PG_ID):
+        self.set_state(pg_id, "RUNNING")
+        self.wait_running(pg_id)
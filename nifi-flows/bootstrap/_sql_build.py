@@ -0,0 +1,36 @@
+"""Shared builder for PutSQL INSERT statements bound through sql.args.N.* attributes.
+
+PutSQL binds sql.args.N.type / sql.args.N.value through a JDBC PreparedStatement,
+so the statement text only carries ? placeholders and the values stay in NiFi EL.
+"""
+
+# java.sql.Types codes understood by PutSQL
+JDBC_DOUBLE = "8"
+JDBC_VARCHAR = "12"
+
+
+def putsql_insert(table, numeric_cols, string_cols, timestamp_expr):
+    """Build a parameterized INSERT plus the UpdateAttribute properties that bind it.
+
+    The first column is always ``time``, populated via ``to_timestamp(?)`` from
+    ``timestamp_expr`` (an EL expression yielding epoch seconds). Every other
+    column is bound from the FlowFile attribute of the same name.
+
+    Returns:
+        Tuple of (sql statement, {"sql.args.N.type": ..., "sql.args.N.value": ...}).
+    """
+    args = [(JDBC_DOUBLE, timestamp_expr)]
+    args.extend((JDBC_DOUBLE, "${" + col + "}") for col in numeric_cols)
+    args.extend((JDBC_VARCHAR, "${" + col + "}") for col in string_cols)
+
+    cols = ", ".join(("time", *numeric_cols, *string_cols))
+    placeholders = "".join(", ?" for _ in range(len(args) - 1))
+    sql = "".join(
+        ("INSERT INTO ", table, " (", cols, ") VALUES (to_timestamp(?)", placeholders, ")")
+    )
+
+    attrs = {}
+    for i, (jdbc_type, expr) in enumerate(args, start=1):
+        attrs[f"sql.args.{i}.type"] = jdbc_type
+        attrs[f"sql.args.{i}.value"] = expr
+    return sql, attrs
@@ -0,0 +1,94 @@
+"""Post-fix status report shared by the fix-* bootstrap scripts.
+
+Prints root PG throughput, TimescaleDB row count and errors, Kafka topic offsets
+and recent NiFi bulletins after a fix-up has been applied and the flow restarted.
+"""
+
+import subprocess
+
+from _nifi_api import ROOT_PG_ID
+
+
+def print_flow_status(client, root_id=ROOT_PG_ID):
+    print("\n=== Flow Status ===")
+    status = client.get_json(f"/flow/process-groups/{root_id}/status")
+    agg = status.get("processGroupStatus", {}).get("aggregateSnapshot", {})
+    print(f"FlowFiles Queued: {agg.get('flowFilesQueued', 0)}")
+    print(f"Active Threads:   {agg.get('activeThreadCount', 0)}")
+
+    pgs = agg.get("processGroupStatusSnapshots", [])
+    for pg in sorted(pgs, key=lambda x: x.get("processGroupStatusSnapshot", {}).get("name", "")):
+        snap = pg["processGroupStatusSnapshot"]
+        name = snap["name"]
+        ff_in = snap.get("flowFilesIn", 0)
+        ff_out = snap.get("flowFilesOut", 0)
+        ff_q = snap.get("flowFilesQueued", 0)
+        print(f"  {name}: in={ff_in} out={ff_out} q={ff_q}")
+
+
+def tsdb_status():
+    """Return (row count, recent server log lines).
+
+    The server logs to stderr, so the log tail comes from ``docker logs``; it
+    runs alongside the psql count instead of after it.
+    """
+    logs = subprocess.Popen(
+        ["docker", "logs", "--tail", "100", "oilgas-timescaledb"],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    try:
+        result = subprocess.run(
+            ["docker", "exec", "oilgas-timescaledb", "psql", "-U", "nifi", "-d", "sensordb",
+             "-t", "-c", "SELECT COUNT(*) FROM sensor_readings;"],
+            capture_output=True, text=True, timeout=15
+        )
+        log, _ = logs.communicate(timeout=15)
+    finally:
+        if logs.poll() is None:
+            logs.kill()
+            logs.wait()
+    return result.stdout.strip(), log.splitlines()
+
+
+def print_tsdb_status():
+    print("\n=== TimescaleDB ===")
+    try:
+        count, log_lines = tsdb_status()
+    except Exception as e:
+        print(f"  Error: {e}")
+        return
+    print(f"  Rows: {count}")
+    errors = [line for line in log_lines if "ERROR" in line or "STATEMENT" in line]
+    for line in errors[:5]:
+        print(f"  {line[:250]}")
+    if not errors:
+        print("  No recent DB errors!")
+
+
+def print_kafka_offsets(topics):
+    print("\n=== Kafka Topics ===")
+    for topic in topics:
+        try:
+            result = subprocess.run(
+                ["docker", "exec", "oilgas-kafka", "kafka-run-class",
+                 "kafka.tools.GetOffsetShell",
+                 "--broker-list", "localhost:29092",
+                 "--topic", topic],
+                capture_output=True, text=True, timeout=10
+            )
+            offsets = result.stdout.strip()
+            total = sum(int(line.split(":")[-1]) for line in offsets.split("\n") if line.strip())
+            print(f"  {topic}: {total} messages")
+        except Exception as e:
+            print(f"  {topic}: {e}")
+
+
+def print_bulletins(client, limit=10):
+    print("\n=== Recent Bulletins ===")
+    bulletins = client.get_json(f"/flow/bulletin-board?limit={limit}")
+    for b in bulletins.get("bulletinBoard", {}).get("bulletins", [])[:limit]:
+        bul = b.get("bulletin", {})
+        level = bul.get("level", "")
+        name = bul.get("sourceName", "?")
+        msg = bul.get("message", "")[:180]
+        print(f"  [{level}] {name}: {msg}")
@@ -3,99 +3,27 @@
 Fixes:
 1. Kafka topic names: match actual Kafka topics (sensor.validated, alerts.critical, etc.)
 2. Kafka DLQ: create missing sensor.dlq topic
-3. TimescaleDB: Replace PutDatabaseRecord with EvaluateJsonPath + PutSQL
-   - PutSQL uses PostgreSQL to_timestamp() for epoch ms conversion
+3. TimescaleDB: Batch readings with MergeRecord before a single PutDatabaseRecord
+   - UpdateRecord maps epoch ms 'timestamp' to the TIMESTAMPTZ 'time' column
+   - PutDatabaseRecord sends each merged FlowFile as one JDBC batch
 """
 
-import os
 import subprocess
 import time
 
-import requests
-import urllib3
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-NIFI_URL = os.environ.get("NIFI_URL", "https://localhost:8443")
-base = f"{NIFI_URL}/nifi-api"
-s = requests.Session()
-s.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
-s.verify = False
-
-root_id = "83e6edba-019c-1000-c32f-bcc77a22e032"
-
-
-def update_processor(proc_id, properties=None, auto_terminated=None):
-    data = s.get(f"{base}/processors/{proc_id}").json()
-    rev = data["revision"]
-    name = data["component"]["name"]
-    config = {}
-    if properties is not None:
-        config["properties"] = properties
-    if auto_terminated is not None:
-        config["autoTerminatedRelationships"] = auto_terminated
-    payload = {"revision": rev, "component": {"id": proc_id, "config": config}}
-    resp = s.put(f"{base}/processors/{proc_id}", json=payload)
-    print(f"  {name}: {resp.status_code}")
-    if resp.status_code != 200:
-        print(f"    {resp.text[:300]}")
-    return resp.status_code == 200
-
-
-def delete_connection_between(pg_id, src_id, dst_id):
-    """Delete connection between two components, draining queue first."""
-    conns = s.get(f"{base}/process-groups/{pg_id}/connections").json().get("connections", [])
-    for conn in conns:
-        src = conn["component"]["source"]["id"]
-        dst = conn["component"]["destination"]["id"]
-        if src == src_id and dst == dst_id:
-            conn_id = conn["id"]
-            try:
-                s.post(f"{base}/flowfile-queues/{conn_id}/drop-requests")
-                time.sleep(1)
-            except Exception:
-                pass
-            conn_data = s.get(f"{base}/connections/{conn_id}").json()
-            rev = conn_data["revision"]["version"]
-            resp = s.delete(f"{base}/connections/{conn_id}?version={rev}")
-            print(f"  Deleted connection: {resp.status_code}")
-            return resp.status_code == 200
-    return False
-
-
-def delete_processor(proc_id):
-    """Delete a processor."""
-    data = s.get(f"{base}/processors/{proc_id}").json()
-    if "id" not in data:
-        return True
-    rev = data["revision"]["version"]
-    resp = s.delete(f"{base}/processors/{proc_id}?version={rev}")
-    print(f"  Deleted processor {data['component']['name']}: {resp.status_code}")
-    return resp.status_code == 200
-
-
-def create_connection(pg_id, src_id, dst_id, rels, src_type="PROCESSOR", dst_type="PROCESSOR"):
-    payload = {
-        "revision": {"version": 0},
-        "component": {
-            "source": {"id": src_id, "groupId": pg_id, "type": src_type},
-            "destination": {"id": dst_id, "groupId": pg_id, "type": dst_type},
-            "selectedRelationships": rels,
-        },
-    }
-    resp = s.post(f"{base}/process-groups/{pg_id}/connections", json=payload)
-    status = "OK" if resp.status_code in (200, 201) else f"FAIL ({resp.status_code})"
-    print(f"  Connected [{','.join(rels)}]: {status}")
-    if resp.status_code not in (200, 201):
-        print(f"    {resp.text[:200]}")
-    return resp.status_code in (200, 201)
+from _nifi_api import PG07_ID, ROOT_PG_ID, TSDB_POOL_ID, NiFiClient
+from _status_report import (
+    print_bulletins,
+    print_flow_status,
+    print_kafka_offsets,
+    print_tsdb_status,
+)
 
+nifi = NiFiClient()
 
 # ============ Stop all PGs ============
 print("Stopping all PGs...")
-s.put(f"{base}/flow/process-groups/{root_id}", json={"id": root_id, "state": "STOPPED"})
-time.sleep(5)
-print("Stopped")
+nifi.stop()
 
 # ============ 1. Create sensor.dlq Kafka topic ============
 print("\n=== Creating sensor.dlq Kafka topic ===")
@@ -123,256 +51,128 @@ topic_fixes = {
     "841f8d22-019c-1000-e4af-2df91a9f29c0": "sensor.dlq",          # PG-10
 }
 for proc_id, topic in topic_fixes.items():
-    update_processor(proc_id, properties={"topic": topic})
+    nifi.update_processor(proc_id, properties={"topic": topic})
 
-# ============ 3. Fix PG-07: Replace PutDatabaseRecord with EvaluateJsonPath + PutSQL ============
+# ============ 3. Fix PG-07: MergeRecord + UpdateRecord + PutDatabaseRecord ============
 print("\n=== Fix PG-07: TimescaleDB Storage ===")
-pg07_id = "83ffc788-019c-1000-e688-33bc08e3068f"
-
-# Get existing processors
-procs = s.get(f"{base}/process-groups/{pg07_id}/processors").json().get("processors", [])
-proc_map = {p["component"]["name"]: p["id"] for p in procs}
+proc_map = nifi.processors(PG07_ID)
 print("  Current processors:", list(proc_map.keys()))
-
-convert_id = proc_map.get("PrepareForDB")
-put_db_id = proc_map.get("WriteToTimescaleDB")
 log_id = proc_map.get("LogDBWriteFailure")
-eval_id = proc_map.get("ExtractTimestamp")
-replace_id = proc_map.get("ConvertTimestampToISO")
 
-# Delete old processors: ExtractTimestamp, ConvertTimestampToISO, WriteToTimescaleDB
-# First delete their connections
+# Delete old processors (earlier fix-ups and previous runs of this script) and
+# PrepareForDB (ConvertRecord), which the record-based pipeline does not need
 print("\n  Removing old processors and connections...")
-
-# Delete all connections involving the processors we want to remove
-for proc_name in ["ExtractTimestamp", "ConvertTimestampToISO", "WriteToTimescaleDB"]:
-    pid = proc_map.get(proc_name)
-    if not pid:
-        continue
-    conns = s.get(f"{base}/process-groups/{pg07_id}/connections").json().get("connections", [])
-    for conn in conns:
-        src = conn["component"]["source"]["id"]
-        dst = conn["component"]["destination"]["id"]
-        if src == pid or dst == pid:
-            conn_id = conn["id"]
-            try:
-                s.post(f"{base}/flowfile-queues/{conn_id}/drop-requests")
-                time.sleep(0.5)
-            except Exception:
-                pass
-            conn_data = s.get(f"{base}/connections/{conn_id}").json()
-            rev = conn_data["revision"]["version"]
-            resp = s.delete(f"{base}/connections/{conn_id}?version={rev}")
-            print(f"  Del conn {conn_id[:8]}: {resp.status_code}")
-            time.sleep(0.2)
-
-# Delete the processors themselves
-for proc_name in ["ExtractTimestamp", "ConvertTimestampToISO", "WriteToTimescaleDB"]:
-    pid = proc_map.get(proc_name)
-    if pid:
-        delete_processor(pid)
-
-# Also delete PrepareForDB -> LogDBWriteFailure connection (we'll re-create later)
-conns = s.get(f"{base}/process-groups/{pg07_id}/connections").json().get("connections", [])
-for conn in conns:
-    src = conn["component"]["source"]["id"]
-    dst = conn["component"]["destination"]["id"]
-    if src == convert_id:
-        conn_id = conn["id"]
-        try:
-            s.post(f"{base}/flowfile-queues/{conn_id}/drop-requests")
-            time.sleep(0.5)
-        except Exception:
-            pass
-        conn_data = s.get(f"{base}/connections/{conn_id}").json()
-        rev = conn_data["revision"]["version"]
-        resp = s.delete(f"{base}/connections/{conn_id}?version={rev}")
-        print(f"  Del PrepareForDB conn: {resp.status_code}")
-
-# Also delete PrepareForDB (ConvertRecord) - we don't need it
-if convert_id:
-    # First delete remaining connections
-    conns = s.get(f"{base}/process-groups/{pg07_id}/connections").json().get("connections", [])
-    for conn in conns:
-        if conn["component"]["source"]["id"] == convert_id or conn["component"]["destination"]["id"] == convert_id:
-            conn_id = conn["id"]
-            try:
-                s.post(f"{base}/flowfile-queues/{conn_id}/drop-requests")
-                time.sleep(0.3)
-            except Exception:
-                pass
-            conn_data = s.get(f"{base}/connections/{conn_id}").json()
-            rev = conn_data["revision"]["version"]
-            s.delete(f"{base}/connections/{conn_id}?version={rev}")
-    delete_processor(convert_id)
-
-# Get input port
-ports = s.get(f"{base}/process-groups/{pg07_id}/input-ports").json().get("inputPorts", [])
-input_port_id = ports[0]["id"] if ports else None
+OLD_PROCESSORS = [
+    "PrepareForDB",
+    "ExtractTimestamp",
+    "ConvertTimestampToISO",
+    "ExtractAllFields",
+    "BindSqlArgs",
+    "BatchReadings",
+    "MapTimestampToTime",
+    "WriteToTimescaleDB",
+]
+old_ids = [proc_map[name] for name in OLD_PROCESSORS if name in proc_map]
+nifi.delete_connections_touching(PG07_ID, *old_ids)
+for pid in old_ids:
+    nifi.delete_processor(pid)
+
+input_port_id = nifi.input_port_id(PG07_ID)
 print(f"  Input port: {input_port_id}")
 
-# Create EvaluateJsonPath to extract ALL fields into attributes
-print("\n  Creating EvaluateJsonPath (ExtractAllFields)...")
-eval_payload = {
-    "revision": {"version": 0},
-    "component": {
-        "name": "ExtractAllFields",
-        "type": "org.apache.nifi.processors.standard.EvaluateJsonPath",
-        "position": {"x": 200, "y": 400},
-        "config": {
-            "properties": {
-                "Destination": "flowfile-attribute",
-                "Return Type": "auto-detect",
-                "reading_id": "$.reading_id",
-                "platform_id": "$.platform_id",
-                "sensor_id": "$.sensor_id",
-                "sensor_type": "$.sensor_type",
-                "value": "$.value",
-                "unit": "$.unit",
-                "epoch_time": "$.timestamp",
-                "quality_flag": "$.quality_flag",
-            },
-            "autoTerminatedRelationships": ["unmatched"],
-        },
-        "comments": "Extracts all JSON fields into FlowFile attributes for PutSQL",
+# Record reader/writer services, looked up by name
+svc_ids = nifi.controller_services(ROOT_PG_ID)
+json_reader_id = svc_ids.get("JsonTreeReader", "")
+json_writer_id = svc_ids.get("JsonRecordSetWriter", "")
+
+# MergeRecord bins single-reading FlowFiles so the DB writer sees hundreds of
+# records per FlowFile instead of one JDBC round-trip per reading
+print("\n  Creating MergeRecord (BatchReadings)...")
+merge_id = nifi.create_processor(
+    PG07_ID,
+    "BatchReadings",
+    "org.apache.nifi.processors.standard.MergeRecord",
+    {"x": 200, "y": 400},
+    {
+        "record-reader": json_reader_id,
+        "record-writer": json_writer_id,
+        "merge-strategy": "Bin-Packing Algorithm",
+        "min-records": "500",
+        "max-records": "5000",
+        "max-bin-age": "2 sec",
     },
-}
-resp = s.post(f"{base}/process-groups/{pg07_id}/processors", json=eval_payload)
-print(f"  Created EvaluateJsonPath: {resp.status_code}")
-if resp.status_code not in (200, 201):
-    print(f"    {resp.text[:400]}")
-    exit(1)
-new_eval_id = resp.json()["id"]
-
-# Create PutSQL processor
-# The SQL uses to_timestamp() to convert epoch ms to TIMESTAMPTZ
-# NiFi EL attributes are interpolated as strings
-sq = chr(39)  # single quote for SQL
-sql_stmt = (
-    f"INSERT INTO sensor_readings (time, reading_id, platform_id, sensor_id, "
-    f"sensor_type, value, unit, quality_flag) VALUES ("
-    f"to_timestamp(${{epoch_time:toNumber():divide(1000)}}), "
-    f"${{reading_id:prepend({sq}):append({sq})}}, "
-    f"${{platform_id:prepend({sq}):append({sq})}}, "
-    f"${{sensor_id:prepend({sq}):append({sq})}}, "
-    f"${{sensor_type:prepend({sq}):append({sq})}}, "
-    f"${{value}}, "
-    f"${{unit:prepend({sq}):append({sq})}}, "
-    f"${{quality_flag:prepend({sq}):append({sq})}})"
+    ["original"],
+    "Merges sensor readings into batches of 500-5000 records (max 2s latency)",
 )
-print(f"  SQL: {sql_stmt[:120]}...")
 
-# Get TimescaleDB DBCP connection pool ID
-tsdb_pool_id = "83ffc101-019c-1000-34e4-c49af5bfc412"
+# UpdateRecord maps epoch ms 'timestamp' onto the TIMESTAMPTZ 'time' column;
+# the leftover 'timestamp' field is dropped by PutDatabaseRecord as unmatched
+sq = chr(39)  # single quote - avoids Python escaping issues
+fmt = f"yyyy-MM-dd{sq}T{sq}HH:mm:ss.SSSZ"
+print("\n  Creating UpdateRecord (MapTimestampToTime)...")
+update_id = nifi.create_processor(
+    PG07_ID,
+    "MapTimestampToTime",
+    "org.apache.nifi.processors.standard.UpdateRecord",
+    {"x": 200, "y": 520},
+    {
+        "record-reader": json_reader_id,
+        "record-writer": json_writer_id,
+        "replacement-value-strategy": "record-path-value",
+        "/time": f'format(/timestamp, "{fmt}", "UTC")',
+    },
+    [],
+    "Maps epoch ms 'timestamp' to ISO 8601 'time' for the TIMESTAMPTZ column",
+)
 
-print("\n  Creating PutSQL (WriteToTimescaleDB)...")
-putsql_payload = {
-    "revision": {"version": 0},
-    "component": {
-        "name": "WriteToTimescaleDB",
-        "type": "org.apache.nifi.processors.standard.PutSQL",
-        "position": {"x": 200, "y": 520},
-        "config": {
-            "properties": {
-                "JDBC Connection Pool": tsdb_pool_id,
-                "putsql-sql-statement": sql_stmt,
-                "Support Fragmented Transactions": "false",
-                "database-session-autocommit": "true",
-                "rollback-on-failure": "false",
-            },
-            "autoTerminatedRelationships": ["success"],
-        },
-        "comments": "Inserts sensor readings into TimescaleDB with to_timestamp() conversion",
+# PutDatabaseRecord writes each merged FlowFile as one batched INSERT
+print("\n  Creating PutDatabaseRecord (WriteToTimescaleDB)...")
+put_db_id = nifi.create_processor(
+    PG07_ID,
+    "WriteToTimescaleDB",
+    "org.apache.nifi.processors.standard.PutDatabaseRecord",
+    {"x": 200, "y": 640},
+    {
+        "record-reader": json_reader_id,
+        "Database Connection Pooling Service": TSDB_POOL_ID,
+        "Statement Type": "INSERT",
+        "Schema Name": "public",
+        "Table Name": "sensor_readings",
+        "Translate Field Names": "true",
+        "Unmatched Field Behavior": "Ignore Unmatched Fields",
+        "Unmatched Column Behavior": "Ignore Unmatched Columns",
+        "Quote Column Identifiers": "true",
+        "Max Batch Size": "0",
     },
-}
-resp = s.post(f"{base}/process-groups/{pg07_id}/processors", json=putsql_payload)
-print(f"  Created PutSQL: {resp.status_code}")
-if resp.status_code not in (200, 201):
-    print(f"    {resp.text[:500]}")
-    exit(1)
-new_putsql_id = resp.json()["id"]
+    ["success"],
+    "Inserts merged sensor readings into TimescaleDB, one JDBC batch per FlowFile",
+)
 
-# Wire: input -> ExtractAllFields -> PutSQL
+# Wire: input -> BatchReadings -> MapTimestampToTime -> WriteToTimescaleDB
 # failures -> LogDBWriteFailure
 print("\n  Wiring processors...")
 
-# input -> EvaluateJsonPath
-create_connection(pg07_id, input_port_id, new_eval_id, [], src_type="INPUT_PORT")
-
-# EvaluateJsonPath -> PutSQL (matched)
-create_connection(pg07_id, new_eval_id, new_putsql_id, ["matched"])
-
-# EvaluateJsonPath failure -> Log
-if log_id:
-    create_connection(pg07_id, new_eval_id, log_id, ["failure"])
+nifi.create_connection(PG07_ID, input_port_id, merge_id, [], src_type="INPUT_PORT")
+nifi.create_connection(PG07_ID, merge_id, update_id, ["merged"])
+nifi.create_connection(PG07_ID, update_id, put_db_id, ["success"])
 
-# PutSQL failure/retry -> Log
 if log_id:
-    create_connection(pg07_id, new_putsql_id, log_id, ["failure", "retry"])
+    nifi.create_connection(PG07_ID, merge_id, log_id, ["failure"])
+    nifi.create_connection(PG07_ID, update_id, log_id, ["failure"])
+    nifi.create_connection(PG07_ID, put_db_id, log_id, ["failure", "retry"])
 
-print("\n  Pipeline: input -> ExtractAllFields -> WriteToTimescaleDB (PutSQL)")
+print("\n  Pipeline: input -> BatchReadings -> MapTimestampToTime -> WriteToTimescaleDB")
 
 # ============ Start all PGs ============
 print("\n=== Starting all PGs ===")
-time.sleep(2)
-resp = s.put(f"{base}/flow/process-groups/{root_id}", json={"id": root_id, "state": "RUNNING"})
-print(f"Start: {resp.status_code}")
+nifi.start()
 
 # Wait for data
 print("\nWaiting 25s for data to flow...")
 time.sleep(25)
 
 # ============ Check results ============
-print("\n=== Flow Status ===")
-status = s.get(f"{base}/flow/process-groups/{root_id}/status").json()
-agg = status.get("processGroupStatus", {}).get("aggregateSnapshot", {})
-print(f"FlowFiles Queued: {agg.get('flowFilesQueued', 0)}")
-print(f"Active Threads:   {agg.get('activeThreadCount', 0)}")
-
-pgs = agg.get("processGroupStatusSnapshots", [])
-for pg in sorted(pgs, key=lambda x: x.get("processGroupStatusSnapshot", {}).get("name", "")):
-    snap = pg["processGroupStatusSnapshot"]
-    name = snap["name"]
-    ff_in = snap.get("flowFilesIn", 0)
-    ff_out = snap.get("flowFilesOut", 0)
-    ff_q = snap.get("flowFilesQueued", 0)
-    print(f"  {name}: in={ff_in} out={ff_out} q={ff_q}")
-
-# Check TimescaleDB
-print("\n=== TimescaleDB ===")
-try:
-    result = subprocess.run(
-        ["docker", "exec", "oilgas-timescaledb", "psql", "-U", "nifi", "-d", "sensordb",
-         "-c", "SELECT COUNT(*) as total FROM sensor_readings;"],
-        capture_output=True, text=True, timeout=10
-    )
-    print(f"  {result.stdout.strip()}")
-except Exception as e:
-    print(f"  Error: {e}")
-
-# Check Kafka
-print("\n=== Kafka Topics ===")
-for topic in ["sensor.validated", "alerts.critical", "compliance.emissions", "sensor.dlq"]:
-    try:
-        result = subprocess.run(
-            ["docker", "exec", "oilgas-kafka", "kafka-run-class",
-             "kafka.tools.GetOffsetShell",
-             "--broker-list", "localhost:29092",
-             "--topic", topic],
-            capture_output=True, text=True, timeout=10
-        )
-        offsets = result.stdout.strip()
-        total = sum(int(line.split(":")[-1]) for line in offsets.split("\n") if line.strip())
-        print(f"  {topic}: {total} messages")
-    except Exception as e:
-        print(f"  {topic}: {e}")
-
-# Bulletins
-print("\n=== Recent Bulletins ===")
-bulletins = s.get(f"{base}/flow/bulletin-board?limit=10").json()
-for b in bulletins.get("bulletinBoard", {}).get("bulletins", [])[:10]:
-    bul = b.get("bulletin", {})
-    level = bul.get("level", "")
-    name = bul.get("sourceName", "?")
-    msg = bul.get("message", "")[:180]
-    print(f"  [{level}] {name}: {msg}")
+print_flow_status(nifi)
+print_tsdb_status()
+print_kafka_offsets(["sensor.validated", "alerts.critical", "compliance.emissions", "sensor.dlq"])
+print_bulletins(nifi)
@@ -4,51 +4,413 @@ Fixes:
 1. Update parameter context Kafka topic names to match actual topics
 2. Drain all backpressured queues
 3. Increase backpressure thresholds to 50,000 FlowFiles
-4. Increase PutSQL concurrent tasks for better throughput
+4. Increase WriteToTimescaleDB (PutDatabaseRecord) concurrent tasks for better throughput
 5. Organize processor positions in each PG for clean visual layout
 6. Verify all relationships are properly terminated
+
+Runs against the live flow; set NIFI_STOP_ALL=1 to stop the root PG for the whole run.
 """
 
 import os
+import random
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+try:
+    import orjson
+
+    _jloads, _jdumps = orjson.loads, orjson.dumps
+except ImportError:
+    import json
+
+    _jloads, _jdumps = json.loads, json.dumps
+
 NIFI_URL = os.environ.get("NIFI_URL", "https://localhost:8443")
 base = f"{NIFI_URL}/nifi-api"
+
+# Endpoint templates built once and filled with str.format() on the hot paths
+PG_URL = base + "/process-groups/{}"
+PG_LIST_URL = base + "/process-groups/{}/{}"  # pg id, "connections" / "processors" / ...
+COMPONENT_URL = base + "/{}/{}"  # "processors" / "input-ports" / ..., component id
+PROCESSOR_URL = base + "/processors/{}"
+PROCESSOR_STATUS_URL = base + "/flow/processors/{}/status?nodewise=false"
+CONNECTION_URL = base + "/connections/{}"
+FLOW_PG_URL = base + "/flow/process-groups/{}"
+DROP_REQUESTS_URL = base + "/flowfile-queues/{}/drop-requests"
+
+# Every pass is I/O-bound on REST round-trips to a single host; independent
+# per-PG / per-component calls fan out over a worker pool. Each worker gets its
+# own persistent HTTP/1.1 keep-alive connection; pool_block makes a worker wait
+# for a pooled connection rather than open (and then discard) an extra one.
+MAX_WORKERS = 32
+
 s = requests.Session()
 s.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
 s.verify = False
+s.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS, pool_block=True))
+
+_pool = ThreadPoolExecutor(MAX_WORKERS)
+
+
+def pmap(fn, items):
+    """Run fn over items on the shared worker pool and return results in order."""
+    return list(_pool.map(fn, items))
+
+
+def _json(resp):
+    """Decode a response body with the fastest available JSON parser."""
+    return _jloads(resp.content)
+
+
+def get_json(url):
+    return _json(s.get(url))
+
+
+def put_json(url, payload):
+    """PUT payload, encoded with the fastest available JSON serializer."""
+    return s.put(url, data=_jdumps(payload))
+
+
+_retry_lock = threading.Lock()
+conflict_retries = 0
+
+
+def put_with_retry(url, payload, retries=3, rev_url=None):
+    """PUT a revisioned payload, retrying revision conflicts (409).
+
+    On a conflict, sleep with exponential backoff plus jitter, re-GET rev_url
+    (default url) for the current revision and retry, up to retries times.
+    """
+    global conflict_retries
+    resp = put_json(url, payload)
+    for i in range(retries):
+        if resp.status_code != 409:
+            break
+        with _retry_lock:
+            conflict_retries += 1
+        time.sleep(min(2**i * 0.1 + random.random() * 0.1, 2.0))
+        payload["revision"] = get_json(rev_url or url)["revision"]
+        resp = put_json(url, payload)
+    return resp
+
 
 root_id = "83e6edba-019c-1000-c32f-bcc77a22e032"
 param_ctx_id = "83ff85a8-019c-1000-28c8-1cae2ff8045e"
 
+# Child PGs of the root canvas, in flow order
+PGS = (
+    ("PG-01", "83ffc56d-019c-1000-7706-fa82111d0464"),
+    ("PG-02", "83ffc6b6-019c-1000-97ba-9150e7333c91"),
+    ("PG-03", "83ffc708-019c-1000-87de-5e7ed17fa0f1"),
+    ("PG-04", "83ffc723-019c-1000-d309-b032fc4eb1dd"),
+    ("PG-05", "83ffc743-019c-1000-ac2d-f03e695b0410"),
+    ("PG-06", "83ffc75c-019c-1000-8429-b85f3e0aa0a6"),
+    ("PG-07", "83ffc788-019c-1000-e688-33bc08e3068f"),
+    ("PG-08", "83ffc7a1-019c-1000-7d63-2dccc9d36336"),
+    ("PG-09", "83ffc7cf-019c-1000-696b-0abd1647f4cc"),
+    ("PG-10", "83ffc7f1-019c-1000-4167-610c60a66531"),
+)
+PG_ID = dict(PGS)
+ALL_PG_IDS = (root_id, *PG_ID.values())
+
+# Target processor positions per PG
+PG_LAYOUTS = {
+    PG_ID["PG-01"]: {
+        "ConsumeMQTT": (400, 50),
+        "ExtractSensorFields": (400, 250),
+        "AddIngestionMetadata": (400, 450),
+    },
+    PG_ID["PG-02"]: {
+        "ValidateSchema": (400, 50),
+        "QualityGate": (400, 250),
+        "MarkValidated": (400, 450),
+    },
+    PG_ID["PG-03"]: {
+        "PassThroughEnrichment": (400, 50),
+        "AddEnrichmentMetadata": (400, 250),
+    },
+    PG_ID["PG-04"]: {
+        "PublishToKafka-Validated": (400, 50),
+        "LogKafkaFailure": (700, 50),
+    },
+    PG_ID["PG-05"]: {
+        "ExtractNumericValue": (400, 50),
+        "ThresholdAnomalyCheck": (400, 250),
+        "MarkAnomaly": (200, 450),
+        "MarkNormal": (600, 450),
+    },
+    PG_ID["PG-06"]: {
+        "RouteBySeverity": (400, 50),
+        "EnrichCriticalAlert": (200, 250),
+        "EnrichWarningAlert": (600, 250),
+        "AlertToJSON": (400, 450),
+    },
+    PG_ID["PG-07"]: {
+        "BatchReadings": (400, 50),
+        "MapTimestampToTime": (400, 250),
+        "WriteToTimescaleDB": (400, 450),
+        "LogDBWriteFailure": (700, 450),
+    },
+    PG_ID["PG-08"]: {
+        "PublishToKafka-Anomalies": (400, 50),
+        "LogKafkaAnomalyFailure": (700, 50),
+    },
+    PG_ID["PG-09"]: {
+        "FilterComplianceEvents": (400, 50),
+        "AddComplianceMetadata": (400, 250),
+        "PublishToKafka-Compliance": (400, 450),
+        "LogComplianceFailure": (700, 450),
+    },
+    PG_ID["PG-10"]: {
+        "AddDLQMetadata": (400, 50),
+        "LogFailedRecord": (400, 250),
+        "ArchiveToDisk": (200, 450),
+        "PublishToKafka-DLQ": (600, 450),
+    },
+}
+
+# Relationships to auto-terminate per PG and processor
+PG_AUTO_TERMINATE = {
+    # PG-05: MarkNormal success should be auto-terminated
+    PG_ID["PG-05"]: {
+        "MarkNormal": ["success"],
+    },
+    # PG-09: FilterComplianceEvents unmatched should be auto-terminated
+    PG_ID["PG-09"]: {
+        "FilterComplianceEvents": ["unmatched"],
+    },
+    # PG-10: ArchiveToDisk - auto-terminate success and failure
+    PG_ID["PG-10"]: {
+        "ArchiveToDisk": ["success", "failure"],
+        "PublishToKafka-DLQ": ["success"],
+    },
+    # PG-04: auto-terminate LogKafkaFailure success
+    PG_ID["PG-04"]: {
+        "LogKafkaFailure": ["success"],
+        "PublishToKafka-Validated": ["success"],
+    },
+    # PG-08: auto-terminate LogKafkaAnomalyFailure success
+    PG_ID["PG-08"]: {
+        "LogKafkaAnomalyFailure": ["success"],
+        "PublishToKafka-Anomalies": ["success"],
+    },
+}
+
+# Every child PG needs a layout; catch drift between PGS and PG_LAYOUTS at import
+assert set(PG_LAYOUTS) == set(PG_ID.values()), "PG_LAYOUTS out of sync with PGS"
+
+# Parameters, backpressure and positions can all be changed on a running flow and
+# config changes only stop the processor they touch, so the root-wide stop/start
+# around the whole run is opt-in via NIFI_STOP_ALL=1.
+STOP_ALL = os.environ.get("NIFI_STOP_ALL", "0") == "1"
+
+# url -> revision, for entities whose list response carried no revision
+_rev_cache = {}
+
+
+def revision_of(entity, url):
+    """Return the revision embedded in a list-response entity.
+
+    List endpoints already return each entity's revision, so no GET is needed
+    before a PUT. Older NiFi versions may omit it; then the entity is fetched
+    once from url and the revision cached for later passes.
+    """
+    rev = entity.get("revision")
+    if rev and "version" in rev:
+        return rev
+    if url not in _rev_cache:
+        _rev_cache[url] = get_json(url)["revision"]
+    return _rev_cache[url]
+
+
+# url -> (expiry, decoded body) for list GETs shared between passes
+_get_cache = {}
+_get_locks = {}
+
+
+def get_cached(url, ttl=30):
+    """GET url as JSON, reusing the response for ttl seconds.
+
+    Concurrent callers for the same URL share a single in-flight request.
+    """
+    with _get_locks.setdefault(url, threading.Lock()):
+        hit = _get_cache.get(url)
+        if hit and hit[0] > time.monotonic():
+            return hit[1]
+        data = get_json(url)
+        _get_cache[url] = (time.monotonic() + ttl, data)
+        return data
+
+
+def invalidate(pg_id):
+    """Forget cached list responses of a PG after a PUT into it."""
+    prefix = PG_LIST_URL.format(pg_id, "")
+    for url in [u for u in list(_get_cache) if u.startswith(prefix)]:
+        _get_cache.pop(url, None)
+
+
+def config_diff(current, desired):
+    """Return the entries of desired whose value differs from current.
+
+    NiFi returns some settings as numbers and accepts them as strings, so values
+    are compared by their string form.
+    """
+    return {k: v for k, v in desired.items() if str(current.get(k)) != str(v)}
+
+
+def position_differs(entity, x, y):
+    pos = entity["component"].get("position") or {}
+    return (pos.get("x"), pos.get("y")) != (x, y)
+
+
+def wait_until_idle(timeout=30, interval=0.25):
+    """Poll the root PG until activeThreadCount is 0, up to timeout seconds.
+
+    Returns the last aggregate status snapshot.
+    """
+    start = time.monotonic()
+    while True:
+        # Non-recursive: only the root aggregate and its direct child PG snapshots,
+        # not every processor and connection in the tree
+        status = get_json(
+            FLOW_PG_URL.format(root_id) + "/status?recursive=false&nodewise=false"
+        )
+        agg = status["processGroupStatus"]["aggregateSnapshot"]
+        elapsed = time.monotonic() - start
+        if agg["activeThreadCount"] == 0:
+            print(f"  Idle after {elapsed:.2f}s")
+            return agg
+        if elapsed >= timeout:
+            print(f"  Still {agg['activeThreadCount']} active threads after {elapsed:.2f}s")
+            return agg
+        time.sleep(interval)
+
+
+def wait_until_started(timeout=15, interval=0.25):
+    """Poll the root PG until none of its components is left STOPPED, up to timeout.
+
+    Waiting for idleness would never finish on a running flow (ConsumeMQTT always
+    holds a thread), so a start is confirmed by the run-state counts instead.
+    Returns the last root PG entity.
+    """
+    start = time.monotonic()
+    while True:
+        pg = get_json(PG_URL.format(root_id))
+        elapsed = time.monotonic() - start
+        if pg.get("stoppedCount", 0) == 0:
+            print(f"  {pg.get('runningCount', 0)} components running after {elapsed:.2f}s")
+            return pg
+        if elapsed >= timeout:
+            print(f"  Still {pg['stoppedCount']} stopped components after {elapsed:.2f}s")
+            return pg
+        time.sleep(interval)
+
+
+def put_processor_stopped(p, component, timeout=10):
+    """PUT a processor change, stopping just that processor around it if it runs.
+
+    p is the processor entity from a list response; component holds the fields
+    to change (id is added). Returns the PUT response, or the failed run-status
+    response if the processor could not be stopped (it is then left untouched).
+    """
+    proc_id = p["id"]
+    url = PROCESSOR_URL.format(proc_id)
+    rev = revision_of(p, url)
+    running = p["component"].get("state") == "RUNNING"
+    if running:
+        resp = put_with_retry(
+            f"{url}/run-status", {"revision": rev, "state": "STOPPED"}, rev_url=url
+        )
+        if resp.status_code != 200:
+            # Nothing has been changed yet; the caller reports the failed response
+            print(f"  ERROR: could not stop {p['component']['name']} before updating it")
+            return resp
+        rev = _json(resp)["revision"]
+        # NiFi rejects config changes until the processor's last task has finished
+        status_url = PROCESSOR_STATUS_URL.format(proc_id)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            snap = get_json(status_url)["processorStatus"]["aggregateSnapshot"]
+            if snap.get("activeThreadCount", 0) == 0:
+                break
+            time.sleep(0.25)
+    resp = put_with_retry(url, {"revision": rev, "component": {"id": proc_id, **component}})
+    invalidate(p["component"]["parentGroupId"])
+    if running:
+        rev = _json(resp)["revision"] if resp.status_code == 200 else get_json(url)["revision"]
+        put_with_retry(f"{url}/run-status", {"revision": rev, "state": "RUNNING"}, rev_url=url)
+    return resp
+
+
+# proc_id -> (processor entity from a list response, merged partial component).
+# Passes queue their processor changes here so each processor is PUT at most once.
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def queue_processor_change(p, component):
+    """Merge a partial component change (config / position) into p's pending PUT."""
+    with _pending_lock:
+        _, merged = _pending.setdefault(p["id"], (p, {}))
+        for key, value in component.items():
+            if key == "config":
+                merged.setdefault("config", {}).update(value)
+            else:
+                merged[key] = value
+
+
+def apply_processor_changes():
+    """Send one PUT per processor carrying every queued change for it."""
+    print("\n=== Applying Processor Changes ===")
+
+    def apply(item):
+        p, component = item
+        name = p["component"]["name"]
+        if "config" in component:
+            resp = put_processor_stopped(p, component)
+        else:
+            # Position-only changes are allowed while the processor runs
+            url = PROCESSOR_URL.format(p["id"])
+            payload = {"revision": revision_of(p, url), "component": {"id": p["id"], **component}}
+            resp = put_with_retry(url, payload)
+            invalidate(p["component"]["parentGroupId"])
+        if resp.status_code != 200:
+            print(f"  WARN: {name} update failed: {resp.status_code} {resp.text[:200]}")
+            return False
+        changed = [*component.get("config", {}), *(k for k in component if k != "config")]
+        print(f"  {name}: {', '.join(changed)}")
+        return True
+
+    with _pending_lock:
+        items = list(_pending.values())
+        _pending.clear()
+    applied = sum(pmap(apply, items))
+    print(f"  Updated {applied} processors.")
+    return applied
+
 
 def stop_all():
     print("Stopping all PGs...")
-    resp = s.put(
-        f"{base}/flow/process-groups/{root_id}",
-        json={"id": root_id, "state": "STOPPED"},
+    resp = put_json(
+        FLOW_PG_URL.format(root_id),
+        {"id": root_id, "state": "STOPPED"},
     )
     print(f"  Stop: {resp.status_code}")
-    time.sleep(8)
-    # Verify stopped
-    status = s.get(f"{base}/flow/process-groups/{root_id}/status").json()
-    threads = status["processGroupStatus"]["aggregateSnapshot"]["activeThreadCount"]
-    print(f"  Active threads: {threads}")
-    if threads > 0:
-        print("  Waiting for threads to finish...")
-        time.sleep(10)
+    wait_until_idle()
 
 
 def start_all():
     print("\nStarting all PGs...")
-    resp = s.put(
-        f"{base}/flow/process-groups/{root_id}",
-        json={"id": root_id, "state": "RUNNING"},
+    resp = put_json(
+        FLOW_PG_URL.format(root_id),
+        {"id": root_id, "state": "RUNNING"},
     )
     print(f"  Start: {resp.status_code}")
 
@@ -57,51 +419,39 @@ def drain_all_queues():
     """Drain all queues in all PGs."""
     print("\n=== Draining all queues ===")
 
-    def drain_pg(pg_id, pg_name):
-        conns = (
-            s.get(f"{base}/process-groups/{pg_id}/connections")
-            .json()
-            .get("connections", [])
-        )
+    def drain_pg(pg):
+        """Submit a drop request for every non-empty queue; return (conn_id, drop_id)s."""
+        pg_name, pg_id = pg
+        conns = get_cached(PG_LIST_URL.format(pg_id, "connections")).get("connections", [])
+        drops = []
         for conn in conns:
             queued = conn["status"]["aggregateSnapshot"].get("flowFilesQueued", 0)
             if queued > 0:
                 conn_id = conn["id"]
-                resp = s.post(f"{base}/flowfile-queues/{conn_id}/drop-requests")
+                resp = s.post(DROP_REQUESTS_URL.format(conn_id))
                 if resp.status_code in (200, 202):
-                    drop_id = resp.json().get("dropRequest", {}).get("id", "")
+                    drop_id = _json(resp).get("dropRequest", {}).get("id", "")
                     print(f"  {pg_name}: dropping {queued} from {conn_id[:8]}...")
-                    # Poll until done
-                    for _ in range(10):
-                        time.sleep(1)
-                        dr = s.get(
-                            f"{base}/flowfile-queues/{conn_id}/drop-requests/{drop_id}"
-                        ).json()
-                        if dr.get("dropRequest", {}).get("finished", False):
-                            break
-                    # Delete the drop request
-                    s.delete(
-                        f"{base}/flowfile-queues/{conn_id}/drop-requests/{drop_id}"
-                    )
-
-    # Drain root connections
-    drain_pg(root_id, "Root")
-
-    # Drain each PG
-    pg_ids = {
-        "PG-01": "83ffc56d-019c-1000-7706-fa82111d0464",
-        "PG-02": "83ffc6b6-019c-1000-97ba-9150e7333c91",
-        "PG-03": "83ffc708-019c-1000-87de-5e7ed17fa0f1",
-        "PG-04": "83ffc723-019c-1000-d309-b032fc4eb1dd",
-        "PG-05": "83ffc743-019c-1000-ac2d-f03e695b0410",
-        "PG-06": "83ffc75c-019c-1000-8429-b85f3e0aa0a6",
-        "PG-07": "83ffc788-019c-1000-e688-33bc08e3068f",
-        "PG-08": "83ffc7a1-019c-1000-7d63-2dccc9d36336",
-        "PG-09": "83ffc7cf-019c-1000-696b-0abd1647f4cc",
-        "PG-10": "83ffc7f1-019c-1000-4167-610c60a66531",
-    }
-    for name, pid in pg_ids.items():
-        drain_pg(pid, name)
+                    drops.append((conn_id, drop_id))
+        return drops
+
+    def wait_drop(drop, timeout=10):
+        """Poll one drop request with capped exponential backoff, then delete it."""
+        conn_id, drop_id = drop
+        url = f"{DROP_REQUESTS_URL.format(conn_id)}/{drop_id}"
+        deadline = time.monotonic() + timeout
+        delay = 0.25
+        while time.monotonic() < deadline:
+            if get_json(url).get("dropRequest", {}).get("finished", False):
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        s.delete(url)
+
+    # Queues drain independently: submit every drop request, then wait on all of
+    # them at once so the pass takes as long as the slowest queue, not the sum
+    drops = [d for pg_drops in pmap(drain_pg, (("Root", root_id), *PGS)) for d in pg_drops]
+    pmap(wait_drop, drops)
 
     print("  Queues drained.")
 
@@ -111,7 +461,7 @@ def update_parameter_context():
     print("\n=== Updating Parameter Context ===")
 
     # Get current parameter context
-    pc = s.get(f"{base}/parameter-contexts/{param_ctx_id}").json()
+    pc = get_json(f"{base}/parameter-contexts/{param_ctx_id}")
     rev = pc["revision"]
 
     # Parameter updates: old names -> new names that match actual Kafka topics
@@ -155,21 +505,21 @@ def update_parameter_context():
         },
     }
 
-    resp = s.put(f"{base}/parameter-contexts/{param_ctx_id}", json=payload)
+    resp = put_json(f"{base}/parameter-contexts/{param_ctx_id}", payload)
     print(f"  Update result: {resp.status_code}")
     if resp.status_code != 200:
         print(f"    {resp.text[:300]}")
 
     # Wait for parameter context update to complete
     if resp.status_code == 200:
-        update_req = resp.json()
+        update_req = _json(resp)
         req_id = update_req.get("request", {}).get("requestId", "")
         if req_id:
             for _ in range(15):
                 time.sleep(2)
-                r = s.get(
+                r = get_json(
                     f"{base}/parameter-contexts/{param_ctx_id}/update-requests/{req_id}"
-                ).json()
+                )
                 if r.get("request", {}).get("complete", False):
                     print("  Parameter context update completed.")
                     s.delete(
@@ -186,214 +536,142 @@ def increase_backpressure():
     target_threshold = "50000"
     target_data_size = "1 GB"
 
-    all_pg_ids = [
-        root_id,
-        "83ffc56d-019c-1000-7706-fa82111d0464",
-        "83ffc6b6-019c-1000-97ba-9150e7333c91",
-        "83ffc708-019c-1000-87de-5e7ed17fa0f1",
-        "83ffc723-019c-1000-d309-b032fc4eb1dd",
-        "83ffc743-019c-1000-ac2d-f03e695b0410",
-        "83ffc75c-019c-1000-8429-b85f3e0aa0a6",
-        "83ffc788-019c-1000-e688-33bc08e3068f",
-        "83ffc7a1-019c-1000-7d63-2dccc9d36336",
-        "83ffc7cf-019c-1000-696b-0abd1647f4cc",
-        "83ffc7f1-019c-1000-4167-610c60a66531",
-    ]
 
-    updated = 0
-    for pg_id in all_pg_ids:
-        conns = (
-            s.get(f"{base}/process-groups/{pg_id}/connections")
-            .json()
-            .get("connections", [])
-        )
-        for conn in conns:
-            conn_id = conn["id"]
-            current_threshold = conn["component"].get(
-                "backPressureObjectThreshold", "10000"
-            )
-            current_data = conn["component"].get(
-                "backPressureDataSizeThreshold", "1 GB"
-            )
-
-            if current_threshold != target_threshold or current_data != target_data_size:
-                conn_data = s.get(f"{base}/connections/{conn_id}").json()
-                rev = conn_data["revision"]
-                payload = {
-                    "revision": rev,
-                    "component": {
-                        "id": conn_id,
-                        "backPressureObjectThreshold": target_threshold,
-                        "backPressureDataSizeThreshold": target_data_size,
-                    },
-                }
-                resp = s.put(f"{base}/connections/{conn_id}", json=payload)
-                if resp.status_code == 200:
-                    updated += 1
-                else:
-                    print(f"  WARN: Failed to update {conn_id[:8]}: {resp.status_code}")
+    def set_pg_defaults(pg_id):
+        # One PUT per PG: connections created later inherit these thresholds
+        rev = get_json(PG_URL.format(pg_id))["revision"]
+        payload = {
+            "revision": rev,
+            "component": {
+                "id": pg_id,
+                "defaultBackPressureObjectThreshold": int(target_threshold),
+                "defaultBackPressureDataSizeThreshold": target_data_size,
+            },
+        }
+        resp = put_with_retry(PG_URL.format(pg_id), payload)
+        if resp.status_code != 200:
+            print(f"  WARN: Failed to set defaults on PG {pg_id[:8]}: {resp.status_code}")
+
+    def list_conns(pg_id):
+        return get_cached(PG_LIST_URL.format(pg_id, "connections")).get("connections", [])
+
+    def update_conn(conn):
+        conn_id = conn["id"]
+        rev = revision_of(conn, CONNECTION_URL.format(conn_id))
+        payload = {
+            "revision": rev,
+            "component": {
+                "id": conn_id,
+                "backPressureObjectThreshold": target_threshold,
+                "backPressureDataSizeThreshold": target_data_size,
+            },
+        }
+        resp = put_with_retry(CONNECTION_URL.format(conn_id), payload)
+        invalidate(conn["component"]["parentGroupId"])
+        if resp.status_code != 200:
+            print(f"  WARN: Failed to update {conn_id[:8]}: {resp.status_code}")
+        return resp.status_code == 200
+
+    pmap(set_pg_defaults, ALL_PG_IDS)
+
+    # NiFi has no bulk connection-update endpoint (PUT /snippets only moves
+    # components), so only connections that differ from the target are PUT.
+    # The API returns the object threshold as a number, hence str() before comparing.
+    all_conns = [conn for conns in pmap(list_conns, ALL_PG_IDS) for conn in conns]
+    stale = [
+        conn
+        for conn in all_conns
+        if str(conn["component"].get("backPressureObjectThreshold", 10000)) != target_threshold
+        or conn["component"].get("backPressureDataSizeThreshold", "1 GB") != target_data_size
+    ]
+    updated = sum(pmap(update_conn, stale))
 
     print(f"  Updated {updated} connections to {target_threshold} / {target_data_size}")
+    return updated
 
 
-def increase_putsql_concurrency():
-    """Increase PutSQL concurrent tasks for better throughput."""
-    print("\n=== Increasing PutSQL Concurrency ===")
-    pg07_id = "83ffc788-019c-1000-e688-33bc08e3068f"
+def increase_db_writer_concurrency():
+    """Increase WriteToTimescaleDB (PutDatabaseRecord) concurrent tasks for better throughput."""
+    print("\n=== Increasing WriteToTimescaleDB Concurrency ===")
+    pg07_id = PG_ID["PG-07"]
 
-    procs = (
-        s.get(f"{base}/process-groups/{pg07_id}/processors")
-        .json()
-        .get("processors", [])
-    )
+    procs = get_cached(PG_LIST_URL.format(pg07_id, "processors")).get("processors", [])
     for p in procs:
         if p["component"]["name"] == "WriteToTimescaleDB":
-            proc_id = p["id"]
-            data = s.get(f"{base}/processors/{proc_id}").json()
-            rev = data["revision"]
-            current = data["component"]["config"].get(
-                "concurrentlySchedulableTaskCount", "1"
-            )
+            config = p["component"]["config"]
+            current = config.get("concurrentlySchedulableTaskCount", "1")
             print(f"  Current concurrent tasks: {current}")
 
-            payload = {
-                "revision": rev,
-                "component": {
-                    "id": proc_id,
-                    "config": {
-                        "concurrentlySchedulableTaskCount": "4",
-                        "schedulingPeriod": "0 sec",
-                        "penaltyDuration": "10 sec",
-                    },
-                },
-            }
-            resp = s.put(f"{base}/processors/{proc_id}", json=payload)
-            print(f"  Updated to 4 concurrent tasks: {resp.status_code}")
-            if resp.status_code != 200:
-                print(f"    {resp.text[:300]}")
-            break
+            changes = config_diff(config, {
+                "concurrentlySchedulableTaskCount": "4",
+                "schedulingPeriod": "0 sec",
+                "penaltyDuration": "10 sec",
+            })
+            if not changes:
+                print("  Already at 4 concurrent tasks, skipping")
+                return 0
+            queue_processor_change(p, {"config": changes})
+            print("  Queued 4 concurrent tasks")
+            return 1
+    return 0
 
 
 def organize_processor_positions():
     """Position processors in a clean vertical layout within each PG."""
     print("\n=== Organizing Processor Positions ===")
 
-    pg_layouts = {
-        "83ffc56d-019c-1000-7706-fa82111d0464": {  # PG-01
-            "ConsumeMQTT": (400, 50),
-            "ExtractSensorFields": (400, 250),
-            "AddIngestionMetadata": (400, 450),
-        },
-        "83ffc6b6-019c-1000-97ba-9150e7333c91": {  # PG-02
-            "ValidateSchema": (400, 50),
-            "QualityGate": (400, 250),
-            "MarkValidated": (400, 450),
-        },
-        "83ffc708-019c-1000-87de-5e7ed17fa0f1": {  # PG-03
-            "PassThroughEnrichment": (400, 50),
-            "AddEnrichmentMetadata": (400, 250),
-        },
-        "83ffc723-019c-1000-d309-b032fc4eb1dd": {  # PG-04
-            "PublishToKafka-Validated": (400, 50),
-            "LogKafkaFailure": (700, 50),
-        },
-        "83ffc743-019c-1000-ac2d-f03e695b0410": {  # PG-05
-            "ExtractNumericValue": (400, 50),
-            "ThresholdAnomalyCheck": (400, 250),
-            "MarkAnomaly": (200, 450),
-            "MarkNormal": (600, 450),
-        },
-        "83ffc75c-019c-1000-8429-b85f3e0aa0a6": {  # PG-06
-            "RouteBySeverity": (400, 50),
-            "EnrichCriticalAlert": (200, 250),
-            "EnrichWarningAlert": (600, 250),
-            "AlertToJSON": (400, 450),
-        },
-        "83ffc788-019c-1000-e688-33bc08e3068f": {  # PG-07
-            "ExtractAllFields": (400, 50),
-            "WriteToTimescaleDB": (400, 250),
-            "LogDBWriteFailure": (700, 250),
-        },
-        "83ffc7a1-019c-1000-7d63-2dccc9d36336": {  # PG-08
-            "PublishToKafka-Anomalies": (400, 50),
-            "LogKafkaAnomalyFailure": (700, 50),
-        },
-        "83ffc7cf-019c-1000-696b-0abd1647f4cc": {  # PG-09
-            "FilterComplianceEvents": (400, 50),
-            "AddComplianceMetadata": (400, 250),
-            "PublishToKafka-Compliance": (400, 450),
-            "LogComplianceFailure": (700, 450),
-        },
-        "83ffc7f1-019c-1000-4167-610c60a66531": {  # PG-10
-            "AddDLQMetadata": (400, 50),
-            "LogFailedRecord": (400, 250),
-            "ArchiveToDisk": (200, 450),
-            "PublishToKafka-DLQ": (600, 450),
-        },
+    def list_pg(fetch):
+        """GET one list endpoint (processors / input-ports / output-ports) of a PG."""
+        pg_id, kind, key = fetch
+        return get_cached(PG_LIST_URL.format(pg_id, kind)).get(key, [])
+
+    # Fetch: every PG's processors and ports, all list GETs in flight at once
+    kinds = (("processors", "processors"), ("input-ports", "inputPorts"),
+             ("output-ports", "outputPorts"))
+    fetches = [(pg_id, kind, key) for pg_id in PG_LAYOUTS for kind, key in kinds]
+    listed = {
+        (pg_id, kind): entities
+        for (pg_id, kind, _), entities in zip(fetches, pmap(list_pg, fetches), strict=True)
     }
 
-    for pg_id, layout in pg_layouts.items():
-        procs = (
-            s.get(f"{base}/process-groups/{pg_id}/processors")
-            .json()
-            .get("processors", [])
-        )
-        for p in procs:
+    # Plan: (pg_id, name, url, payload) for every port with a target position
+    plan = []
+
+    def add(entity, kind, name, x, y):
+        if not position_differs(entity, x, y):
+            return
+        url = COMPONENT_URL.format(kind, entity["id"])
+        plan.append((entity["component"]["parentGroupId"], name, url, {
+            "revision": revision_of(entity, url),
+            "component": {"id": entity["id"], "position": {"x": x, "y": y}},
+        }))
+
+    queued = 0
+    for pg_id, layout in PG_LAYOUTS.items():
+        for p in listed[(pg_id, "processors")]:
             name = p["component"]["name"]
-            if name in layout:
+            if name in layout and position_differs(p, *layout[name]):
                 x, y = layout[name]
-                proc_id = p["id"]
-                data = s.get(f"{base}/processors/{proc_id}").json()
-                rev = data["revision"]
-                payload = {
-                    "revision": rev,
-                    "component": {
-                        "id": proc_id,
-                        "position": {"x": x, "y": y},
-                    },
-                }
-                resp = s.put(f"{base}/processors/{proc_id}", json=payload)
-                if resp.status_code != 200:
-                    print(f"  WARN: {name} position update failed: {resp.status_code}")
-
-        # Also position input/output ports
-        ports_in = (
-            s.get(f"{base}/process-groups/{pg_id}/input-ports")
-            .json()
-            .get("inputPorts", [])
-        )
-        for port in ports_in:
-            port_id = port["id"]
-            port_data = s.get(f"{base}/input-ports/{port_id}").json()
-            rev = port_data["revision"]
-            payload = {
-                "revision": rev,
-                "component": {
-                    "id": port_id,
-                    "position": {"x": 400, "y": -100},
-                },
-            }
-            s.put(f"{base}/input-ports/{port_id}", json=payload)
-
-        ports_out = (
-            s.get(f"{base}/process-groups/{pg_id}/output-ports")
-            .json()
-            .get("outputPorts", [])
-        )
-        for i, port in enumerate(ports_out):
-            port_id = port["id"]
-            port_data = s.get(f"{base}/output-ports/{port_id}").json()
-            rev = port_data["revision"]
-            payload = {
-                "revision": rev,
-                "component": {
-                    "id": port_id,
-                    "position": {"x": 200 + i * 300, "y": 650},
-                },
-            }
-            s.put(f"{base}/output-ports/{port_id}", json=payload)
-
-    print("  Processors and ports repositioned.")
+                queue_processor_change(p, {"position": {"x": x, "y": y}})
+                queued += 1
+        for port in listed[(pg_id, "input-ports")]:
+            add(port, "input-ports", port["component"]["name"], 400, -100)
+        for i, port in enumerate(listed[(pg_id, "output-ports")]):
+            add(port, "output-ports", port["component"]["name"], 200 + i * 300, 650)
+
+    # Apply: one PUT per planned port, all PGs at once; processor moves are
+    # queued and sent together with any config change by apply_processor_changes
+    def apply(step):
+        pg_id, name, url, payload = step
+        resp = put_with_retry(url, payload)
+        invalidate(pg_id)
+        if resp.status_code != 200:
+            print(f"  WARN: {name} position update failed: {resp.status_code}")
+        return resp.status_code == 200
+
+    moved = sum(pmap(apply, plan))
+    print(f"  Repositioned {moved} ports, queued {queued} processor moves.")
+    return moved + queued
 
 
 def organize_root_pg():
@@ -413,105 +691,80 @@ def organize_root_pg():
         "PG-10: Dead Letter Queue": (600, 1000),
     }
 
-    pg_flow = s.get(f"{base}/flow/process-groups/{root_id}").json()
+    pg_flow = get_json(FLOW_PG_URL.format(root_id))
     pgs = pg_flow["processGroupFlow"]["flow"]["processGroups"]
 
-    for pg in pgs:
+    def move_pg(pg):
         pg_name = pg["component"]["name"]
-        if pg_name in pg_positions:
-            x, y = pg_positions[pg_name]
-            pg_id = pg["id"]
-            data = s.get(f"{base}/process-groups/{pg_id}").json()
-            rev = data["revision"]
-            payload = {
-                "revision": rev,
-                "component": {
-                    "id": pg_id,
-                    "position": {"x": x, "y": y},
-                },
-            }
-            resp = s.put(f"{base}/process-groups/{pg_id}", json=payload)
-            if resp.status_code == 200:
-                print(f"  {pg_name} -> ({x}, {y})")
-            else:
-                print(f"  WARN: {pg_name} failed: {resp.status_code}")
+        x, y = pg_positions[pg_name]
+        pg_id = pg["id"]
+        rev = revision_of(pg, PG_URL.format(pg_id))
+        payload = {
+            "revision": rev,
+            "component": {
+                "id": pg_id,
+                "position": {"x": x, "y": y},
+            },
+        }
+        resp = put_with_retry(PG_URL.format(pg_id), payload)
+        if resp.status_code == 200:
+            print(f"  {pg_name} -> ({x}, {y})")
+        else:
+            print(f"  WARN: {pg_name} failed: {resp.status_code}")
+        return resp.status_code == 200
+
+    moved = sum(pmap(move_pg, [
+        pg for pg in pgs
+        if pg["component"]["name"] in pg_positions
+        and position_differs(pg, *pg_positions[pg["component"]["name"]])
+    ]))
 
-    print("  Root canvas organized.")
+    print(f"  Root canvas organized ({moved} PGs moved).")
+    return moved
 
 
 def fix_auto_terminations():
     """Ensure all unused relationships are auto-terminated."""
     print("\n=== Fixing Auto-Terminated Relationships ===")
 
-    pg_fixes = {
-        # PG-05: MarkNormal success should be auto-terminated
-        "83ffc743-019c-1000-ac2d-f03e695b0410": {
-            "MarkNormal": ["success"],
-        },
-        # PG-09: FilterComplianceEvents unmatched should be auto-terminated
-        "83ffc7cf-019c-1000-696b-0abd1647f4cc": {
-            "FilterComplianceEvents": ["unmatched"],
-        },
-        # PG-10: ArchiveToDisk - auto-terminate success and failure
-        "83ffc7f1-019c-1000-4167-610c60a66531": {
-            "ArchiveToDisk": ["success", "failure"],
-            "PublishToKafka-DLQ": ["success"],
-        },
-        # PG-04: auto-terminate LogKafkaFailure success
-        "83ffc723-019c-1000-d309-b032fc4eb1dd": {
-            "LogKafkaFailure": ["success"],
-            "PublishToKafka-Validated": ["success"],
-        },
-        # PG-08: auto-terminate LogKafkaAnomalyFailure success
-        "83ffc7a1-019c-1000-7d63-2dccc9d36336": {
-            "LogKafkaAnomalyFailure": ["success"],
-            "PublishToKafka-Anomalies": ["success"],
-        },
-    }
-
-    for pg_id, proc_fixes in pg_fixes.items():
-        procs = (
-            s.get(f"{base}/process-groups/{pg_id}/processors")
-            .json()
-            .get("processors", [])
-        )
+    def fix_pg(item):
+        pg_id, proc_fixes = item
+        procs = get_cached(PG_LIST_URL.format(pg_id, "processors")).get("processors", [])
+        fixed = 0
         for p in procs:
             name = p["component"]["name"]
             if name in proc_fixes:
-                proc_id = p["id"]
-                data = s.get(f"{base}/processors/{proc_id}").json()
-                rev = data["revision"]
                 current_auto = set(
-                    data["component"]["config"].get(
+                    p["component"]["config"].get(
                         "autoTerminatedRelationships", []
                     )
                 )
                 new_auto = current_auto | set(proc_fixes[name])
                 if new_auto != current_auto:
-                    payload = {
-                        "revision": rev,
-                        "component": {
-                            "id": proc_id,
-                            "config": {
-                                "autoTerminatedRelationships": list(new_auto)
-                            },
-                        },
-                    }
-                    resp = s.put(f"{base}/processors/{proc_id}", json=payload)
-                    status = "OK" if resp.status_code == 200 else f"FAIL({resp.status_code})"
-                    print(f"  {name}: auto-terminate {proc_fixes[name]} -> {status}")
-                    if resp.status_code != 200:
-                        print(f"    {resp.text[:200]}")
-
-
-def verify_flow():
-    """Verify the flow is healthy after all fixes."""
+                    queue_processor_change(p, {
+                        "config": {"autoTerminatedRelationships": list(new_auto)},
+                    })
+                    print(f"  {name}: auto-terminate {proc_fixes[name]} queued")
+                    fixed += 1
+        return fixed
+
+    fixed = sum(pmap(fix_pg, PG_AUTO_TERMINATE.items()))
+    print(f"  Queued {fixed} processors.")
+    return fixed
+
+
+def verify_flow(started=False):
+    """Verify the flow is healthy after all fixes.
+
+    With started=True (the flow was just restarted), first wait for its
+    components to report RUNNING; otherwise the current state is reported as is.
+    """
     print("\n=== Verification ===")
-    time.sleep(15)
+    pg = wait_until_started() if started else get_json(PG_URL.format(root_id))
+    status = get_json(FLOW_PG_URL.format(root_id) + "/status?recursive=false&nodewise=false")
+    agg = status["processGroupStatus"]["aggregateSnapshot"]
 
     # Flow status
-    status = s.get(f"{base}/flow/process-groups/{root_id}/status").json()
-    agg = status["processGroupStatus"]["aggregateSnapshot"]
     queued = agg["flowFilesQueued"]
     threads = agg["activeThreadCount"]
     print(f"FlowFiles Queued: {queued}")
@@ -531,7 +784,7 @@ def verify_flow():
 
     # Bulletins
     print("\nBulletins:")
-    bulletins = s.get(f"{base}/flow/bulletin-board?limit=10").json()
+    bulletins = get_json(f"{base}/flow/bulletin-board?limit=10")
     buls = bulletins.get("bulletinBoard", {}).get("bulletins", [])
     if not buls:
         print("  No bulletins - CLEAN!")
@@ -542,29 +795,69 @@ def verify_flow():
         msg = bul.get("message", "")[:200]
         print(f"  [{level}] {name}: {msg}")
 
-    # Invalid processors
-    invalid = agg.get("invalidCount", 0)
+    # Invalid processors (counted on the PG entity, not its status snapshot)
+    print(f"\nRunning: {pg.get('runningCount', 0)}  Stopped: {pg.get('stoppedCount', 0)}")
+    invalid = pg.get("invalidCount", 0)
     print(f"\nInvalid Components: {invalid}")
     if invalid == 0:
         print("ALL PROCESSORS VALID")
 
 
+def run_phases(phases):
+    """Run phases as a DAG of {phase: dependencies}.
+
+    Every phase whose dependencies have finished starts at once; phases get their
+    own executor so they never wait on the pool their inner pmap() calls use.
+    """
+    done = set()
+    pending = dict(phases)
+    running = {}  # future -> phase
+    with ThreadPoolExecutor(len(phases)) as ex:
+        while pending or running:
+            ready = [fn for fn, deps in pending.items() if done.issuperset(deps)]
+            for fn in ready:
+                del pending[fn]
+                running[ex.submit(fn)] = fn
+            if not running:
+                raise RuntimeError(f"Unsatisfiable phase dependencies: {list(pending)}")
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                fut.result()
+                done.add(running.pop(fut))
+
+
+# Mutations only start once queues are drained. The processor passes only queue
+# changes, and apply_processor_changes sends them once all three have run; the
+# root canvas waits for the PG default-backpressure PUTs on the same PG entities.
+PHASES = {
+    drain_all_queues: (),
+    update_parameter_context: (drain_all_queues,),
+    increase_backpressure: (drain_all_queues,),
+    increase_db_writer_concurrency: (drain_all_queues,),
+    fix_auto_terminations: (drain_all_queues,),
+    organize_processor_positions: (drain_all_queues,),
+    apply_processor_changes: (
+        increase_db_writer_concurrency,
+        fix_auto_terminations,
+        organize_processor_positions,
+    ),
+    organize_root_pg: (increase_backpressure,),
+}
+
+
 # ============ Main ============
 if __name__ == "__main__":
     print("=" * 60)
     print("NiFi Flow Organizer")
     print("=" * 60)
 
-    stop_all()
-    drain_all_queues()
-    update_parameter_context()
-    increase_backpressure()
-    increase_putsql_concurrency()
-    fix_auto_terminations()
-    organize_processor_positions()
-    organize_root_pg()
-    start_all()
-    verify_flow()
+    if STOP_ALL:
+        stop_all()
+    run_phases(PHASES)
+    if STOP_ALL:
+        start_all()
+    verify_flow(started=STOP_ALL)
+    print(f"\nRevision-conflict retries: {conflict_retries}")
 
     print("\n" + "=" * 60)
     print("DONE - Flow organized and verified")
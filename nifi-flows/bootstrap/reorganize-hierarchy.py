@@ -24,16 +24,36 @@ import json
 import logging
 import os
 import sys
+import threading
 import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 if indent else 0)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: Any, indent: bool = False) -> bytes:
+        return json.dumps(obj, default=str, indent=2 if indent else None).encode()
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -42,39 +62,94 @@ logging.basicConfig(
 log = logging.getLogger("reorganize")
 
 
+def backoff(timeout: float, first: float = 0.05, cap: float = 2.0,
+            factor: float = 1.7) -> Iterator[None]:
+    """Yield after exponentially growing sleeps until ``timeout`` seconds have passed."""
+    deadline = time.monotonic() + timeout
+    delay = first
+    while (remaining := deadline - time.monotonic()) > 0:
+        time.sleep(min(delay, remaining))
+        yield
+        delay = min(delay * factor, cap)
+
+
 # ---------------------------------------------------------------------------
 # NiFi REST API Client
 # ---------------------------------------------------------------------------
 class NiFi:
-    """Thin NiFi REST API wrapper."""
+    """Thin NiFi REST API wrapper.
+
+    Independent calls can be fanned out with ``map``, which runs them on a
+    bounded worker pool sharing the session's keep-alive connections.
+    """
 
-    def __init__(self, base_url: str) -> None:
+    def __init__(self, base_url: str, max_workers: int = 16) -> None:
         self.base = base_url.rstrip("/") + "/nifi-api"
         self.s = requests.Session()
         self.s.verify = False
         self.s.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
+        # Keep enough pooled connections for the worker pool, and retry transient
+        # gateway errors instead of failing a whole phase on one bad response.
+        # POSTs create PGs, connections and drop requests, and a gateway error
+        # does not mean NiFi did not act, so only idempotent methods are retried.
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=max(64, max_workers),
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset(["GET", "PUT", "DELETE"]),
+                raise_on_status=False,
+            ),
+        )
+        self.s.mount("http://", adapter)
+        self.s.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers)
+        self._flow_cache: dict[str, tuple[float, dict]] = {}
+        self._flow_lock = threading.Lock()
+
+    def map(self, fn: Callable, items: Iterable) -> list:
+        """Run fn over items concurrently and return the results in order."""
+        return list(self._pool.map(fn, items))
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        """Schedule fn(*args) on the worker pool."""
+        return self._pool.submit(fn, *args)
+
+    def _u(self, path: str) -> str:
+        return self.base + path
 
     def get(self, path: str) -> dict:
-        r = self.s.get(f"{self.base}{path}", timeout=30)
+        r = self.s.get(self._u(path), timeout=30)
         r.raise_for_status()
-        return r.json()
+        return _loads(r.content)
+
+    def get_if_changed(self, path: str, etag: str | None = None) -> tuple[dict | None, str | None]:
+        """Conditional GET: returns ``(None, etag)`` without decoding when unchanged (304)."""
+        headers = {"If-None-Match": etag} if etag else None
+        r = self.s.get(self._u(path), headers=headers, timeout=30)
+        if r.status_code == 304:
+            return None, etag
+        r.raise_for_status()
+        return _loads(r.content), r.headers.get("ETag")
 
     def post(self, path: str, data: dict) -> dict:
-        r = self.s.post(f"{self.base}{path}", json=data, timeout=30)
+        r = self.s.post(self._u(path), data=_dumps(data), timeout=30)
         if r.status_code not in (200, 201, 202):
             log.error("POST %s -> %d: %s", path, r.status_code, r.text[:300])
             r.raise_for_status()
-        return r.json()
+        return _loads(r.content)
 
     def put(self, path: str, data: dict) -> dict:
-        r = self.s.put(f"{self.base}{path}", json=data, timeout=30)
+        r = self.s.put(self._u(path), data=_dumps(data), timeout=30)
         if r.status_code not in (200, 201):
             log.error("PUT %s -> %d: %s", path, r.status_code, r.text[:300])
             r.raise_for_status()
-        return r.json()
+        return _loads(r.content)
 
     def delete(self, path: str) -> None:
-        r = self.s.delete(f"{self.base}{path}", timeout=30)
+        r = self.s.delete(self._u(path), timeout=30)
         if r.status_code not in (200, 204):
             log.error("DELETE %s -> %d: %s", path, r.status_code, r.text[:300])
             r.raise_for_status()
@@ -84,13 +159,31 @@ class NiFi:
     def root_id(self) -> str:
         return self.get("/flow/process-groups/root")["processGroupFlow"]["id"]
 
-    def child_pgs(self, parent_id: str) -> list[dict]:
-        flow = self.get(f"/flow/process-groups/{parent_id}")
-        return flow["processGroupFlow"]["flow"].get("processGroups", [])
+    def flow(self, pg_id: str, ttl: float = 2.0) -> dict:
+        """GET /flow/process-groups/{id}, memoized for ``ttl`` seconds."""
+        now = time.monotonic()
+        with self._flow_lock:
+            hit = self._flow_cache.get(pg_id)
+        if hit and now - hit[0] < ttl:
+            return hit[1]
+        flow = self.get(f"/flow/process-groups/{pg_id}")["processGroupFlow"]["flow"]
+        with self._flow_lock:
+            self._flow_cache[pg_id] = (now, flow)
+        return flow
+
+    def _invalidate(self, pg_id: str | None) -> None:
+        """Drop the cached flow of one PG, or of every PG when pg_id is None."""
+        with self._flow_lock:
+            if pg_id is None:
+                self._flow_cache.clear()
+            else:
+                self._flow_cache.pop(pg_id, None)
+
+    def child_pgs(self, parent_id: str, ttl: float = 2.0) -> list[dict]:
+        return self.flow(parent_id, ttl).get("processGroups", [])
 
     def connections(self, parent_id: str) -> list[dict]:
-        flow = self.get(f"/flow/process-groups/{parent_id}")
-        return flow["processGroupFlow"]["flow"].get("connections", [])
+        return self.flow(parent_id).get("connections", [])
 
     def processors(self, pg_id: str) -> list[dict]:
         return self.get(f"/process-groups/{pg_id}/processors").get("processors", [])
@@ -102,13 +195,14 @@ class NiFi:
         return self.get(f"/process-groups/{pg_id}/output-ports").get("outputPorts", [])
 
     def internal_connections(self, pg_id: str) -> list[dict]:
-        return self.get(f"/process-groups/{pg_id}/connections").get("connections", [])
+        return self.connections(pg_id)
 
     def create_pg(self, parent_id: str, name: str, x: int, y: int, comments: str = "") -> str:
         r = self.post(f"/process-groups/{parent_id}/process-groups", {
             "revision": {"version": 0},
             "component": {"name": name, "position": {"x": x, "y": y}, "comments": comments},
         })
+        self._invalidate(parent_id)
         pg_id = r["id"]
         log.info("  Created PG '%s' -> %s", name, pg_id)
         return pg_id
@@ -118,8 +212,9 @@ class NiFi:
             "revision": {"version": 0},
             "component": {"name": name, "position": {"x": x, "y": y}},
         })
+        self._invalidate(pg_id)
         port_id = r["id"]
-        log.info("    Input port '%s' -> %s", name, port_id)
+        log.debug("    Input port '%s' -> %s", name, port_id)
         return port_id
 
     def create_output_port(self, pg_id: str, name: str, x: int = 0, y: int = 0) -> str:
@@ -127,8 +222,9 @@ class NiFi:
             "revision": {"version": 0},
             "component": {"name": name, "position": {"x": x, "y": y}},
         })
+        self._invalidate(pg_id)
         port_id = r["id"]
-        log.info("    Output port '%s' -> %s", name, port_id)
+        log.debug("    Output port '%s' -> %s", name, port_id)
         return port_id
 
     def create_processor(self, pg_id: str, name: str, proc_type: str,
@@ -144,11 +240,30 @@ class NiFi:
             },
         }
         r = self.post(f"/process-groups/{pg_id}/processors", payload)
+        self._invalidate(pg_id)
         proc_id = r["id"]
         short_type = proc_type.rsplit(".", 1)[-1]
-        log.info("    Processor '%s' (%s) -> %s", name, short_type, proc_id)
+        log.debug("    Processor '%s' (%s) -> %s", name, short_type, proc_id)
         return proc_id
 
+    def upload_pg(self, parent_id: str, name: str, x: int, y: int, flow_contents: dict) -> str:
+        """Import a whole VersionedProcessGroup as a new child PG in one request."""
+        r = self.s.post(
+            self._u(f"/process-groups/{parent_id}/process-groups/upload"),
+            files={"file": ("flow.json", _dumps({"flowContents": flow_contents}),
+                            "application/json")},
+            data={"groupName": name, "positionX": x, "positionY": y, "clientId": str(uuid.uuid4())},
+            headers={"Content-Type": None},  # let requests set the multipart boundary
+            timeout=120,
+        )
+        if r.status_code not in (200, 201):
+            log.error("UPLOAD %s -> %d: %s", name, r.status_code, r.text[:300])
+            r.raise_for_status()
+        self._invalidate(parent_id)
+        pg_id = _loads(r.content)["id"]
+        log.info("  Imported PG '%s' -> %s", name, pg_id)
+        return pg_id
+
     def connect(self, parent_pg_id: str,
                 src_id: str, src_group: str, src_type: str,
                 dst_id: str, dst_group: str, dst_type: str,
@@ -165,13 +280,25 @@ class NiFi:
                 "flowFileExpiration": "0 sec",
             },
         })
+        self._invalidate(parent_pg_id)
         return r["id"]
 
     def stop_pg(self, pg_id: str) -> None:
         self.put(f"/flow/process-groups/{pg_id}", {"id": pg_id, "state": "STOPPED"})
+        self._invalidate(None)  # state changes cascade to every descendant
 
     def start_pg(self, pg_id: str) -> None:
         self.put(f"/flow/process-groups/{pg_id}", {"id": pg_id, "state": "RUNNING"})
+        self._invalidate(None)  # state changes cascade to every descendant
+
+    def wait_threads(self, pg_id: str, want_zero: bool, timeout: float = 30) -> bool:
+        """Poll the PG's active thread count every 250 ms until it is (or is not) zero."""
+        path = f"/flow/process-groups/{pg_id}/status?recursive=false"
+        for _ in backoff(timeout, first=0.25, cap=0.25):
+            snapshot = self.get(path)["processGroupStatus"]["aggregateSnapshot"]
+            if (snapshot.get("activeThreadCount", 0) == 0) == want_zero:
+                return True
+        return False
 
     def drain_connection(self, conn_id: str) -> None:
         try:
@@ -179,44 +306,70 @@ class NiFi:
             drop_id = r.get("dropRequest", {}).get("id", "")
             if not drop_id:
                 return
-            for _ in range(30):
-                time.sleep(1)
-                dr = self.get(f"/flowfile-queues/{conn_id}/drop-requests/{drop_id}")
-                if dr.get("dropRequest", {}).get("finished", False):
+            etag = None
+            for _ in backoff(30):
+                dr, etag = self.get_if_changed(
+                    f"/flowfile-queues/{conn_id}/drop-requests/{drop_id}", etag)
+                if dr is not None and dr.get("dropRequest", {}).get("finished", False):
                     break
             self.delete(f"/flowfile-queues/{conn_id}/drop-requests/{drop_id}")
         except Exception as e:
             log.warning("  Drain failed for %s: %s", conn_id, e)
 
-    def delete_connection(self, conn_id: str, max_retries: int = 3) -> None:
+    def delete_connection(self, conn_id: str, initial_revision: int | None = None,
+                          max_retries: int = 3) -> None:
+        """Delete a connection, draining it first if it still has queued FlowFiles.
+
+        With ``initial_revision`` (e.g. from a fresh listing of an already drained
+        flow) the first attempt skips the GET; it is only fetched after a 409.
+        """
+        rev = initial_revision
         for attempt in range(max_retries):
-            data = self.get(f"/connections/{conn_id}")
-            rev = data["revision"]["version"]
-            queued = data.get("status", {}).get("aggregateSnapshot", {}).get("flowFilesQueued", 0)
-            if queued > 0:
-                log.info("    Connection %s has %d queued, draining...", conn_id[:12], queued)
-                self.drain_connection(conn_id)
-                time.sleep(2)
+            parent_id = None
+            if rev is None:
+                data = self.get(f"/connections/{conn_id}")
+                rev = data["revision"]["version"]
+                parent_id = data["component"]["parentGroupId"]
+                snapshot = data.get("status", {}).get("aggregateSnapshot", {})
+                queued = snapshot.get("flowFilesQueued", 0)
+                if queued > 0:
+                    log.info("    Connection %s has %d queued, draining...", conn_id[:12], queued)
+                    self.drain_connection(conn_id)
+                    time.sleep(2)
             try:
                 self.delete(f"/connections/{conn_id}?version={rev}")
+                self._invalidate(parent_id)
                 return
             except requests.HTTPError as e:
                 if e.response is not None and e.response.status_code == 409 and attempt < max_retries - 1:
                     log.warning("    Retry %d: queue not empty, re-draining...", attempt + 1)
                     self.drain_connection(conn_id)
                     time.sleep(5)
+                    rev = None
                 else:
                     raise
 
-    def delete_pg(self, pg_id: str) -> None:
-        data = self.get(f"/process-groups/{pg_id}")
-        rev = data["revision"]["version"]
-        self.delete(f"/process-groups/{pg_id}?version={rev}&disconnectedNodeAcknowledged=false")
+    def delete_pg(self, pg_id: str, revision: int | None = None) -> None:
+        """Delete a PG, fetching its revision only when the caller has none."""
+        if revision is None:
+            revision = self.get(f"/process-groups/{pg_id}")["revision"]["version"]
+        self.delete(
+            f"/process-groups/{pg_id}?version={revision}&disconnectedNodeAcknowledged=false")
+        self._invalidate(None)  # the whole subtree is gone, along with its parent's listing
 
 
 # ---------------------------------------------------------------------------
 # Phase 1: Export current flow
 # ---------------------------------------------------------------------------
+
+# Processor config keys carried over into the backup and the recreated processors
+_PROC_CONFIG_KEYS = frozenset({
+    "schedulingStrategy", "schedulingPeriod", "penaltyDuration", "yieldDuration",
+    "runDurationMillis", "concurrentlySchedulableTaskCount", "properties",
+    "autoTerminatedRelationships",
+})
+
+
 def export_flow(nifi: NiFi, root_id: str) -> dict:
     """Export all processor configs from the 10 existing PGs."""
     log.info("Phase 1: Exporting current flow configuration...")
@@ -227,10 +380,12 @@ def export_flow(nifi: NiFi, root_id: str) -> dict:
         pg_id = pg["id"]
         log.info("  Exporting %s (%s)", pg_name, pg_id)
 
-        procs = nifi.processors(pg_id)
-        in_ports = nifi.input_ports(pg_id)
-        out_ports = nifi.output_ports(pg_id)
-        conns = nifi.internal_connections(pg_id)
+        # One flow fetch carries processors, ports and connections together
+        flow = nifi.flow(pg_id)
+        procs = flow.get("processors", [])
+        in_ports = flow.get("inputPorts", [])
+        out_ports = flow.get("outputPorts", [])
+        conns = flow.get("connections", [])
 
         backup["process_groups"][pg_name] = {
             "id": pg_id,
@@ -239,13 +394,10 @@ def export_flow(nifi: NiFi, root_id: str) -> dict:
                 "type": p["component"]["type"],
                 "position": p["position"],
                 "config": {
-                    k: v for k, v in p["component"]["config"].items()
-                    if k in ("schedulingStrategy", "schedulingPeriod", "penaltyDuration",
-                             "yieldDuration", "runDurationMillis",
-                             "concurrentlySchedulableTaskCount", "properties",
-                             "autoTerminatedRelationships")
+                    k: v for k, v in p["component"]["config"].items() if k in _PROC_CONFIG_KEYS
                 },
                 "comments": p["component"].get("comments", ""),
+                "bundle": p["component"].get("bundle"),
             } for p in procs],
             "input_ports": [p["component"]["name"] for p in in_ports],
             "output_ports": [p["component"]["name"] for p in out_ports],
@@ -274,26 +426,27 @@ def stop_and_drain(nifi: NiFi, root_id: str) -> None:
     log.info("Phase 2: Stopping flow and draining queues...")
     nifi.stop_pg(root_id)
     log.info("  Stopped root PG. Waiting for threads to settle...")
-    time.sleep(10)
+    if not nifi.wait_threads(root_id, want_zero=True):
+        log.warning("  Threads still active after 30s, continuing anyway")
 
-    # Drain root-level connections
+    # Collect queued root-level and internal PG connections, then drain them all
+    # concurrently - drop requests on different queues are independent
+    to_drain: list[str] = []
     for conn in nifi.connections(root_id):
         queued = conn.get("status", {}).get("aggregateSnapshot", {}).get("flowFilesQueued", 0)
         if queued > 0:
-            conn_id = conn["id"]
-            log.info("  Draining %s (queued=%d)...", conn_id[:12], queued)
-            nifi.drain_connection(conn_id)
+            log.info("  Draining %s (queued=%d)...", conn["id"][:12], queued)
+            to_drain.append(conn["id"])
 
-    # Drain internal PG connections
     for pg in nifi.child_pgs(root_id):
-        pg_id = pg["id"]
-        for conn in nifi.internal_connections(pg_id):
+        for conn in nifi.internal_connections(pg["id"]):
             queued = conn.get("status", {}).get("aggregateSnapshot", {}).get("flowFilesQueued", 0)
             if queued > 0:
                 log.info("  Draining internal queue in %s (queued=%d)...",
                          pg["component"]["name"], queued)
-                nifi.drain_connection(conn["id"])
+                to_drain.append(conn["id"])
 
+    nifi.map(nifi.drain_connection, to_drain)
     log.info("  All queues drained.")
 
 
@@ -307,16 +460,15 @@ def delete_old_structure(nifi: NiFi, root_id: str) -> None:
     # Delete root connections first
     conns = nifi.connections(root_id)
     log.info("  Deleting %d root connections...", len(conns))
-    for conn in conns:
-        nifi.delete_connection(conn["id"])
+    nifi.map(lambda conn: nifi.delete_connection(conn["id"], conn["revision"]["version"]), conns)
 
-    # Delete PGs (cascades to their internal content)
+    # Delete PGs (cascades to their internal content), using the revision each
+    # listing entry already carries. Distinct PGs can be deleted concurrently.
     pgs = nifi.child_pgs(root_id)
     log.info("  Deleting %d process groups...", len(pgs))
     for pg in pgs:
-        pg_name = pg["component"]["name"]
-        log.info("    Deleting '%s'...", pg_name)
-        nifi.delete_pg(pg["id"])
+        log.debug("    Deleting '%s'...", pg["component"]["name"])
+    nifi.map(lambda pg: nifi.delete_pg(pg["id"], pg["revision"]["version"]), pgs)
 
     log.info("  Old structure deleted.")
 
@@ -325,111 +477,136 @@ def delete_old_structure(nifi: NiFi, root_id: str) -> None:
 # Phase 4: Create nested hierarchy
 # ---------------------------------------------------------------------------
 
+@dataclass(frozen=True, slots=True)
+class LayerDef:
+    """A parent (layer) PG: which old PGs it holds and which ports it exposes."""
+
+    name: str
+    comment: str
+    x: int
+    y: int
+    children: list[str]
+    input_ports: list[str]
+    output_ports: list[str]
+
+
+@dataclass(frozen=True, slots=True)
+class Wire:
+    """A connection inside a layer, between its own ports and its child PGs' ports."""
+
+    src_component: str
+    src_port: str
+    src_type: str
+    dst_component: str
+    dst_port: str
+    dst_type: str
+    relationships: list[str]
+
+
 # Layer definitions: which old PGs belong to which layer
-LAYERS = [
-    {
-        "name": "1 - Ingestion Layer",
-        "comment": "MQTT data ingestion and schema validation",
-        "x": 0, "y": 0,
-        "children": ["PG-01: MQTT Ingestion", "PG-02: Schema Validation"],
-        "input_ports": [],
-        "output_ports": ["validated-data", "kafka-data", "failures"],
-    },
-    {
-        "name": "2 - Processing Layer",
-        "comment": "Data enrichment, Kafka publishing, and anomaly detection",
-        "x": 0, "y": 400,
-        "children": ["PG-03: Data Enrichment", "PG-04: Kafka Publishing (Validated)",
-                      "PG-05: Anomaly Detection"],
-        "input_ports": ["validated-input", "kafka-input"],
-        "output_ports": ["storage-data", "alert-data", "failures"],
-    },
-    {
-        "name": "3 - Storage Layer",
-        "comment": "TimescaleDB time-series storage and compliance reporting",
-        "x": 0, "y": 800,
-        "children": ["PG-07: TimescaleDB Storage", "PG-09: Compliance & Reporting"],
-        "input_ports": ["storage-input", "compliance-input"],
-        "output_ports": [],
-    },
-    {
-        "name": "4 - Alerting Layer",
-        "comment": "Alert routing, persistence, and Kafka anomaly publishing",
-        "x": 800, "y": 400,
-        "children": ["PG-06: Alert Routing & Persistence",
-                      "PG-08: Kafka Publishing (Anomalies)"],
-        "input_ports": ["alert-input"],
-        "output_ports": ["compliance-data", "failures"],
-    },
-    {
-        "name": "5 - Error Handling",
-        "comment": "Dead letter queue for all pipeline failures",
-        "x": 800, "y": 800,
-        "children": ["PG-10: Dead Letter Queue"],
-        "input_ports": ["failures-input"],
-        "output_ports": [],
-    },
-]
+LAYERS = (
+    LayerDef(
+        name="1 - Ingestion Layer",
+        comment="MQTT data ingestion and schema validation",
+        x=0, y=0,
+        children=["PG-01: MQTT Ingestion", "PG-02: Schema Validation"],
+        input_ports=[],
+        output_ports=["validated-data", "kafka-data", "failures"],
+    ),
+    LayerDef(
+        name="2 - Processing Layer",
+        comment="Data enrichment, Kafka publishing, and anomaly detection",
+        x=0, y=400,
+        children=["PG-03: Data Enrichment", "PG-04: Kafka Publishing (Validated)",
+                  "PG-05: Anomaly Detection"],
+        input_ports=["validated-input", "kafka-input"],
+        output_ports=["storage-data", "alert-data", "failures"],
+    ),
+    LayerDef(
+        name="3 - Storage Layer",
+        comment="TimescaleDB time-series storage and compliance reporting",
+        x=0, y=800,
+        children=["PG-07: TimescaleDB Storage", "PG-09: Compliance & Reporting"],
+        input_ports=["storage-input", "compliance-input"],
+        output_ports=[],
+    ),
+    LayerDef(
+        name="4 - Alerting Layer",
+        comment="Alert routing, persistence, and Kafka anomaly publishing",
+        x=800, y=400,
+        children=["PG-06: Alert Routing & Persistence",
+                  "PG-08: Kafka Publishing (Anomalies)"],
+        input_ports=["alert-input"],
+        output_ports=["compliance-data", "failures"],
+    ),
+    LayerDef(
+        name="5 - Error Handling",
+        comment="Dead letter queue for all pipeline failures",
+        x=800, y=800,
+        children=["PG-10: Dead Letter Queue"],
+        input_ports=["failures-input"],
+        output_ports=[],
+    ),
+)
 
 # Internal wiring within each layer (connects child PG ports to parent ports and between children)
-# Format: (src_component, src_port_name, src_type, dst_component, dst_port_name, dst_type, relationships)
 # "_PARENT_" means the parent PG's own port
-INTERNAL_WIRING = {
+INTERNAL_WIRING: dict[str, list[Wire]] = {
     "1 - Ingestion Layer": [
         # PG-01 → PG-02
-        ("PG-01: MQTT Ingestion", "validated-output", "OUTPUT_PORT",
-         "PG-02: Schema Validation", "input", "INPUT_PORT", [""]),
+        Wire("PG-01: MQTT Ingestion", "validated-output", "OUTPUT_PORT",
+             "PG-02: Schema Validation", "input", "INPUT_PORT", [""]),
         # PG-02 outputs → Parent outputs
-        ("PG-02: Schema Validation", "enrichment-output", "OUTPUT_PORT",
-         "_PARENT_", "validated-data", "OUTPUT_PORT", [""]),
-        ("PG-02: Schema Validation", "kafka-output", "OUTPUT_PORT",
-         "_PARENT_", "kafka-data", "OUTPUT_PORT", [""]),
-        ("PG-02: Schema Validation", "failure-output", "OUTPUT_PORT",
-         "_PARENT_", "failures", "OUTPUT_PORT", [""]),
+        Wire("PG-02: Schema Validation", "enrichment-output", "OUTPUT_PORT",
+             "_PARENT_", "validated-data", "OUTPUT_PORT", [""]),
+        Wire("PG-02: Schema Validation", "kafka-output", "OUTPUT_PORT",
+             "_PARENT_", "kafka-data", "OUTPUT_PORT", [""]),
+        Wire("PG-02: Schema Validation", "failure-output", "OUTPUT_PORT",
+             "_PARENT_", "failures", "OUTPUT_PORT", [""]),
     ],
     "2 - Processing Layer": [
         # Parent inputs → child PGs
-        ("_PARENT_", "validated-input", "INPUT_PORT",
-         "PG-03: Data Enrichment", "input", "INPUT_PORT", [""]),
-        ("_PARENT_", "kafka-input", "INPUT_PORT",
-         "PG-04: Kafka Publishing (Validated)", "input", "INPUT_PORT", [""]),
+        Wire("_PARENT_", "validated-input", "INPUT_PORT",
+             "PG-03: Data Enrichment", "input", "INPUT_PORT", [""]),
+        Wire("_PARENT_", "kafka-input", "INPUT_PORT",
+             "PG-04: Kafka Publishing (Validated)", "input", "INPUT_PORT", [""]),
         # PG-03 → PG-05
-        ("PG-03: Data Enrichment", "anomaly-output", "OUTPUT_PORT",
-         "PG-05: Anomaly Detection", "input", "INPUT_PORT", [""]),
+        Wire("PG-03: Data Enrichment", "anomaly-output", "OUTPUT_PORT",
+             "PG-05: Anomaly Detection", "input", "INPUT_PORT", [""]),
         # Child outputs → Parent outputs
-        ("PG-03: Data Enrichment", "storage-output", "OUTPUT_PORT",
-         "_PARENT_", "storage-data", "OUTPUT_PORT", [""]),
-        ("PG-03: Data Enrichment", "failure-output", "OUTPUT_PORT",
-         "_PARENT_", "failures", "OUTPUT_PORT", [""]),
-        ("PG-05: Anomaly Detection", "alert-output", "OUTPUT_PORT",
-         "_PARENT_", "alert-data", "OUTPUT_PORT", [""]),
-        ("PG-05: Anomaly Detection", "failure-output", "OUTPUT_PORT",
-         "_PARENT_", "failures", "OUTPUT_PORT", [""]),
+        Wire("PG-03: Data Enrichment", "storage-output", "OUTPUT_PORT",
+             "_PARENT_", "storage-data", "OUTPUT_PORT", [""]),
+        Wire("PG-03: Data Enrichment", "failure-output", "OUTPUT_PORT",
+             "_PARENT_", "failures", "OUTPUT_PORT", [""]),
+        Wire("PG-05: Anomaly Detection", "alert-output", "OUTPUT_PORT",
+             "_PARENT_", "alert-data", "OUTPUT_PORT", [""]),
+        Wire("PG-05: Anomaly Detection", "failure-output", "OUTPUT_PORT",
+             "_PARENT_", "failures", "OUTPUT_PORT", [""]),
     ],
     "3 - Storage Layer": [
         # Parent inputs → child PGs
-        ("_PARENT_", "storage-input", "INPUT_PORT",
-         "PG-07: TimescaleDB Storage", "input", "INPUT_PORT", [""]),
-        ("_PARENT_", "compliance-input", "INPUT_PORT",
-         "PG-09: Compliance & Reporting", "input", "INPUT_PORT", [""]),
+        Wire("_PARENT_", "storage-input", "INPUT_PORT",
+             "PG-07: TimescaleDB Storage", "input", "INPUT_PORT", [""]),
+        Wire("_PARENT_", "compliance-input", "INPUT_PORT",
+             "PG-09: Compliance & Reporting", "input", "INPUT_PORT", [""]),
     ],
     "4 - Alerting Layer": [
         # Parent input → PG-06
-        ("_PARENT_", "alert-input", "INPUT_PORT",
-         "PG-06: Alert Routing & Persistence", "input", "INPUT_PORT", [""]),
+        Wire("_PARENT_", "alert-input", "INPUT_PORT",
+             "PG-06: Alert Routing & Persistence", "input", "INPUT_PORT", [""]),
         # PG-06 → PG-08
-        ("PG-06: Alert Routing & Persistence", "kafka-output", "OUTPUT_PORT",
-         "PG-08: Kafka Publishing (Anomalies)", "input", "INPUT_PORT", [""]),
+        Wire("PG-06: Alert Routing & Persistence", "kafka-output", "OUTPUT_PORT",
+             "PG-08: Kafka Publishing (Anomalies)", "input", "INPUT_PORT", [""]),
         # PG-06 outputs → Parent outputs
-        ("PG-06: Alert Routing & Persistence", "compliance-output", "OUTPUT_PORT",
-         "_PARENT_", "compliance-data", "OUTPUT_PORT", [""]),
-        ("PG-06: Alert Routing & Persistence", "failure-output", "OUTPUT_PORT",
-         "_PARENT_", "failures", "OUTPUT_PORT", [""]),
+        Wire("PG-06: Alert Routing & Persistence", "compliance-output", "OUTPUT_PORT",
+             "_PARENT_", "compliance-data", "OUTPUT_PORT", [""]),
+        Wire("PG-06: Alert Routing & Persistence", "failure-output", "OUTPUT_PORT",
+             "_PARENT_", "failures", "OUTPUT_PORT", [""]),
     ],
     "5 - Error Handling": [
         # Parent input → PG-10
-        ("_PARENT_", "failures-input", "INPUT_PORT",
-         "PG-10: Dead Letter Queue", "input", "INPUT_PORT", [""]),
+        Wire("_PARENT_", "failures-input", "INPUT_PORT",
+             "PG-10: Dead Letter Queue", "input", "INPUT_PORT", [""]),
     ],
 }
 
@@ -447,152 +624,236 @@ ROOT_CONNECTIONS = [
 ]
 
 
-def create_hierarchy(nifi: NiFi, root_id: str, backup: dict) -> None:
-    """Create the nested PG hierarchy and recreate all processors."""
-    log.info("Phase 4: Creating nested hierarchy...")
-
-    # Track IDs for later wiring
-    layer_ids: dict[str, str] = {}          # layer_name -> parent PG id
-    layer_ports: dict[str, dict] = {}       # layer_name -> {"input": {name: id}, "output": {name: id}}
-    child_ids: dict[str, str] = {}          # child PG name -> child PG id
-    child_ports: dict[str, dict] = {}       # child PG name -> {"input": {name: id}, "output": {name: id}}
-
-    for layer in LAYERS:
-        layer_name = layer["name"]
-        log.info("Creating layer: %s", layer_name)
-
-        # Create parent PG
-        parent_id = nifi.create_pg(root_id, layer_name, layer["x"], layer["y"], layer["comment"])
-        layer_ids[layer_name] = parent_id
-        layer_ports[layer_name] = {"input": {}, "output": {}}
-
-        # Create parent Input Ports
-        for i, port_name in enumerate(layer["input_ports"]):
-            port_id = nifi.create_input_port(parent_id, port_name, x=i * 400, y=-100)
-            layer_ports[layer_name]["input"][port_name] = port_id
-
-        # Create parent Output Ports
-        for i, port_name in enumerate(layer["output_ports"]):
-            port_id = nifi.create_output_port(parent_id, port_name, x=i * 400, y=900)
-            layer_ports[layer_name]["output"][port_name] = port_id
-
-        # Create child PGs inside parent
-        for j, child_name in enumerate(layer["children"]):
-            log.info("  Creating child: %s", child_name)
-            child_x = j * 600
-            child_y = 200
-            child_id = nifi.create_pg(parent_id, child_name, child_x, child_y)
-            child_ids[child_name] = child_id
-            child_ports[child_name] = {"input": {}, "output": {}}
-
-            # Get processor definitions from backup
-            child_backup = backup["process_groups"].get(child_name, {})
-            if not child_backup:
-                log.warning("    No backup found for '%s', skipping processors", child_name)
-                continue
-
-            # Create child Input Ports
-            for port_name in child_backup.get("input_ports", []):
-                port_id = nifi.create_input_port(child_id, port_name, x=400, y=-100)
-                child_ports[child_name]["input"][port_name] = port_id
-
-            # Create child Output Ports
-            for k, port_name in enumerate(child_backup.get("output_ports", [])):
-                port_id = nifi.create_output_port(child_id, port_name, x=k * 300, y=700)
-                child_ports[child_name]["output"][port_name] = port_id
-
-            # Create Processors
-            proc_id_map: dict[str, str] = {}  # old proc name -> new proc id
-            for proc in child_backup.get("processors", []):
-                proc_config = proc["config"].copy()
-                new_id = nifi.create_processor(
-                    child_id, proc["name"], proc["type"],
-                    proc["position"]["x"], proc["position"]["y"],
-                    proc_config, proc.get("comments", ""),
-                )
-                proc_id_map[proc["name"]] = new_id
-
-            # Create internal connections within child PG
-            for conn in child_backup.get("connections", []):
-                src_name = conn["source_name"]
-                dst_name = conn["dest_name"]
-                src_type = conn["source_type"]
-                dst_type = conn["dest_type"]
-
-                # Resolve source ID
-                if src_type == "INPUT_PORT":
-                    src_id = child_ports[child_name]["input"].get(src_name)
-                elif src_type == "PROCESSOR":
-                    src_id = proc_id_map.get(src_name)
-                else:
-                    src_id = None
+def _versioned_port(group: str, name: str, port_type: str, x: int, y: int) -> dict:
+    return {
+        "identifier": str(uuid.uuid4()),
+        "groupIdentifier": group,
+        "componentType": port_type,
+        "type": port_type,
+        "name": name,
+        "position": {"x": x, "y": y},
+        "concurrentlySchedulableTaskCount": 1,
+        "allowRemoteAccess": False,
+        "scheduledState": "ENABLED",
+    }
+
+
+def _versioned_processor(group: str, proc: dict) -> dict:
+    processor = {
+        "identifier": str(uuid.uuid4()),
+        "groupIdentifier": group,
+        "componentType": "PROCESSOR",
+        "type": proc["type"],
+        "name": proc["name"],
+        "comments": proc.get("comments", ""),
+        "position": proc["position"],
+        "properties": {},
+        "autoTerminatedRelationships": [],
+        "bulletinLevel": "WARN",
+        "executionNode": "ALL",
+        "scheduledState": "ENABLED",
+        **proc["config"],
+    }
+    if proc.get("bundle"):
+        processor["bundle"] = proc["bundle"]
+    return processor
+
+
+def _versioned_connection(group: str, src: dict, dst: dict, relationships: list[str],
+                          back_pressure: int = 10000, back_pressure_size: str = "1 GB") -> dict:
+    def endpoint(component: dict) -> dict:
+        return {"id": component["identifier"], "groupId": component["groupIdentifier"],
+                "type": component["componentType"], "name": component["name"]}
+
+    return {
+        "identifier": str(uuid.uuid4()),
+        "groupIdentifier": group,
+        "componentType": "CONNECTION",
+        "name": "",
+        "source": endpoint(src),
+        "destination": endpoint(dst),
+        "selectedRelationships": relationships,
+        "backPressureObjectThreshold": back_pressure,
+        "backPressureDataSizeThreshold": back_pressure_size,
+        "flowFileExpiration": "0 sec",
+        "prioritizers": [],
+        "bends": [],
+        "labelIndex": 1,
+        "zIndex": 0,
+        "loadBalanceStrategy": "DO_NOT_LOAD_BALANCE",
+        "loadBalanceCompression": "DO_NOT_COMPRESS",
+    }
+
+
+def _versioned_group(identifier: str, name: str, x: int, y: int, comments: str = "") -> dict:
+    return {
+        "identifier": identifier,
+        "componentType": "PROCESS_GROUP",
+        "name": name,
+        "comments": comments,
+        "position": {"x": x, "y": y},
+        "processGroups": [],
+        "processors": [],
+        "inputPorts": [],
+        "outputPorts": [],
+        "connections": [],
+        "labels": [],
+        "funnels": [],
+        "remoteProcessGroups": [],
+        "controllerServices": [],
+        "variables": {},
+    }
+
+
+def build_layer_flow(layer: LayerDef, backup: dict) -> dict:
+    """Build a layer's whole subtree as a single VersionedProcessGroup.
+
+    The subtree holds the layer's ports, its child PGs (ports, processors and
+    internal connections restored from the backup) and the layer's internal
+    wiring. Component identifiers are synthetic; NiFi assigns real ids on import.
+    """
+    layer_name = layer.name
+    flow = _versioned_group(str(uuid.uuid4()), layer_name, layer.x, layer.y, layer.comment)
+    # (component, "in"/"out", port name) -> versioned port, "_PARENT_" being the layer itself
+    port_index: dict[tuple[str, str, str], dict] = {}
+
+    for i, port_name in enumerate(layer.input_ports):
+        port = _versioned_port(flow["identifier"], port_name, "INPUT_PORT", i * 400, -100)
+        flow["inputPorts"].append(port)
+        port_index["_PARENT_", "in", port_name] = port
+    for i, port_name in enumerate(layer.output_ports):
+        port = _versioned_port(flow["identifier"], port_name, "OUTPUT_PORT", i * 400, 900)
+        flow["outputPorts"].append(port)
+        port_index["_PARENT_", "out", port_name] = port
+
+    for j, child_name in enumerate(layer.children):
+        child = _versioned_group(str(uuid.uuid4()), child_name, j * 600, 200)
+        child["groupIdentifier"] = flow["identifier"]
+        flow["processGroups"].append(child)
+
+        child_backup = backup["process_groups"].get(child_name, {})
+        if not child_backup:
+            log.warning("    No backup found for '%s', skipping processors", child_name)
+            continue
+
+        for port_name in child_backup.get("input_ports", []):
+            port = _versioned_port(child["identifier"], port_name, "INPUT_PORT", 400, -100)
+            child["inputPorts"].append(port)
+            port_index[child_name, "in", port_name] = port
+        for k, port_name in enumerate(child_backup.get("output_ports", [])):
+            port = _versioned_port(child["identifier"], port_name, "OUTPUT_PORT", k * 300, 700)
+            child["outputPorts"].append(port)
+            port_index[child_name, "out", port_name] = port
+        procs = {}
+        for proc in child_backup.get("processors", []):
+            procs[proc["name"]] = _versioned_processor(child["identifier"], proc)
+        child["processors"] = list(procs.values())
+
+        # Internal connections within the child PG
+        for conn in child_backup.get("connections", []):
+            src_name = conn["source_name"]
+            dst_name = conn["dest_name"]
+            src_type = conn["source_type"]
+            dst_type = conn["dest_type"]
+
+            if src_type == "INPUT_PORT":
+                src = port_index.get((child_name, "in", src_name))
+            elif src_type == "PROCESSOR":
+                src = procs.get(src_name)
+            else:
+                src = None
 
-                # Resolve destination ID
-                if dst_type == "OUTPUT_PORT":
-                    dst_id = child_ports[child_name]["output"].get(dst_name)
-                elif dst_type == "PROCESSOR":
-                    dst_id = proc_id_map.get(dst_name)
-                else:
-                    dst_id = None
-
-                if src_id and dst_id:
-                    nifi.connect(
-                        child_id,
-                        src_id, child_id, src_type,
-                        dst_id, child_id, dst_type,
-                        conn["relationships"],
-                        conn.get("back_pressure", 10000),
-                        conn.get("back_pressure_size", "1 GB"),
-                    )
-                else:
-                    log.warning("    Could not wire: %s (%s) -> %s (%s)",
-                                src_name, src_type, dst_name, dst_type)
-
-    # Phase 4b: Wire internal connections within parent PGs
-    log.info("Phase 4b: Wiring internal layer connections...")
-    for layer_name, wires in INTERNAL_WIRING.items():
-        parent_id = layer_ids[layer_name]
-        log.info("  Wiring layer: %s", layer_name)
-
-        for src_comp, src_port, src_type, dst_comp, dst_port, dst_type, rels in wires:
-            # Resolve source
-            if src_comp == "_PARENT_":
-                src_id = layer_ports[layer_name]["input"].get(src_port)
-                src_group = parent_id
+            if dst_type == "OUTPUT_PORT":
+                dst = port_index.get((child_name, "out", dst_name))
+            elif dst_type == "PROCESSOR":
+                dst = procs.get(dst_name)
             else:
-                src_id = child_ports[src_comp]["output"].get(src_port)
-                src_group = child_ids[src_comp]
+                dst = None
 
-            # Resolve destination
-            if dst_comp == "_PARENT_":
-                dst_id = layer_ports[layer_name]["output"].get(dst_port)
-                dst_group = parent_id
+            if src and dst:
+                child["connections"].append(_versioned_connection(
+                    child["identifier"], src, dst, conn["relationships"],
+                    conn.get("back_pressure", 10000), conn.get("back_pressure_size", "1 GB"),
+                ))
             else:
-                dst_id = child_ports[dst_comp]["input"].get(dst_port)
-                dst_group = child_ids[dst_comp]
+                log.warning("    Could not wire: %s (%s) -> %s (%s)",
+                            src_name, src_type, dst_name, dst_type)
+        log.info("  Child '%s' built: %d procs, %d in-ports, %d out-ports, %d conns",
+                 child_name, len(child["processors"]), len(child["inputPorts"]),
+                 len(child["outputPorts"]), len(child["connections"]))
+
+    # Wiring between the layer's ports and its child PGs
+    for w in INTERNAL_WIRING.get(layer_name, []):
+        src_io = "out" if w.src_type == "OUTPUT_PORT" else "in"
+        dst_io = "out" if w.dst_type == "OUTPUT_PORT" else "in"
+        src = port_index.get((w.src_component, src_io, w.src_port))
+        dst = port_index.get((w.dst_component, dst_io, w.dst_port))
+        if src and dst:
+            flow["connections"].append(
+                _versioned_connection(flow["identifier"], src, dst, w.relationships))
+            log.debug("    %s:%s -> %s:%s",
+                      w.src_component[:20], w.src_port, w.dst_component[:20], w.dst_port)
+        else:
+            log.error("    FAILED: %s:%s -> %s:%s",
+                      w.src_component, w.src_port, w.dst_component, w.dst_port)
+    log.info("  Layer '%s' built: %d children, %d layer connections",
+             layer_name, len(flow["processGroups"]), len(flow["connections"]))
+
+    return flow
+
 
+def create_hierarchy(nifi: NiFi, root_id: str, backup: dict) -> None:
+    """Create the nested PG hierarchy and recreate all processors.
+
+    Each layer's subtree is imported with a single flow-definition upload, and
+    the layers are uploaded concurrently. A root-level connection between two
+    layers is created as soon as both of them have been imported, overlapping
+    the wiring with the remaining uploads.
+    """
+    log.info("Phase 4: Creating nested hierarchy...")
+    flows = []
+    for layer in LAYERS:
+        log.info("  Building layer: %s", layer.name)
+        flows.append(build_layer_flow(layer, backup))
+
+    def import_layer(layer: LayerDef, flow: dict) -> tuple[str, str, dict[tuple[str, str], str]]:
+        """Upload a layer and return (name, PG id, {("in"/"out", port name): port id})."""
+        pg_id = nifi.upload_pg(root_id, layer.name, layer.x, layer.y, flow)
+        ports = {("in", p["component"]["name"]): p["id"] for p in nifi.input_ports(pg_id)}
+        ports.update({("out", p["component"]["name"]): p["id"] for p in nifi.output_ports(pg_id)})
+        return layer.name, pg_id, ports
+
+    # Phase 5: Root-level connections between layers, wired as layers land
+    layer_ids: dict[str, str] = {}
+    # (layer name, "in"/"out", port name) -> port id
+    port_index: dict[tuple[str, str, str], str] = {}
+    pending = list(ROOT_CONNECTIONS)
+    wiring: list[Future] = []
+    for done in as_completed([nifi.submit(import_layer, layer, flow)
+                              for layer, flow in zip(LAYERS, flows, strict=True)]):
+        name, pg_id, ports = done.result()
+        layer_ids[name] = pg_id
+        port_index.update({(name, io, port): port_id for (io, port), port_id in ports.items()})
+
+        ready = [c for c in pending if c[0] in layer_ids and c[2] in layer_ids]
+        pending = [c for c in pending if c not in ready]
+        for src_layer, src_port, dst_layer, dst_port in ready:
+            src_id = port_index.get((src_layer, "out", src_port))
+            dst_id = port_index.get((dst_layer, "in", dst_port))
             if src_id and dst_id:
-                nifi.connect(parent_id, src_id, src_group, src_type,
-                             dst_id, dst_group, dst_type, rels)
-                log.info("    %s:%s -> %s:%s", src_comp[:20], src_port, dst_comp[:20], dst_port)
+                wiring.append(nifi.submit(
+                    nifi.connect, root_id,
+                    src_id, layer_ids[src_layer], "OUTPUT_PORT",
+                    dst_id, layer_ids[dst_layer], "INPUT_PORT", [""],
+                ))
+                log.debug("  %s [%s] -> %s [%s]", src_layer, src_port, dst_layer, dst_port)
             else:
-                log.error("    FAILED: %s:%s -> %s:%s (src=%s, dst=%s)",
-                          src_comp, src_port, dst_comp, dst_port, src_id, dst_id)
-
-    # Phase 5: Root-level connections between layers
-    log.info("Phase 5: Connecting layers at root level...")
-    for src_layer, src_port, dst_layer, dst_port in ROOT_CONNECTIONS:
-        src_id = layer_ports[src_layer]["output"].get(src_port)
-        dst_id = layer_ports[dst_layer]["input"].get(dst_port)
-        src_group = layer_ids[src_layer]
-        dst_group = layer_ids[dst_layer]
-
-        if src_id and dst_id:
-            nifi.connect(root_id, src_id, src_group, "OUTPUT_PORT",
-                         dst_id, dst_group, "INPUT_PORT", [""])
-            log.info("  %s [%s] -> %s [%s]", src_layer, src_port, dst_layer, dst_port)
-        else:
-            log.error("  FAILED: %s [%s] -> %s [%s]", src_layer, src_port, dst_layer, dst_port)
+                log.error("  FAILED: %s [%s] -> %s [%s]",
+                          src_layer, src_port, dst_layer, dst_port)
+
+    for future in wiring:
+        future.result()  # surface connection errors
+    log.info("Phase 5: Connected layers with %d root connections", len(wiring))
 
 
 # ---------------------------------------------------------------------------
@@ -602,10 +863,15 @@ def start_and_verify(nifi: NiFi, root_id: str) -> bool:
     """Start the flow and verify health."""
     log.info("Phase 6: Starting flow...")
     nifi.start_pg(root_id)
-    time.sleep(10)
 
-    # Verify structure
+    # Wait (up to 10s) until no layer reports stopped components
     pgs = nifi.child_pgs(root_id)
+    for _ in backoff(10):
+        if all(pg.get("stoppedCount", 0) == 0 for pg in pgs):
+            break
+        pgs = nifi.child_pgs(root_id, ttl=0)
+
+    # Verify structure
     conns = nifi.connections(root_id)
     log.info("  Root has %d PGs, %d connections", len(pgs), len(conns))
 
@@ -658,7 +924,7 @@ def main() -> None:
 
     # Save backup to file
     backup_path = Path(__file__).parent / f"flow-backup-{datetime.now():%Y%m%d-%H%M%S}.json"
-    backup_path.write_text(json.dumps(backup, indent=2, default=str))
+    backup_path.write_bytes(_dumps(backup, indent=True))
     log.info("Backup saved to %s", backup_path)
 
     if args.dry_run:
@@ -8,14 +8,118 @@ where historical context is essential for accurate anomaly classification.
 
 import json
 import logging
+import math
 import time
-from collections import deque
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable
 
-import numpy as np
 from nifiapi.flowfiletransform import FlowFileTransform, FlowFileTransformResult
 from nifiapi.properties import PropertyDescriptor, StandardValidators
 
-logger = logging.getLogger("MovingAverageDetector")
+try:
+    import orjson
+
+    _loads, _dumps = orjson.loads, orjson.dumps
+except ImportError:
+    _loads, _dumps = json.loads, json.dumps
+
+DETECTOR = "MovingAverageDetector"
+
+logger = logging.getLogger(DETECTOR)
+
+
+class SensorWindow:
+    """Fixed-capacity ring buffer of recent values with O(1) mean/stddev.
+
+    Values live unboxed in a preallocated ``array('d')`` and are overwritten
+    in place once the window is full. The mean and the sum of squared
+    deviations (M2) are maintained with Welford's update, extended to replace
+    the evicted value, so no large raw sums ever cancel. Both are recomputed
+    exactly from the buffer once per ``maxlen`` appends, and immediately when
+    an update shrinks M2 by orders of magnitude (an outlier leaving the
+    window), so rounding error cannot build up. The length of the trailing
+    run of identical values is tracked as well, so a constant window is
+    recognised by one comparison instead of a variance computation.
+    """
+
+    __slots__ = ("buf", "maxlen", "head", "count", "mean", "m2", "run", "_until_resync")
+
+    # An update that leaves M2 below this fraction of its previous value has
+    # lost most of its significant digits and triggers a resync
+    _CANCELLATION_RATIO = 1e-4
+
+    def __init__(self, window_size: int, values: tuple[float, ...] = ()) -> None:
+        self.buf = array("d", bytes(8 * window_size))
+        self.maxlen = window_size
+        self.head = 0  # next slot to write, i.e. the oldest value once full
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.run = 0  # consecutive identical values ending at the newest one
+        self._until_resync = window_size
+        for value in values:
+            self.append(value)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def values(self) -> tuple[float, ...]:
+        """The window contents, oldest first."""
+        buf, head = self.buf, self.head
+        if self.count < self.maxlen:
+            return tuple(buf[:self.count])
+        return tuple(buf[head:]) + tuple(buf[:head])
+
+    @property
+    def is_constant(self) -> bool:
+        """True when every value in the window is identical."""
+        return self.run >= self.count
+
+    def append(self, value: float) -> None:
+        """Add a value, replacing the oldest one when full."""
+        head = self.head
+        if self.count and value == self.buf[head - 1]:
+            self.run += 1
+        else:
+            self.run = 1
+        old_m2 = self.m2
+        if self.count == self.maxlen:
+            old = self.buf[head]
+            old_mean = self.mean
+            delta = value - old
+            self.mean = old_mean + delta / self.count
+            self.m2 = old_m2 + delta * (value - self.mean + old - old_mean)
+        else:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 = old_m2 + delta * (value - self.mean)
+        self.buf[head] = value
+        self.head = head + 1 if head + 1 < self.maxlen else 0
+        self._until_resync -= 1
+        if self._until_resync <= 0 or self.m2 < old_m2 * self._CANCELLATION_RATIO:
+            self._resync()
+
+    def _resync(self) -> None:
+        """Recompute the mean and M2 exactly (two-pass) from the buffer."""
+        filled = self.buf[:self.count]
+        mean = math.fsum(filled) / self.count
+        self.mean = mean
+        self.m2 = math.fsum((v - mean) * (v - mean) for v in filled)
+        self._until_resync = self.maxlen
+
+    def stats(self) -> tuple[float, float]:
+        """Return the (mean, population stddev) of the window."""
+        return self.mean, math.sqrt(max(0.0, self.m2 / self.count))
+
+
+# (sensor_id, value, window) -> (severity, anomaly_type, deviation, mean, stddev, description)
+Analyzer = Callable[
+    [str, float, SensorWindow],
+    tuple[str, str, float | None, float, float, str | None],
+]
 
 
 class MovingAverageDetector(FlowFileTransform):
@@ -42,6 +146,7 @@ class MovingAverageDetector(FlowFileTransform):
             "analysis. Maintains a rolling window per sensor and flags readings "
             "that deviate beyond a configurable number of standard deviations."
         )
+        dependencies = ["orjson"]
         tags = ["anomaly", "moving-average", "statistics", "sensor", "oilgas", "detection"]
 
     WINDOW_SIZE = PropertyDescriptor(
@@ -68,18 +173,68 @@ class MovingAverageDetector(FlowFileTransform):
         validators=[StandardValidators.POSITIVE_DOUBLE_VALIDATOR],
     )
 
+    ENRICH_NORMAL_READINGS = PropertyDescriptor(
+        name="Enrich Normal Readings",
+        description=(
+            "Whether NORMAL readings also get the 'moving_average' block added to "
+            "their content. When false, they pass through with their original "
+            "content and only the anomaly attributes are set."
+        ),
+        allowable_values=["true", "false"],
+        default_value="true",
+        required=True,
+        validators=[StandardValidators.BOOLEAN_VALIDATOR],
+    )
+
+    MAX_SENSORS = PropertyDescriptor(
+        name="Max Sensors",
+        description=(
+            "Maximum number of sensors to keep a rolling window for. When exceeded, the "
+            "least recently seen sensor is evicted and starts over as a new "
+            "sensor with an empty window (warm-up) the next time it reports."
+        ),
+        default_value="100000",
+        required=True,
+        validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR],
+    )
+
     property_descriptors = [
         WINDOW_SIZE,
         DEVIATION_THRESHOLD,
+        ENRICH_NORMAL_READINGS,
+        MAX_SENSORS,
     ]
 
     def __init__(self, **kwargs: object) -> None:
         super().__init__()
-        self._sensor_windows: dict[str, deque[float]] = {}
+        self._sensor_windows: OrderedDict[str, SensorWindow] = OrderedDict()
+        self._properties: tuple[int, float, bool, int] | None = None
+        self._current_window_size: int | None = None
+        self._analyze: Analyzer | None = None
 
     def getPropertyDescriptors(self) -> list[PropertyDescriptor]:
         return self.property_descriptors
 
+    def onScheduled(self, context) -> None:
+        """Parse the property values once per scheduling instead of per FlowFile.
+
+        A changed window size is applied to every existing window here, so
+        the per-FlowFile lookup never has to compare sizes. The analysis
+        function is rebuilt for the current window size and threshold.
+        """
+        self._properties = self._read_properties(context)
+        window_size, deviation_threshold, _, _ = self._properties
+        self._resize_windows(window_size)
+        self._analyze = self._build_analyzer(window_size, deviation_threshold)
+
+    def _read_properties(self, context) -> tuple[int, float, bool, int]:
+        return (
+            int(context.getProperty(self.WINDOW_SIZE).getValue()),
+            float(context.getProperty(self.DEVIATION_THRESHOLD).getValue()),
+            context.getProperty(self.ENRICH_NORMAL_READINGS).getValue() == "true",
+            int(context.getProperty(self.MAX_SENSORS).getValue()),
+        )
+
     def transform(self, context, flowfile) -> FlowFileTransformResult:
         """Evaluate a sensor reading against its moving average baseline.
 
@@ -95,73 +250,63 @@ class MovingAverageDetector(FlowFileTransform):
             FlowFileTransformResult with enriched JSON content, moving average
             attributes, and 'success' relationship.
         """
-        window_size = int(context.getProperty(self.WINDOW_SIZE).getValue())
-        deviation_threshold = float(context.getProperty(self.DEVIATION_THRESHOLD).getValue())
+        if self._properties is None:
+            self.onScheduled(context)
+        window_size, _, enrich_normal, max_sensors = self._properties
 
-        contents = flowfile.getContentsAsBytes().decode("utf-8")
+        contents = flowfile.getContentsAsBytes()
 
         try:
-            reading = json.loads(contents)
+            reading = _loads(contents)
         except (json.JSONDecodeError, UnicodeDecodeError) as exc:
             logger.error("Failed to parse FlowFile JSON: %s", exc)
-            return FlowFileTransformResult(
-                relationship="failure",
-                contents=contents,
-                attributes={
-                    "anomaly.error": f"JSON parse error: {exc}",
-                    "anomaly.severity": "UNKNOWN",
-                },
-            )
+            return self._fail(contents, f"JSON parse error: {exc}")
 
         sensor_id = reading.get("sensor_id")
         if not sensor_id:
             logger.warning("Sensor reading missing 'sensor_id': %s", reading.get("reading_id"))
-            return FlowFileTransformResult(
-                relationship="failure",
-                contents=json.dumps(reading),
-                attributes={
-                    "anomaly.error": "Missing 'sensor_id' field",
-                    "anomaly.severity": "UNKNOWN",
-                },
-            )
+            return self._fail(contents, "Missing 'sensor_id' field")
 
         value = reading.get("value")
         if value is None:
             logger.warning("Sensor reading missing 'value': sensor_id=%s", sensor_id)
-            return FlowFileTransformResult(
-                relationship="failure",
-                contents=json.dumps(reading),
-                attributes={
-                    "anomaly.error": "Missing 'value' field",
-                    "anomaly.severity": "UNKNOWN",
-                },
-            )
+            return self._fail(contents, "Missing 'value' field")
 
         try:
             value = float(value)
         except (TypeError, ValueError) as exc:
             logger.warning("Non-numeric value '%s' for sensor %s: %s", value, sensor_id, exc)
-            return FlowFileTransformResult(
-                relationship="failure",
-                contents=json.dumps(reading),
-                attributes={
-                    "anomaly.error": f"Non-numeric value: {value}",
-                    "anomaly.severity": "UNKNOWN",
-                },
-            )
+            return self._fail(contents, f"Non-numeric value: {value}")
 
-        window = self._get_or_create_window(sensor_id, window_size)
+        window = self._get_or_create_window(sensor_id, window_size, max_sensors)
         window.append(value)
 
         severity, anomaly_type, deviation, mean, stddev, description = self._analyze(
-            sensor_id=sensor_id,
-            value=value,
-            window=window,
-            deviation_threshold=deviation_threshold,
-            window_size=window_size,
+            sensor_id, value, window
         )
 
-        detected_at = int(time.time() * 1000)
+        detected_at = time.time_ns() // 1_000_000
+
+        attributes = {
+            "anomaly.severity": severity,
+            "anomaly.type": anomaly_type,
+            "anomaly.detected_at": str(detected_at),
+            "anomaly.detector": DETECTOR,
+            "ma.deviation": f"{deviation:.4f}" if deviation is not None else "0.0",
+            "ma.mean": f"{mean:.4f}",
+            "ma.stddev": f"{stddev:.4f}",
+            "ma.window_count": str(len(window)),
+            "sensor.id": sensor_id,
+        }
+        if platform_id := reading.get("platform_id"):
+            attributes["platform.id"] = platform_id
+
+        if severity == "NORMAL" and not enrich_normal:
+            return FlowFileTransformResult(
+                relationship="success",
+                contents=contents,
+                attributes=attributes,
+            )
 
         reading["moving_average"] = {
             "severity": severity,
@@ -173,158 +318,153 @@ class MovingAverageDetector(FlowFileTransform):
             "window_size": window_size,
             "description": description,
             "detected_at": detected_at,
-            "detector": "MovingAverageDetector",
+            "detector": DETECTOR,
         }
 
-        attributes = {
-            "anomaly.severity": severity,
-            "anomaly.type": anomaly_type,
-            "anomaly.detected_at": str(detected_at),
-            "anomaly.detector": "MovingAverageDetector",
-            "ma.deviation": str(round(deviation, 4)) if deviation is not None else "0.0",
-            "ma.mean": str(round(mean, 4)),
-            "ma.stddev": str(round(stddev, 4)),
-            "ma.window_count": str(len(window)),
-        }
-
-        if reading.get("sensor_id"):
-            attributes["sensor.id"] = reading["sensor_id"]
-        if reading.get("platform_id"):
-            attributes["platform.id"] = reading["platform_id"]
-
         return FlowFileTransformResult(
             relationship="success",
-            contents=json.dumps(reading),
+            contents=_dumps(reading),
             attributes=attributes,
         )
 
-    def _get_or_create_window(self, sensor_id: str, window_size: int) -> deque[float]:
+    @staticmethod
+    def _fail(contents: bytes, error: str) -> FlowFileTransformResult:
+        """Route the original content to 'failure' with the error as an attribute."""
+        return FlowFileTransformResult(
+            relationship="failure",
+            contents=contents,
+            attributes={
+                "anomaly.error": error,
+                "anomaly.severity": "UNKNOWN",
+            },
+        )
+
+    def _resize_windows(self, window_size: int) -> None:
+        """Rebuild every window for a new size, keeping the most recent values."""
+        if window_size == self._current_window_size:
+            return
+        windows = self._sensor_windows
+        if windows:
+            logger.info(
+                "Window size changed: %s -> %d, rebuilding %d sensor windows",
+                self._current_window_size,
+                window_size,
+                len(windows),
+            )
+        for sensor_id, window in windows.items():
+            windows[sensor_id] = SensorWindow(window_size, window.values[-window_size:])
+        self._current_window_size = window_size
+
+    def _get_or_create_window(
+        self, sensor_id: str, window_size: int, max_sensors: int
+    ) -> SensorWindow:
         """Retrieve or initialize the rolling window for a sensor.
 
-        If the window exists but the configured size has changed, a new deque
-        is created with the new maxlen, preserving as many recent values as
-        possible.
+        Windows always match the current size (see ``_resize_windows``), so
+        no size check is needed. They are kept in least-recently-seen order;
+        creating one beyond ``max_sensors`` evicts the oldest.
 
         Args:
             sensor_id: The unique sensor identifier.
             window_size: Maximum number of values to retain.
+            max_sensors: Maximum number of windows to keep.
 
         Returns:
-            The deque for the given sensor_id.
+            The SensorWindow for the given sensor_id.
         """
-        existing = self._sensor_windows.get(sensor_id)
+        windows = self._sensor_windows
+        existing = windows.get(sensor_id)
 
-        if existing is not None and existing.maxlen == window_size:
+        if existing is not None:
+            windows.move_to_end(sensor_id)
             return existing
 
-        if existing is not None and existing.maxlen != window_size:
-            logger.info(
-                "Window size changed for sensor %s: %d -> %d, rebuilding",
-                sensor_id,
-                existing.maxlen,
-                window_size,
-            )
-            new_window: deque[float] = deque(existing, maxlen=window_size)
-            self._sensor_windows[sensor_id] = new_window
-            return new_window
-
-        new_window = deque(maxlen=window_size)
-        self._sensor_windows[sensor_id] = new_window
+        new_window = SensorWindow(window_size)
+        windows[sensor_id] = new_window
+        if len(windows) > max_sensors:
+            windows.popitem(last=False)
         return new_window
 
     @staticmethod
-    def _analyze(
-        sensor_id: str,
-        value: float,
-        window: deque[float],
-        deviation_threshold: float,
-        window_size: int,
-    ) -> tuple[str, str, float | None, float, float, str]:
-        """Perform statistical analysis on the sensor window.
+    def _build_analyzer(window_size: int, deviation_threshold: float) -> Analyzer:
+        """Build the per-reading analysis function for fixed property values.
+
+        The warm-up length and the critical threshold only depend on the
+        properties, so they are computed once here and captured by the
+        returned closure rather than recomputed for every reading.
 
         During the warm-up period (window not yet full), results are marked
-        as NORMAL with a descriptive note. Once the window is populated,
-        standard deviation analysis determines anomaly severity.
+        as NORMAL with zero mean/stddev and no statistics are computed. Once
+        the window is populated, standard deviation analysis determines
+        anomaly severity. Only anomalies get a description; NORMAL
+        results return None so the common path formats no text.
 
         Args:
-            sensor_id: The sensor identifier for description text.
-            value: The current sensor reading.
-            window: The rolling window of recent values.
-            deviation_threshold: Number of stddevs for anomaly classification.
             window_size: Configured window size for warm-up detection.
+            deviation_threshold: Number of stddevs for anomaly classification.
 
         Returns:
-            Tuple of (severity, anomaly_type, deviation, mean, stddev, description).
+            A function of (sensor_id, value, window) returning a tuple of
+            (severity, anomaly_type, deviation, mean, stddev, description).
         """
-        window_array = np.array(window, dtype=np.float64)
-        mean = float(np.mean(window_array))
-        stddev = float(np.std(window_array, ddof=0))
-
-        if len(window) < max(5, window_size // 2):
-            return (
-                "NORMAL",
-                "none",
-                None,
-                mean,
-                stddev,
-                f"Sensor {sensor_id}: warming up ({len(window)}/{window_size} readings)",
-            )
+        warmup = max(5, window_size // 2)
+        critical_threshold = deviation_threshold * 1.5
+
+        def analyze(
+            sensor_id: str, value: float, window: SensorWindow
+        ) -> tuple[str, str, float | None, float, float, str | None]:
+            if window.count < warmup:
+                return "NORMAL", "none", None, 0.0, 0.0, None
+
+            if window.is_constant:
+                # The window already holds the current value, so it is the baseline
+                return "NORMAL", "none", 0.0, value, 0.0, None
+
+            mean, stddev = window.stats()
 
-        if stddev < 1e-10:
-            if abs(value - mean) < 1e-10:
+            if stddev < 1e-10:
+                if abs(value - mean) < 1e-10:
+                    return "NORMAL", "none", 0.0, mean, stddev, None
                 return (
-                    "NORMAL",
-                    "none",
-                    0.0,
+                    "CRITICAL",
+                    "moving_average_deviation",
+                    float("inf"),
                     mean,
                     stddev,
-                    f"Sensor {sensor_id}: constant value stream, no deviation",
+                    (
+                        f"Sensor {sensor_id}: value {value} deviates from constant "
+                        f"baseline {mean} (stddev ~0)"
+                    ),
                 )
-            return (
-                "CRITICAL",
-                "moving_average_deviation",
-                float("inf"),
-                mean,
-                stddev,
-                (
-                    f"Sensor {sensor_id}: value {value} deviates from constant "
-                    f"baseline {mean} (stddev ~0)"
-                ),
-            )
 
-        deviation = abs(value - mean) / stddev
-
-        if deviation > deviation_threshold * 1.5:
-            return (
-                "CRITICAL",
-                "moving_average_deviation",
-                deviation,
-                mean,
-                stddev,
-                (
-                    f"Sensor {sensor_id}: value {value} is {deviation:.2f} stddevs "
-                    f"from mean {mean:.2f} (critical > {deviation_threshold * 1.5:.1f})"
-                ),
-            )
+            deviation = abs(value - mean) / stddev
 
-        if deviation > deviation_threshold:
-            return (
-                "WARNING",
-                "moving_average_deviation",
-                deviation,
-                mean,
-                stddev,
-                (
-                    f"Sensor {sensor_id}: value {value} is {deviation:.2f} stddevs "
-                    f"from mean {mean:.2f} (warning > {deviation_threshold:.1f})"
-                ),
-            )
+            if deviation > critical_threshold:
+                return (
+                    "CRITICAL",
+                    "moving_average_deviation",
+                    deviation,
+                    mean,
+                    stddev,
+                    (
+                        f"Sensor {sensor_id}: value {value} is {deviation:.2f} stddevs "
+                        f"from mean {mean:.2f} (critical > {critical_threshold:.1f})"
+                    ),
+                )
 
-        return (
-            "NORMAL",
-            "none",
-            deviation,
-            mean,
-            stddev,
-            f"Sensor {sensor_id}: value {value} within {deviation:.2f} stddevs of mean {mean:.2f}",
-        )
+            if deviation > deviation_threshold:
+                return (
+                    "WARNING",
+                    "moving_average_deviation",
+                    deviation,
+                    mean,
+                    stddev,
+                    (
+                        f"Sensor {sensor_id}: value {value} is {deviation:.2f} stddevs "
+                        f"from mean {mean:.2f} (warning > {deviation_threshold:.1f})"
+                    ),
+                )
+
+            return "NORMAL", "none", deviation, mean, stddev, None
+
+        return analyze
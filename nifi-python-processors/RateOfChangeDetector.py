@@ -9,22 +9,39 @@ spikes indicate imminent equipment failure or safety hazards.
 import json
 import logging
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import NamedTuple
 
 from nifiapi.flowfiletransform import FlowFileTransform, FlowFileTransformResult
 from nifiapi.properties import PropertyDescriptor, StandardValidators
 
-logger = logging.getLogger("RateOfChangeDetector")
+try:
+    import orjson
 
+    _loads, _dumps = orjson.loads, orjson.dumps
+except ImportError:
+    _loads, _dumps = json.loads, json.dumps
 
-@dataclass(frozen=True)
-class SensorState:
+DETECTOR = "RateOfChangeDetector"
+
+logger = logging.getLogger(DETECTOR)
+
+
+class SensorState(NamedTuple):
     """Immutable snapshot of the last known reading for a sensor."""
 
     value: float
     timestamp_ms: int
 
 
+# (sensor_id, value, timestamp_ms, previous) -> (severity, is_spike, rate, description)
+Analyzer = Callable[
+    [str, float, int, SensorState | None],
+    tuple[str, bool, float | None, str | None],
+]
+
+
 class RateOfChangeDetector(FlowFileTransform):
     """Detect anomalies by tracking the rate of change between consecutive readings.
 
@@ -48,6 +65,7 @@ class RateOfChangeDetector(FlowFileTransform):
             "change between consecutive readings. Flags readings where the rate "
             "exceeds a configurable threshold."
         )
+        dependencies = ["orjson"]
         tags = ["anomaly", "rate-of-change", "spike", "sensor", "oilgas", "detection"]
 
     MAX_RATE_OF_CHANGE = PropertyDescriptor(
@@ -74,18 +92,64 @@ class RateOfChangeDetector(FlowFileTransform):
         validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR],
     )
 
+    ENRICH_NORMAL_READINGS = PropertyDescriptor(
+        name="Enrich Normal Readings",
+        description=(
+            "Whether NORMAL readings also get the 'rate_of_change' block added to "
+            "their content. When false, they pass through with their original "
+            "content and only the anomaly attributes are set."
+        ),
+        allowable_values=["true", "false"],
+        default_value="true",
+        required=True,
+        validators=[StandardValidators.BOOLEAN_VALIDATOR],
+    )
+
+    MAX_SENSORS = PropertyDescriptor(
+        name="Max Sensors",
+        description=(
+            "Maximum number of sensors to keep the last reading for. When exceeded, the "
+            "least recently seen sensor is evicted and starts over as a new "
+            "baseline the next time it reports."
+        ),
+        default_value="100000",
+        required=True,
+        validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR],
+    )
+
     property_descriptors = [
         MAX_RATE_OF_CHANGE,
         TIME_WINDOW_SECONDS,
+        ENRICH_NORMAL_READINGS,
+        MAX_SENSORS,
     ]
 
     def __init__(self, **kwargs: object) -> None:
         super().__init__()
-        self._sensor_states: dict[str, SensorState] = {}
+        self._sensor_states: OrderedDict[str, SensorState] = OrderedDict()
+        self._properties: tuple[float, int, bool, int] | None = None
+        self._analyze: Analyzer | None = None
 
     def getPropertyDescriptors(self) -> list[PropertyDescriptor]:
         return self.property_descriptors
 
+    def onScheduled(self, context) -> None:
+        """Parse the property values once per scheduling instead of per FlowFile.
+
+        The analysis function is rebuilt for the current rate and time window.
+        """
+        self._properties = self._read_properties(context)
+        max_rate, time_window, _, _ = self._properties
+        self._analyze = self._build_analyzer(max_rate, time_window)
+
+    def _read_properties(self, context) -> tuple[float, int, bool, int]:
+        return (
+            float(context.getProperty(self.MAX_RATE_OF_CHANGE).getValue()),
+            int(context.getProperty(self.TIME_WINDOW_SECONDS).getValue()),
+            context.getProperty(self.ENRICH_NORMAL_READINGS).getValue() == "true",
+            int(context.getProperty(self.MAX_SENSORS).getValue()),
+        )
+
     def transform(self, context, flowfile) -> FlowFileTransformResult:
         """Evaluate the rate of change for a sensor reading.
 
@@ -101,77 +165,68 @@ class RateOfChangeDetector(FlowFileTransform):
             FlowFileTransformResult with enriched JSON content, rate-of-change
             attributes, and 'success' relationship.
         """
-        max_rate = float(context.getProperty(self.MAX_RATE_OF_CHANGE).getValue())
-        time_window = int(context.getProperty(self.TIME_WINDOW_SECONDS).getValue())
+        if self._properties is None:
+            self.onScheduled(context)
+        max_rate, _, enrich_normal, max_sensors = self._properties
 
-        contents = flowfile.getContentsAsBytes().decode("utf-8")
+        contents = flowfile.getContentsAsBytes()
 
         try:
-            reading = json.loads(contents)
+            reading = _loads(contents)
         except (json.JSONDecodeError, UnicodeDecodeError) as exc:
             logger.error("Failed to parse FlowFile JSON: %s", exc)
-            return FlowFileTransformResult(
-                relationship="failure",
-                contents=contents,
-                attributes={
-                    "anomaly.error": f"JSON parse error: {exc}",
-                    "anomaly.severity": "UNKNOWN",
-                },
-            )
+            return self._fail(contents, f"JSON parse error: {exc}")
 
         sensor_id = reading.get("sensor_id")
         if not sensor_id:
             logger.warning("Sensor reading missing 'sensor_id': %s", reading.get("reading_id"))
-            return FlowFileTransformResult(
-                relationship="failure",
-                contents=json.dumps(reading),
-                attributes={
-                    "anomaly.error": "Missing 'sensor_id' field",
-                    "anomaly.severity": "UNKNOWN",
-                },
-            )
+            return self._fail(contents, "Missing 'sensor_id' field")
 
         value = reading.get("value")
         if value is None:
             logger.warning("Sensor reading missing 'value': sensor_id=%s", sensor_id)
-            return FlowFileTransformResult(
-                relationship="failure",
-                contents=json.dumps(reading),
-                attributes={
-                    "anomaly.error": "Missing 'value' field",
-                    "anomaly.severity": "UNKNOWN",
-                },
-            )
+            return self._fail(contents, "Missing 'value' field")
 
         try:
             value = float(value)
         except (TypeError, ValueError) as exc:
             logger.warning("Non-numeric value '%s' for sensor %s: %s", value, sensor_id, exc)
-            return FlowFileTransformResult(
-                relationship="failure",
-                contents=json.dumps(reading),
-                attributes={
-                    "anomaly.error": f"Non-numeric value: {value}",
-                    "anomaly.severity": "UNKNOWN",
-                },
-            )
+            return self._fail(contents, f"Non-numeric value: {value}")
 
-        current_timestamp_ms = self._extract_timestamp(reading)
+        now_ms = time.time_ns() // 1_000_000
+        current_timestamp_ms = self._extract_timestamp(reading, now_ms)
 
+        states = self._sensor_states
         severity, is_spike, rate, description = self._analyze(
-            sensor_id=sensor_id,
-            value=value,
-            timestamp_ms=current_timestamp_ms,
-            max_rate=max_rate,
-            time_window_seconds=time_window,
+            sensor_id, value, current_timestamp_ms, states.get(sensor_id)
         )
 
-        self._sensor_states[sensor_id] = SensorState(
-            value=value,
-            timestamp_ms=current_timestamp_ms,
-        )
+        # Keep states in least-recently-seen order and evict the coldest sensor
+        states[sensor_id] = SensorState(value, current_timestamp_ms)
+        states.move_to_end(sensor_id)
+        if len(states) > max_sensors:
+            states.popitem(last=False)
 
-        detected_at = int(time.time() * 1000)
+        detected_at = now_ms
+
+        attributes = {
+            "anomaly.severity": severity,
+            "anomaly.type": "rate_of_change_spike" if is_spike else "none",
+            "anomaly.detected_at": str(detected_at),
+            "anomaly.detector": DETECTOR,
+            "roc.rate": f"{rate:.6f}" if rate is not None else "0.0",
+            "roc.is_spike": "true" if is_spike else "false",
+            "sensor.id": sensor_id,
+        }
+        if platform_id := reading.get("platform_id"):
+            attributes["platform.id"] = platform_id
+
+        if severity == "NORMAL" and not enrich_normal:
+            return FlowFileTransformResult(
+                relationship="success",
+                contents=contents,
+                attributes=attributes,
+            )
 
         reading["rate_of_change"] = {
             "severity": severity,
@@ -180,135 +235,109 @@ class RateOfChangeDetector(FlowFileTransform):
             "max_rate_threshold": max_rate,
             "description": description,
             "detected_at": detected_at,
-            "detector": "RateOfChangeDetector",
-        }
-
-        attributes = {
-            "anomaly.severity": severity,
-            "anomaly.type": "rate_of_change_spike" if is_spike else "none",
-            "anomaly.detected_at": str(detected_at),
-            "anomaly.detector": "RateOfChangeDetector",
-            "roc.rate": str(round(rate, 6)) if rate is not None else "0.0",
-            "roc.is_spike": str(is_spike).lower(),
+            "detector": DETECTOR,
         }
 
-        if reading.get("sensor_id"):
-            attributes["sensor.id"] = reading["sensor_id"]
-        if reading.get("platform_id"):
-            attributes["platform.id"] = reading["platform_id"]
-
         return FlowFileTransformResult(
             relationship="success",
-            contents=json.dumps(reading),
+            contents=_dumps(reading),
             attributes=attributes,
         )
 
-    def _analyze(
-        self,
-        sensor_id: str,
-        value: float,
-        timestamp_ms: int,
-        max_rate: float,
-        time_window_seconds: int,
-    ) -> tuple[str, bool, float | None, str]:
-        """Compute rate of change and determine if a spike occurred.
+    @staticmethod
+    def _fail(contents: bytes, error: str) -> FlowFileTransformResult:
+        """Route the original content to 'failure' with the error as an attribute."""
+        return FlowFileTransformResult(
+            relationship="failure",
+            contents=contents,
+            attributes={
+                "anomaly.error": error,
+                "anomaly.severity": "UNKNOWN",
+            },
+        )
+
+    @staticmethod
+    def _build_analyzer(max_rate: float, time_window_seconds: int) -> Analyzer:
+        """Build the per-reading rate analysis for fixed property values.
+
+        The critical rate and the time window in milliseconds only depend on
+        the properties, so they are computed once here and captured by the
+        returned closure rather than recomputed for every reading. Only
+        spikes get a description; NORMAL results return None so the common
+        path formats no text.
 
         Args:
-            sensor_id: The sensor identifier.
-            value: Current sensor reading value.
-            timestamp_ms: Current reading timestamp in epoch milliseconds.
             max_rate: Maximum allowed rate (units/second).
             time_window_seconds: Maximum gap for valid comparison.
 
         Returns:
-            Tuple of (severity, is_spike, rate, description).
+            A function of (sensor_id, value, timestamp_ms, previous) returning
+            a tuple of (severity, is_spike, rate, description), where
+            previous is the sensor's last SensorState or None.
         """
-        previous = self._sensor_states.get(sensor_id)
-
-        if previous is None:
-            return (
-                "NORMAL",
-                False,
-                None,
-                f"Sensor {sensor_id}: first reading, establishing baseline",
-            )
-
-        time_delta_ms = timestamp_ms - previous.timestamp_ms
-        time_delta_seconds = time_delta_ms / 1000.0
-
-        if time_delta_seconds <= 0:
-            logger.warning(
-                "Non-positive time delta for sensor %s: %d ms (current=%d, previous=%d)",
-                sensor_id,
-                time_delta_ms,
-                timestamp_ms,
-                previous.timestamp_ms,
-            )
-            return (
-                "NORMAL",
-                False,
-                None,
-                (
-                    f"Sensor {sensor_id}: non-positive time delta "
-                    f"({time_delta_seconds:.3f}s), skipping rate calculation"
-                ),
-            )
-
-        if time_delta_seconds > time_window_seconds:
-            logger.info(
-                "Time gap %.1fs exceeds window %ds for sensor %s, resetting baseline",
-                time_delta_seconds,
-                time_window_seconds,
-                sensor_id,
-            )
-            return (
-                "NORMAL",
-                False,
-                None,
-                (
-                    f"Sensor {sensor_id}: time gap {time_delta_seconds:.1f}s exceeds "
-                    f"window {time_window_seconds}s, new baseline"
-                ),
-            )
-
-        value_delta = abs(value - previous.value)
-        rate = value_delta / time_delta_seconds
-
-        if rate > max_rate * 2.0:
-            return (
-                "CRITICAL",
-                True,
-                rate,
-                (
-                    f"Sensor {sensor_id}: critical spike detected, rate {rate:.4f} "
-                    f"units/s (>{max_rate * 2.0:.1f}, 2x threshold) over "
-                    f"{time_delta_seconds:.1f}s"
-                ),
-            )
-
-        if rate > max_rate:
-            return (
-                "WARNING",
-                True,
-                rate,
-                (
-                    f"Sensor {sensor_id}: spike detected, rate {rate:.4f} "
-                    f"units/s (>{max_rate:.1f}) over {time_delta_seconds:.1f}s"
-                ),
-            )
-
-        return (
-            "NORMAL",
-            False,
-            rate,
-            (
-                f"Sensor {sensor_id}: rate {rate:.4f} units/s within "
-                f"threshold {max_rate:.1f} over {time_delta_seconds:.1f}s"
-            ),
-        )
+        crit_rate = max_rate * 2.0
+        time_window_ms = time_window_seconds * 1000
+
+        def analyze(
+            sensor_id: str, value: float, timestamp_ms: int, previous: SensorState | None
+        ) -> tuple[str, bool, float | None, str | None]:
+            if previous is None:
+                return "NORMAL", False, None, None
+
+            time_delta_ms = timestamp_ms - previous.timestamp_ms
+
+            if time_delta_ms <= 0:
+                logger.warning(
+                    "Non-positive time delta for sensor %s: %d ms (current=%d, previous=%d)",
+                    sensor_id,
+                    time_delta_ms,
+                    timestamp_ms,
+                    previous.timestamp_ms,
+                )
+                return "NORMAL", False, None, None
+
+            time_delta_seconds = time_delta_ms / 1000.0
+
+            if time_delta_ms > time_window_ms:
+                logger.info(
+                    "Time gap %.1fs exceeds window %ds for sensor %s, resetting baseline",
+                    time_delta_seconds,
+                    time_window_seconds,
+                    sensor_id,
+                )
+                return "NORMAL", False, None, None
+
+            rate = abs(value - previous.value) / time_delta_seconds
+
+            if rate > crit_rate:
+                return (
+                    "CRITICAL",
+                    True,
+                    rate,
+                    (
+                        f"Sensor {sensor_id}: critical spike detected, rate {rate:.4f} "
+                        f"units/s (>{crit_rate:.1f}, 2x threshold) over "
+                        f"{time_delta_seconds:.1f}s"
+                    ),
+                )
+
+            if rate > max_rate:
+                return (
+                    "WARNING",
+                    True,
+                    rate,
+                    (
+                        f"Sensor {sensor_id}: spike detected, rate {rate:.4f} "
+                        f"units/s (>{max_rate:.1f}) over {time_delta_seconds:.1f}s"
+                    ),
+                )
+
+            return "NORMAL", False, rate, None
+
+        return analyze
 
     @staticmethod
-    def _extract_timestamp(reading: dict) -> int:
+    def _extract_timestamp(reading: dict, now_ms: int) -> int:
         """Extract timestamp from reading, falling back to current time.
 
         Supports the Avro schema's timestamp-millis (epoch milliseconds)
@@ -316,26 +345,30 @@ class RateOfChangeDetector(FlowFileTransform):
 
         Args:
             reading: The parsed sensor reading dictionary.
+            now_ms: Current time in epoch milliseconds, used as the fallback.
 
         Returns:
             Timestamp as epoch milliseconds.
         """
         ts = reading.get("timestamp")
+        ts_type = type(ts)
 
-        if ts is None:
-            return int(time.time() * 1000)
+        # Avro timestamp-millis decodes to an exact int: check that first
+        if ts_type is int:
+            return ts if ts >= 1_000_000_000_000 else ts * 1000
 
-        if isinstance(ts, (int, float)):
+        if ts_type is float:
             ts_val = int(ts)
-            if ts_val < 1e12:
-                return ts_val * 1000
-            return ts_val
+            return ts_val if ts_val >= 1_000_000_000_000 else ts_val * 1000
 
-        if isinstance(ts, str):
+        if ts_type is str:
+            try:
+                return int(ts)
+            except ValueError:
+                pass
             try:
                 return int(float(ts))
-            except (TypeError, ValueError):
+            except ValueError:
                 logger.warning("Unable to parse timestamp string '%s', using current time", ts)
-                return int(time.time() * 1000)
 
-        return int(time.time() * 1000)
+        return now_ms
@@ -9,11 +9,48 @@ failure and safety incidents.
 import json
 import logging
 import time
+from collections.abc import Callable
 
 from nifiapi.flowfiletransform import FlowFileTransform, FlowFileTransformResult
 from nifiapi.properties import PropertyDescriptor, StandardValidators
 
-logger = logging.getLogger("ThresholdDetector")
+try:
+    import orjson
+
+    _loads, _dumps = orjson.loads, orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: object) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+DETECTOR = "ThresholdDetector"
+
+logger = logging.getLogger(DETECTOR)
+
+# Threshold rules in priority order: (severity, type, operator, label). Rule i
+# owns bit (8 >> i) of the comparison mask built in ThresholdDetector._classify.
+_RULES = (
+    ("CRITICAL", "threshold_exceeded", ">=", "critical high"),
+    ("CRITICAL", "threshold_exceeded", "<=", "critical low"),
+    ("WARNING", "threshold_warning", ">=", "warning high"),
+    ("WARNING", "threshold_warning", "<=", "warning low"),
+)
+
+# Description for NORMAL readings: a constant, so the common path formats no text
+_NORMAL_DESCRIPTION = "Value within normal range"
+
+# Shared _classify result for every NORMAL reading
+_NORMAL_RESULT = ("NORMAL", "none", None, _NORMAL_DESCRIPTION)
+
+# (value, sensor_id) -> (severity, anomaly_type, threshold_value, description)
+Classifier = Callable[[float, str], tuple[str, str, float | None, str]]
+
+# Comparison mask -> index of the highest-priority rule whose bit is set, or
+# None when no threshold is crossed
+_CLASSIFY_TABLE = tuple(
+    next((i for i in range(len(_RULES)) if mask & (8 >> i)), None) for mask in range(16)
+)
 
 
 class ThresholdDetector(FlowFileTransform):
@@ -38,6 +75,7 @@ class ThresholdDetector(FlowFileTransform):
             "Detects sensor anomalies by comparing values against configurable "
             "high/low thresholds. Classifies readings as NORMAL, WARNING, or CRITICAL."
         )
+        dependencies = ["orjson"]
         tags = ["anomaly", "threshold", "sensor", "oilgas", "monitoring", "detection"]
 
     CRITICAL_HIGH_THRESHOLD = PropertyDescriptor(
@@ -91,12 +129,43 @@ class ThresholdDetector(FlowFileTransform):
         WARNING_LOW_THRESHOLD,
     ]
 
+    # NORMAL-reading defaults; transform copies these and only overwrites the
+    # per-reading fields (and the classification for anomalies)
+    _ATTR_TEMPLATE = {
+        "anomaly.severity": "NORMAL",
+        "anomaly.type": "none",
+        "anomaly.detected_at": "",
+        "anomaly.detector": DETECTOR,
+    }
+    _ANOMALY_TEMPLATE = {
+        "severity": "NORMAL",
+        "type": "none",
+        "threshold_value": None,
+        "description": _NORMAL_DESCRIPTION,
+        "detected_at": None,
+        "detector": DETECTOR,
+    }
+
     def __init__(self, **kwargs: object) -> None:
         super().__init__()
+        self._classify: Classifier | None = None
 
     def getPropertyDescriptors(self) -> list[PropertyDescriptor]:
         return self.property_descriptors
 
+    def onScheduled(self, context) -> None:
+        """Parse the thresholds once per scheduling and build the classifier.
+
+        NiFi only allows property changes while the processor is stopped, so
+        the classifier stays valid until the next scheduling.
+        """
+        self._classify = self._build_classifier(
+            float(context.getProperty(self.CRITICAL_HIGH_THRESHOLD).getValue()),
+            float(context.getProperty(self.WARNING_HIGH_THRESHOLD).getValue()),
+            float(context.getProperty(self.CRITICAL_LOW_THRESHOLD).getValue()),
+            float(context.getProperty(self.WARNING_LOW_THRESHOLD).getValue()),
+        )
+
     def transform(self, context, flowfile) -> FlowFileTransformResult:
         """Evaluate a sensor reading against configured thresholds.
 
@@ -112,15 +181,13 @@ class ThresholdDetector(FlowFileTransform):
             FlowFileTransformResult with enriched JSON content, anomaly
             attributes, and 'success' relationship.
         """
-        critical_high = float(context.getProperty(self.CRITICAL_HIGH_THRESHOLD).getValue())
-        warning_high = float(context.getProperty(self.WARNING_HIGH_THRESHOLD).getValue())
-        critical_low = float(context.getProperty(self.CRITICAL_LOW_THRESHOLD).getValue())
-        warning_low = float(context.getProperty(self.WARNING_LOW_THRESHOLD).getValue())
+        if self._classify is None:
+            self.onScheduled(context)
 
-        contents = flowfile.getContentsAsBytes().decode("utf-8")
+        contents = flowfile.getContentsAsBytes()
 
         try:
-            reading = json.loads(contents)
+            reading = _loads(contents)
         except (json.JSONDecodeError, UnicodeDecodeError) as exc:
             logger.error("Failed to parse FlowFile JSON: %s", exc)
             return FlowFileTransformResult(
@@ -137,7 +204,7 @@ class ThresholdDetector(FlowFileTransform):
             logger.warning("Sensor reading missing 'value' field: %s", reading.get("reading_id"))
             return FlowFileTransformResult(
                 relationship="failure",
-                contents=json.dumps(reading),
+                contents=contents,
                 attributes={
                     "anomaly.error": "Missing 'value' field in sensor reading",
                     "anomaly.severity": "UNKNOWN",
@@ -150,7 +217,7 @@ class ThresholdDetector(FlowFileTransform):
             logger.warning("Non-numeric value '%s': %s", value, exc)
             return FlowFileTransformResult(
                 relationship="failure",
-                contents=json.dumps(reading),
+                contents=contents,
                 attributes={
                     "anomaly.error": f"Non-numeric value: {value}",
                     "anomaly.severity": "UNKNOWN",
@@ -158,104 +225,112 @@ class ThresholdDetector(FlowFileTransform):
             )
 
         severity, anomaly_type, threshold_value, description = self._classify(
-            value=value,
-            critical_high=critical_high,
-            warning_high=warning_high,
-            critical_low=critical_low,
-            warning_low=warning_low,
-            sensor_id=reading.get("sensor_id", "unknown"),
+            value, reading.get("sensor_id", "unknown")
         )
 
-        detected_at = int(time.time() * 1000)
-
-        reading["anomaly"] = {
-            "severity": severity,
-            "type": anomaly_type,
-            "threshold_value": threshold_value,
-            "description": description,
-            "detected_at": detected_at,
-            "detector": "ThresholdDetector",
-        }
-
-        attributes = {
-            "anomaly.severity": severity,
-            "anomaly.type": anomaly_type,
-            "anomaly.threshold_value": str(threshold_value) if threshold_value is not None else "",
-            "anomaly.detected_at": str(detected_at),
-            "anomaly.detector": "ThresholdDetector",
-        }
-
-        if reading.get("sensor_id"):
-            attributes["sensor.id"] = reading["sensor_id"]
-        if reading.get("platform_id"):
-            attributes["platform.id"] = reading["platform_id"]
+        detected_at = time.time_ns() // 1_000_000
+
+        anomaly = self._ANOMALY_TEMPLATE.copy()
+        anomaly["detected_at"] = detected_at
+
+        attributes = self._ATTR_TEMPLATE.copy()
+        attributes["anomaly.detected_at"] = str(detected_at)
+
+        if severity != "NORMAL":
+            anomaly["severity"] = severity
+            anomaly["type"] = anomaly_type
+            anomaly["threshold_value"] = threshold_value
+            anomaly["description"] = description
+            attributes["anomaly.severity"] = severity
+            attributes["anomaly.type"] = anomaly_type
+            attributes["anomaly.threshold_value"] = str(threshold_value)
+
+        if sensor_id := reading.get("sensor_id"):
+            attributes["sensor.id"] = sensor_id
+        if platform_id := reading.get("platform_id"):
+            attributes["platform.id"] = platform_id
 
         return FlowFileTransformResult(
             relationship="success",
-            contents=json.dumps(reading),
+            contents=self._append_anomaly(contents, reading, anomaly),
             attributes=attributes,
         )
 
     @staticmethod
-    def _classify(
-        value: float,
+    def _append_anomaly(contents: bytes, reading: dict, anomaly: dict) -> bytes:
+        """Return the reading's JSON with the 'anomaly' block as its last member.
+
+        The serialized block is spliced in before the closing brace of the
+        original bytes, so the rest of the document is never re-serialized.
+        Readings that already carry an 'anomaly' member are re-serialized
+        in full so the old block is replaced rather than duplicated.
+        """
+        body = contents.rstrip()
+        if body.endswith(b"}") and "anomaly" not in reading:
+            return body[:-1] + b',"anomaly":' + _dumps(anomaly) + b"}"
+        reading["anomaly"] = anomaly
+        return _dumps(reading)
+
+    @staticmethod
+    def _build_classifier(
         critical_high: float,
         warning_high: float,
         critical_low: float,
         warning_low: float,
-        sensor_id: str,
-    ) -> tuple[str, str, float | None, str]:
-        """Classify a sensor value against threshold boundaries.
-
-        Evaluation order matters: critical conditions are checked first to ensure
-        the highest severity is always reported.
+    ) -> Classifier:
+        """Build the per-reading classification function for fixed thresholds.
+
+        The thresholds only change when the processor is rescheduled, so they
+        are bound into the returned closure once instead of being passed in
+        for every reading.
+
+        Values strictly inside the warning band are by far the most common
+        and return after a single chained comparison. That band is clamped to
+        lie strictly inside the critical limits too, so a misordered
+        configuration (e.g. critical high below warning high) narrows the
+        fast path instead of hiding a critical reading behind it. Anything
+        else has all four comparisons folded into one bitmask and looked up
+        in ``_CLASSIFY_TABLE``, which resolves overlaps so that critical
+        conditions always win over warnings. Only anomalies get a
+        per-reading description; NORMAL results share a constant one.
 
         Args:
-            value: The sensor reading value.
             critical_high: Upper critical limit.
             warning_high: Upper warning limit.
             critical_low: Lower critical limit.
             warning_low: Lower warning limit.
-            sensor_id: Sensor identifier for description text.
 
         Returns:
-            Tuple of (severity, anomaly_type, threshold_value, description).
+            A function of (value, sensor_id) returning a tuple of
+            (severity, anomaly_type, threshold_value, description).
         """
-        if value >= critical_high:
-            return (
-                "CRITICAL",
-                "threshold_exceeded",
-                critical_high,
-                f"Sensor {sensor_id}: value {value} >= critical high {critical_high}",
-            )
-
-        if value <= critical_low:
-            return (
-                "CRITICAL",
-                "threshold_exceeded",
-                critical_low,
-                f"Sensor {sensor_id}: value {value} <= critical low {critical_low}",
+        thresholds = (critical_high, critical_low, warning_high, warning_low)
+        # Values strictly between these cross no threshold, whatever the order
+        normal_low = max(warning_low, critical_low)
+        normal_high = min(warning_high, critical_high)
+
+        def classify(value: float, sensor_id: str) -> tuple[str, str, float | None, str]:
+            if normal_low < value < normal_high:
+                return _NORMAL_RESULT
+
+            mask = (
+                (value >= critical_high) << 3
+                | (value <= critical_low) << 2
+                | (value >= warning_high) << 1
+                | (value <= warning_low)
             )
+            rule = _CLASSIFY_TABLE[mask]
 
-        if value >= warning_high:
-            return (
-                "WARNING",
-                "threshold_warning",
-                warning_high,
-                f"Sensor {sensor_id}: value {value} >= warning high {warning_high}",
-            )
+            if rule is None:
+                return _NORMAL_RESULT
 
-        if value <= warning_low:
+            severity, anomaly_type, operator, label = _RULES[rule]
+            threshold = thresholds[rule]
             return (
-                "WARNING",
-                "threshold_warning",
-                warning_low,
-                f"Sensor {sensor_id}: value {value} <= warning low {warning_low}",
+                severity,
+                anomaly_type,
+                threshold,
+                f"Sensor {sensor_id}: value {value} {operator} {label} {threshold}",
             )
 
-        return (
-            "NORMAL",
-            "none",
-            None,
-            f"Sensor {sensor_id}: value {value} within normal range",
-        )
+        return classify
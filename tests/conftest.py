@@ -33,7 +33,7 @@ from src.models.sensor import Sensor, SensorType
 # ---------------------------------------------------------------------------
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def sample_platform() -> Platform:
     """Return the ALPHA platform from the canonical registry."""
     return PLATFORMS["ALPHA"]
@@ -44,7 +44,7 @@ def sample_platform() -> Platform:
 # ---------------------------------------------------------------------------
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def sample_sensor() -> Sensor:
     """Return a temperature sensor attached to ALPHA's gas compressor."""
     return Sensor(
@@ -64,7 +64,7 @@ def sample_sensor() -> Sensor:
 # ---------------------------------------------------------------------------
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def sample_reading() -> SensorReading:
     """Return a deterministic SensorReading with known field values."""
     return SensorReading(
@@ -99,7 +99,7 @@ def sample_reading_dict() -> dict:
 # ---------------------------------------------------------------------------
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def avro_schema_dir() -> Path:
     """Return the absolute path to the ``schemas/`` directory."""
     schema_dir = Path(__file__).resolve().parent.parent / "schemas"
@@ -0,0 +1,60 @@
+"""Shared fixtures for the integration and end-to-end test suites.
+
+Provides session-scoped connection pools for the two PostgreSQL databases so
+tests borrow an already-authenticated connection instead of opening a new one
+per query. Database drivers are imported inside the fixtures, so collecting
+or deselecting these tests does not import them, and a missing driver skips
+the tests that need it.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from psycopg2.pool import ThreadedConnectionPool
+
+# ---------------------------------------------------------------------------
+# Connection settings
+# ---------------------------------------------------------------------------
+
+TIMESCALEDB_DSN = {
+    "host": "localhost",
+    "port": 5433,
+    "dbname": "oilgas_monitoring",
+    "user": "oilgas",
+    "password": "oilgas_password",
+}
+POSTGRES_DSN = {
+    "host": "localhost",
+    "port": 5432,
+    "dbname": "oilgas_metadata",
+    "user": "oilgas",
+    "password": "oilgas_password",
+}
+
+
+# ---------------------------------------------------------------------------
+# Connection pool fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(scope="session")
+def timescaledb_pool() -> Iterator[ThreadedConnectionPool]:
+    """Yield a connection pool for the TimescaleDB time-series database."""
+    pool_module = pytest.importorskip("psycopg2.pool")
+    pool = pool_module.ThreadedConnectionPool(minconn=1, maxconn=4, **TIMESCALEDB_DSN)
+    yield pool
+    pool.closeall()
+
+
+@pytest.fixture(scope="session")
+def postgres_pool() -> Iterator[ThreadedConnectionPool]:
+    """Yield a connection pool for the PostgreSQL metadata database."""
+    pool_module = pytest.importorskip("psycopg2.pool")
+    pool = pool_module.ThreadedConnectionPool(minconn=1, maxconn=4, **POSTGRES_DSN)
+    yield pool
+    pool.closeall()
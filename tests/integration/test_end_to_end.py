@@ -13,13 +13,19 @@ processors and Kafka consumers to propagate messages end-to-end.
 from __future__ import annotations
 
 import json
+import select
 import time
 import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
 
-import paho.mqtt.client as mqtt
-import psycopg2
 import pytest
 
+if TYPE_CHECKING:
+    import paho.mqtt.client as mqtt
+    from psycopg2.pool import ThreadedConnectionPool
+
 
 # =========================================================================
 # Constants
@@ -29,52 +35,162 @@ MQTT_BROKER = "localhost"
 MQTT_PORT = 1883
 MQTT_TOPIC = "oilgas/sensors/ALPHA"
 
-TIMESCALEDB_DSN = {
-    "host": "localhost",
-    "port": 5433,
-    "dbname": "oilgas_monitoring",
-    "user": "oilgas",
-    "password": "oilgas_password",
-}
-
 # Maximum time (seconds) to wait for end-to-end propagation
 E2E_TIMEOUT = 15
+# Re-check interval (seconds) when no insert notification arrives, e.g. for
+# tables the notify trigger could not be installed on
 E2E_POLL_INTERVAL = 1
 
+# Channel the insert triggers NOTIFY with the new row's reading_id
+NOTIFY_CHANNEL = "e2e_row_inserted"
+
+# Each trigger is installed only on the tables present in the database it runs
+# against: sensor_readings in TimescaleDB, alert_history in the metadata Postgres
+_INSTALL_NOTIFY_TRIGGERS = f"""
+CREATE OR REPLACE FUNCTION e2e_notify_insert() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{NOTIFY_CHANNEL}', NEW.reading_id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['sensor_readings', 'alert_history'] LOOP
+        IF to_regclass(t) IS NOT NULL THEN
+            EXECUTE format('DROP TRIGGER IF EXISTS e2e_notify_insert ON %I', t);
+            EXECUTE format(
+                'CREATE TRIGGER e2e_notify_insert AFTER INSERT ON %I '
+                'FOR EACH ROW EXECUTE FUNCTION e2e_notify_insert()',
+                t
+            );
+        END IF;
+    END LOOP;
+END $$;
+"""
+
+_DROP_NOTIFY_TRIGGERS = """
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['sensor_readings', 'alert_history'] LOOP
+        IF to_regclass(t) IS NOT NULL THEN
+            EXECUTE format('DROP TRIGGER IF EXISTS e2e_notify_insert ON %I', t);
+        END IF;
+    END LOOP;
+END $$;
+
+DROP FUNCTION IF EXISTS e2e_notify_insert();
+"""
+
 
 # =========================================================================
-# Helpers
+# Fixtures
 # =========================================================================
 
 
-def _publish_mqtt_message(topic: str, payload: dict) -> None:
-    """Publish a single JSON payload to the MQTT broker."""
-    client = mqtt.Client(client_id=f"e2e-test-{uuid.uuid4().hex[:8]}")
+@pytest.fixture(scope="session")
+def mqtt_client() -> Iterator[mqtt.Client]:
+    """Yield one connected MQTT client shared by every test in the session."""
+    mqtt = pytest.importorskip("paho.mqtt.client")
+    client = mqtt.Client(
+        callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
+        client_id=f"e2e-test-{uuid.uuid4().hex[:8]}",
+    )
     client.connect(MQTT_BROKER, MQTT_PORT, keepalive=30)
-    client.publish(topic, json.dumps(payload), qos=1)
+    client.loop_start()
+    yield client
+    client.loop_stop()
     client.disconnect()
 
 
-def _query_timescaledb(query: str, params: tuple = ()) -> list:
-    """Execute a query against TimescaleDB and return all rows."""
-    conn = psycopg2.connect(**TIMESCALEDB_DSN)
+@pytest.fixture(scope="module", autouse=True)
+def insert_notifications(
+    timescaledb_pool: ThreadedConnectionPool, postgres_pool: ThreadedConnectionPool
+) -> Iterator[None]:
+    """Install AFTER INSERT triggers that NOTIFY on every new reading or alert row."""
+    with _notify_triggers(timescaledb_pool), _notify_triggers(postgres_pool):
+        yield
+
+
+# =========================================================================
+# Helpers
+# =========================================================================
+
+
+@contextmanager
+def _notify_triggers(pool: ThreadedConnectionPool) -> Iterator[None]:
+    """Install the notify triggers in the pool's database for the duration of the block."""
+    conn = pool.getconn()
+    conn.autocommit = True
     try:
         with conn.cursor() as cur:
-            cur.execute(query, params)
-            return cur.fetchall()
+            cur.execute(_INSTALL_NOTIFY_TRIGGERS)
+        yield
+        with conn.cursor() as cur:
+            cur.execute(_DROP_NOTIFY_TRIGGERS)
     finally:
-        conn.close()
+        conn.autocommit = False
+        pool.putconn(conn)
+
 
+def _publish_mqtt_message(client: mqtt.Client, topic: str, payload: dict) -> None:
+    """Publish a single JSON payload and wait for the broker to acknowledge it."""
+    client.publish(topic, json.dumps(payload), qos=1).wait_for_publish(timeout=5)
 
-def _wait_for_row(query: str, params: tuple, timeout: int = E2E_TIMEOUT) -> list:
-    """Poll TimescaleDB until the query returns at least one row or timeout."""
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        rows = _query_timescaledb(query, params)
-        if rows:
-            return rows
-        time.sleep(E2E_POLL_INTERVAL)
-    return []
+
+def _query_timescaledb(query: str, params: tuple, pool: ThreadedConnectionPool) -> list:
+    """Execute a query against TimescaleDB and return all rows."""
+    conn = pool.getconn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(query, params)
+            return cur.fetchall()
+    finally:
+        pool.putconn(conn)
+
+
+def _wait_for_row(
+    query: str,
+    params: tuple,
+    pool: ThreadedConnectionPool,
+    timeout: int = E2E_TIMEOUT,
+) -> list:
+    """Wait until the query returns at least one row or timeout.
+
+    Listens on ``NOTIFY_CHANNEL`` and re-runs the query as soon as a row is
+    inserted, so a test finishes when its data lands rather than on the next
+    poll tick. The query also re-runs every ``E2E_POLL_INTERVAL`` seconds in
+    case no notification arrives.
+    """
+    conn = pool.getconn()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            # LISTEN before the first query so no insert can slip in between
+            cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            deadline = time.monotonic() + timeout
+            while True:
+                cur.execute(query, params)
+                rows = cur.fetchall()
+                if rows:
+                    return rows
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                select.select([conn], [], [], min(remaining, E2E_POLL_INTERVAL))
+                conn.poll()
+                conn.notifies.clear()
+    finally:
+        # Leave the pooled connection as it was handed out
+        with conn.cursor() as cur:
+            cur.execute(f"UNLISTEN {NOTIFY_CHANNEL}")
+        conn.notifies.clear()
+        conn.autocommit = False
+        pool.putconn(conn)
 
 
 # =========================================================================
@@ -86,7 +202,9 @@ def _wait_for_row(query: str, params: tuple, timeout: int = E2E_TIMEOUT) -> list
 class TestMqttToTimescaleDB:
     """Verify full pipeline from MQTT ingestion to TimescaleDB persistence."""
 
-    def test_mqtt_to_timescaledb(self) -> None:
+    def test_mqtt_to_timescaledb(
+        self, mqtt_client: mqtt.Client, timescaledb_pool: ThreadedConnectionPool
+    ) -> None:
         """Publish an MQTT message, wait, then query TimescaleDB for the reading."""
         reading_id = str(uuid.uuid4())
         timestamp_ms = int(time.time() * 1000)
@@ -102,11 +220,11 @@ class TestMqttToTimescaleDB:
             "quality_flag": "GOOD",
         }
 
-        _publish_mqtt_message(MQTT_TOPIC, payload)
+        _publish_mqtt_message(mqtt_client, MQTT_TOPIC, payload)
 
         # Poll TimescaleDB for the reading
         query = "SELECT reading_id, value FROM sensor_readings WHERE reading_id = %s"
-        rows = _wait_for_row(query, (reading_id,))
+        rows = _wait_for_row(query, (reading_id,), timescaledb_pool)
 
         assert len(rows) >= 1, (
             f"Reading {reading_id} not found in TimescaleDB after {E2E_TIMEOUT}s"
@@ -124,7 +242,9 @@ class TestMqttToTimescaleDB:
 class TestAnomalyDetection:
     """Verify that readings above threshold trigger anomaly alerts."""
 
-    def test_anomaly_generates_alert(self) -> None:
+    def test_anomaly_generates_alert(
+        self, mqtt_client: mqtt.Client, postgres_pool: ThreadedConnectionPool
+    ) -> None:
         """Publish a reading above threshold, wait, query alert_history."""
         reading_id = str(uuid.uuid4())
         timestamp_ms = int(time.time() * 1000)
@@ -141,15 +261,16 @@ class TestAnomalyDetection:
             "quality_flag": "GOOD",
         }
 
-        _publish_mqtt_message(MQTT_TOPIC, payload)
+        _publish_mqtt_message(mqtt_client, MQTT_TOPIC, payload)
 
-        # Poll for an alert linked to this reading
+        # Poll the metadata database, which holds alert_history, for an alert
+        # linked to this reading
         query = (
             "SELECT alert_id, reading_id, severity "
             "FROM alert_history "
             "WHERE reading_id = %s"
         )
-        rows = _wait_for_row(query, (reading_id,))
+        rows = _wait_for_row(query, (reading_id,), postgres_pool)
 
         assert len(rows) >= 1, (
             f"No alert found for reading {reading_id} after {E2E_TIMEOUT}s"
@@ -9,13 +9,14 @@ Run with:  ``pytest -m integration tests/integration/test_nifi_health.py``
 
 from __future__ import annotations
 
-import urllib3
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
 import pytest
-import requests
-import psycopg2
 
-# Suppress insecure-request warnings for NiFi self-signed TLS
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+if TYPE_CHECKING:
+    import requests
+    from psycopg2.pool import ThreadedConnectionPool
 
 
 # =========================================================================
@@ -24,20 +25,6 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 NIFI_BASE_URL = "https://localhost:8443"
 SCHEMA_REGISTRY_URL = "http://localhost:8081"
-TIMESCALEDB_DSN = {
-    "host": "localhost",
-    "port": 5433,
-    "dbname": "oilgas_monitoring",
-    "user": "oilgas",
-    "password": "oilgas_password",
-}
-POSTGRES_DSN = {
-    "host": "localhost",
-    "port": 5432,
-    "dbname": "oilgas_metadata",
-    "user": "oilgas",
-    "password": "oilgas_password",
-}
 
 EXPECTED_KAFKA_TOPICS = {
     "sensor-raw",
@@ -59,6 +46,24 @@ EXPECTED_SCHEMA_SUBJECTS = {
 }
 
 
+# =========================================================================
+# Fixtures
+# =========================================================================
+
+
+@pytest.fixture(scope="module")
+def http_session() -> Iterator[requests.Session]:
+    """Yield a requests session that keeps connections open between checks."""
+    requests = pytest.importorskip("requests")
+    urllib3 = pytest.importorskip("urllib3")
+
+    # Suppress insecure-request warnings for NiFi self-signed TLS
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    with requests.Session() as session:
+        yield session
+
+
 # =========================================================================
 # NiFi API tests
 # =========================================================================
@@ -68,18 +73,18 @@ EXPECTED_SCHEMA_SUBJECTS = {
 class TestNiFiApi:
     """Verify the NiFi REST API is reachable and functional."""
 
-    def test_nifi_api_reachable(self) -> None:
+    def test_nifi_api_reachable(self, http_session: requests.Session) -> None:
         """GET /nifi-api/system-diagnostics should return 200 OK."""
         url = f"{NIFI_BASE_URL}/nifi-api/system-diagnostics"
-        response = requests.get(url, verify=False, timeout=10)
+        response = http_session.get(url, verify=False, timeout=10)
         assert response.status_code == 200, (
             f"NiFi API returned {response.status_code}: {response.text[:200]}"
         )
 
-    def test_nifi_process_groups(self) -> None:
+    def test_nifi_process_groups(self, http_session: requests.Session) -> None:
         """GET /nifi-api/flow/process-groups/root should contain child groups."""
         url = f"{NIFI_BASE_URL}/nifi-api/flow/process-groups/root"
-        response = requests.get(url, verify=False, timeout=10)
+        response = http_session.get(url, verify=False, timeout=10)
         assert response.status_code == 200
 
         data = response.json()
@@ -103,9 +108,9 @@ class TestKafka:
 
     def test_kafka_topics_exist(self) -> None:
         """List Kafka topics via kafka-python and verify all 7 expected topics."""
-        from kafka import KafkaConsumer
+        kafka = pytest.importorskip("kafka")
 
-        consumer = KafkaConsumer(
+        consumer = kafka.KafkaConsumer(
             bootstrap_servers="localhost:9092",
             consumer_timeout_ms=5000,
         )
@@ -126,10 +131,10 @@ class TestKafka:
 class TestSchemaRegistry:
     """Verify the Confluent Schema Registry has expected subjects."""
 
-    def test_schema_registry_subjects(self) -> None:
+    def test_schema_registry_subjects(self, http_session: requests.Session) -> None:
         """GET /subjects should return the 6 expected Avro subjects."""
         url = f"{SCHEMA_REGISTRY_URL}/subjects"
-        response = requests.get(url, timeout=10)
+        response = http_session.get(url, timeout=10)
         assert response.status_code == 200, (
             f"Schema Registry returned {response.status_code}"
         )
@@ -150,9 +155,9 @@ class TestSchemaRegistry:
 class TestTimescaleDB:
     """Verify TimescaleDB is running and has the expected tables."""
 
-    def test_timescaledb_connection(self) -> None:
+    def test_timescaledb_connection(self, timescaledb_pool: ThreadedConnectionPool) -> None:
         """Connect to TimescaleDB on port 5433, verify sensor_readings table exists."""
-        conn = psycopg2.connect(**TIMESCALEDB_DSN)
+        conn = timescaledb_pool.getconn()
         try:
             with conn.cursor() as cur:
                 cur.execute(
@@ -169,7 +174,7 @@ class TestTimescaleDB:
                     "Table 'sensor_readings' not found in TimescaleDB"
                 )
         finally:
-            conn.close()
+            timescaledb_pool.putconn(conn)
 
 
 # =========================================================================
@@ -181,9 +186,9 @@ class TestTimescaleDB:
 class TestPostgres:
     """Verify the PostgreSQL metadata database is running and seeded."""
 
-    def test_postgres_connection(self) -> None:
+    def test_postgres_connection(self, postgres_pool: ThreadedConnectionPool) -> None:
         """Connect to PostgreSQL on port 5432, verify platforms table has 5 rows."""
-        conn = psycopg2.connect(**POSTGRES_DSN)
+        conn = postgres_pool.getconn()
         try:
             with conn.cursor() as cur:
                 # Verify table exists
@@ -206,4 +211,4 @@ class TestPostgres:
                     f"Expected 5 rows in platforms table, found {count}"
                 )
         finally:
-            conn.close()
+            postgres_pool.putconn(conn)
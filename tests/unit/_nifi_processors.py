@@ -0,0 +1,55 @@
+"""Load NiFi Python processor modules from ``nifi-python-processors/`` for testing.
+
+The processors import ``nifiapi``, which only exists inside NiFi's Python
+runtime. When it is not installed, a minimal stand-in providing the names used
+at import time is registered before the module is loaded from its file.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+_PROCESSORS_DIR = Path(__file__).resolve().parent.parent.parent / "nifi-python-processors"
+
+
+def _install_nifiapi_stand_in() -> None:
+    """Register placeholder ``nifiapi`` modules if the real package is absent."""
+    try:
+        import nifiapi  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        return
+
+    class _Validators:
+        def __getattr__(self, name: str) -> str:
+            return name
+
+    flowfiletransform = types.ModuleType("nifiapi.flowfiletransform")
+    flowfiletransform.FlowFileTransform = type("FlowFileTransform", (), {})
+    flowfiletransform.FlowFileTransformResult = type("FlowFileTransformResult", (), {})
+    properties = types.ModuleType("nifiapi.properties")
+    properties.PropertyDescriptor = lambda **kwargs: kwargs
+    properties.StandardValidators = _Validators()
+    package = types.ModuleType("nifiapi")
+    package.flowfiletransform = flowfiletransform
+    package.properties = properties
+    sys.modules.update(
+        {
+            "nifiapi": package,
+            "nifiapi.flowfiletransform": flowfiletransform,
+            "nifiapi.properties": properties,
+        }
+    )
+
+
+def load_processor(name: str) -> types.ModuleType:
+    """Import ``nifi-python-processors/<name>.py`` and return the module."""
+    _install_nifiapi_stand_in()
+    spec = importlib.util.spec_from_file_location(name, _PROCESSORS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -7,6 +7,7 @@ of the canonical registries (PLATFORMS, EQUIPMENT).
 from __future__ import annotations
 
 import json
+import uuid
 
 import pytest
 
@@ -15,6 +16,20 @@ from src.models.platform import PLATFORMS, Platform
 from src.models.reading import SensorReading
 from src.models.sensor import Sensor, SensorType, generate_sensors_for_platform
 
+# Keys every serialized SensorReading must carry
+_EXPECTED_READING_KEYS = frozenset(
+    {
+        "reading_id",
+        "platform_id",
+        "sensor_id",
+        "sensor_type",
+        "value",
+        "unit",
+        "timestamp",
+        "quality_flag",
+    }
+)
+
 
 # =========================================================================
 # Platform tests
@@ -197,22 +212,17 @@ class TestSensorReading:
 
     def test_reading_to_dict_keys(self, sample_reading: SensorReading) -> None:
         """Verify to_dict() contains all 8 expected keys."""
-        expected_keys = {
-            "reading_id",
-            "platform_id",
-            "sensor_id",
-            "sensor_type",
-            "value",
-            "unit",
-            "timestamp",
-            "quality_flag",
-        }
-        assert set(sample_reading.to_dict().keys()) == expected_keys
+        assert sample_reading.to_dict().keys() == _EXPECTED_READING_KEYS
+
+    def test_reading_to_tuple(self, sample_reading: SensorReading) -> None:
+        """Verify to_tuple() matches to_dict() values in key order."""
+        assert sample_reading.to_tuple() == tuple(sample_reading.to_dict().values())
 
     def test_reading_to_json(self, sample_reading: SensorReading) -> None:
         """Verify to_json() produces valid JSON that round-trips correctly."""
-        json_str = sample_reading.to_json()
-        parsed = json.loads(json_str)
+        payload = sample_reading.to_json()
+        assert isinstance(payload, bytes)
+        parsed = json.loads(payload)
         assert isinstance(parsed, dict)
         assert parsed["platform_id"] == "ALPHA"
         assert parsed["value"] == 85.3
@@ -220,9 +230,9 @@ class TestSensorReading:
 
     def test_reading_to_json_is_valid_json(self, sample_reading: SensorReading) -> None:
         """Verify to_json() output is well-formed JSON (no exceptions on parse)."""
-        json_str = sample_reading.to_json()
+        payload = sample_reading.to_json()
         # Should not raise
-        json.loads(json_str)
+        json.loads(payload)
 
     def test_reading_immutability(self, sample_reading: SensorReading) -> None:
         """Verify the frozen dataclass raises on attribute mutation."""
@@ -234,9 +244,8 @@ class TestSensorReading:
 
     def test_reading_unique_ids(self) -> None:
         """Verify default uuid factory generates unique IDs across instances."""
-        readings = [SensorReading() for _ in range(100)]
-        ids = [r.reading_id for r in readings]
-        assert len(set(ids)) == 100, "Expected 100 unique reading IDs"
+        ids = {SensorReading().reading_id for _ in range(100)}
+        assert len(ids) == 100, "Expected 100 unique reading IDs"
 
     def test_reading_default_values(self) -> None:
         """Verify SensorReading defaults are sensible when created empty."""
@@ -250,3 +259,13 @@ class TestSensorReading:
         assert reading.quality_flag == "GOOD"
         # reading_id should be a valid UUID string
         assert len(reading.reading_id) == 36  # UUID4 format: 8-4-4-4-12
+
+    def test_reading_batch(self) -> None:
+        """Verify batch() allocates columns matching to_dict with unique IDs."""
+        readings = SensorReading.batch(100)
+        assert readings.shape == (100,)
+        assert list(readings.dtype.names) == list(SensorReading().to_dict())
+        assert len(set(readings["reading_id"].tolist())) == 100
+        assert all(uuid.UUID(rid).version == 4 for rid in readings["reading_id"].tolist())
+        assert (readings["quality_flag"] == "GOOD").all()
+        assert (readings["value"] == 0.0).all()
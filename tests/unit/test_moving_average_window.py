@@ -0,0 +1,103 @@
+"""Unit tests for the ``SensorWindow`` ring buffer in MovingAverageDetector.
+
+``SensorWindow`` is pure Python; the processor module is loaded from its file
+with ``load_processor``, which stands in for ``nifiapi`` outside NiFi.
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from tests.unit._nifi_processors import load_processor
+
+SensorWindow = load_processor("MovingAverageDetector").SensorWindow
+
+
+def _population_stats(values: list[float]) -> tuple[float, float]:
+    arr = np.asarray(values, dtype=np.float64)
+    return float(arr.mean()), float(arr.std())
+
+
+# =========================================================================
+# Ring buffer behaviour
+# =========================================================================
+
+
+class TestSensorWindowBuffer:
+    """Tests for window contents, eviction and the constant-run tracker."""
+
+    def test_values_oldest_first_after_wraparound(self) -> None:
+        """Verify only the newest ``maxlen`` values are kept, oldest first."""
+        window = SensorWindow(4, (1.0, 2.0, 3.0, 4.0, 5.0, 6.0))
+        assert len(window) == 4
+        assert window.values == (3.0, 4.0, 5.0, 6.0)
+
+    def test_partial_window_values(self) -> None:
+        """Verify a window that is not yet full reports only appended values."""
+        window = SensorWindow(10, (1.0, 2.0))
+        assert window.values == (1.0, 2.0)
+
+    def test_is_constant(self) -> None:
+        """Verify is_constant tracks whether the whole window holds one value."""
+        window = SensorWindow(3, (1.0, 5.0, 5.0))
+        assert not window.is_constant
+        window.append(5.0)
+        assert window.is_constant
+        window.append(5.5)
+        assert not window.is_constant
+
+
+# =========================================================================
+# Running statistics
+# =========================================================================
+
+
+class TestSensorWindowStats:
+    """Tests for the running mean / population stddev."""
+
+    def test_stats_match_numpy(self) -> None:
+        """Verify stats() matches a direct computation after many evictions."""
+        rng = np.random.default_rng(seed=7)
+        values = rng.normal(100.0, 5.0, 500).tolist()
+        window = SensorWindow(50, tuple(values))
+        mean, stddev = window.stats()
+        expected_mean, expected_std = _population_stats(values[-50:])
+        assert mean == pytest.approx(expected_mean, rel=1e-12)
+        assert stddev == pytest.approx(expected_std, rel=1e-9)
+
+    def test_stats_after_level_shift(self) -> None:
+        """Verify small noise is measured after the window moves far from its start."""
+        rng = np.random.default_rng(seed=1)
+        values = [0.0, *(1e6 + rng.normal(0.0, 0.01, 200)).tolist()]
+        window = SensorWindow(50)
+        for i, value in enumerate(values, start=1):
+            window.append(value)
+            if i > 50:
+                _, stddev = window.stats()
+                _, expected_std = _population_stats(values[i - 50 : i])
+                assert stddev == pytest.approx(expected_std, rel=1e-3)
+
+    def test_stats_large_offset(self) -> None:
+        """Verify stddev stays accurate for values around a large offset."""
+        rng = np.random.default_rng(seed=3)
+        values = (5e7 + rng.uniform(-0.5, 0.5, 300)).tolist()
+        window = SensorWindow(50, tuple(values))
+        _, stddev = window.stats()
+        _, expected_std = _population_stats(values[-50:])
+        assert stddev == pytest.approx(expected_std, rel=1e-6)
+
+    def test_constant_window_has_zero_stddev(self) -> None:
+        """Verify a window of identical values reports a zero stddev."""
+        window = SensorWindow(20, (3.0, 9.0, *([42.0] * 40)))
+        mean, stddev = window.stats()
+        assert mean == 42.0
+        assert stddev == 0.0
+
+    def test_rebuild_preserves_stats(self) -> None:
+        """Verify a window rebuilt from another's values has identical stats."""
+        window = SensorWindow(30, tuple(math.sin(i / 3.0) * 10 for i in range(100)))
+        rebuilt = SensorWindow(30, window.values)
+        assert rebuilt.stats() == pytest.approx(window.stats())
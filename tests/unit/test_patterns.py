@@ -8,32 +8,36 @@ subtype combinations.
 The ``src.patterns.signal`` module API:
 
     - ``SignalConfig(setpoint, noise_std, seasonal_amplitude, seasonal_period_hours)``
-    - ``generate_normal(config, t_hours) -> float``
-    - ``generate_degradation(config, t_hours, drift_rate) -> float``
+    - ``generate_normal(config, t_hours, size) -> float | np.ndarray``
+    - ``generate_degradation(config, t_hours, drift_rate, size) -> float | np.ndarray``
     - ``generate_failure(config, spike_factor) -> float``
-    - ``generate_seasonal(config, t_hours) -> float``
+    - ``generate_seasonal(config, t_hours) -> float | np.ndarray``
     - ``generate_reading(sensor, t_hours, pattern) -> float`` (dispatcher)
+    - ``generate_series(sensor, t_hours, pattern) -> np.ndarray`` (array dispatcher)
+    - ``generate_readings_batch(arrays, t_hours, pattern) -> np.ndarray`` (per-tick batch)
     - ``SENSOR_CONFIGS: dict[tuple[str, str], SignalConfig]``
 """
 
 from __future__ import annotations
 
 import math
-import statistics
 
 import numpy as np
 import pytest
 
 from src.patterns.signal import (
     SENSOR_CONFIGS,
+    SensorArrays,
     SignalConfig,
     generate_degradation,
     generate_failure,
     generate_normal,
     generate_reading,
+    generate_readings_batch,
     generate_seasonal,
+    generate_series,
 )
-from src.models.sensor import Sensor, SensorType
+from src.models.sensor import Sensor, SensorType, generate_sensors_for_platform
 
 
 # =========================================================================
@@ -81,12 +85,12 @@ class TestGenerateNormal:
     def test_generate_normal_within_range(self) -> None:
         """Generate 1000 readings and verify mean is near setpoint, std near noise_std."""
         config = SignalConfig(setpoint=100.0, noise_std=2.0)
-        values = [generate_normal(config, t_hours=0.0) for _ in range(1000)]
+        values = generate_normal(config, t_hours=0.0, size=1000)
 
-        assert len(values) == 1000
+        assert values.shape == (1000,)
 
-        mean_val = statistics.mean(values)
-        std_val = statistics.stdev(values)
+        mean_val = values.mean()
+        std_val = values.std(ddof=1)
 
         # Mean should be within 3 standard errors of the setpoint
         se = config.noise_std / math.sqrt(1000)
@@ -99,6 +103,28 @@ class TestGenerateNormal:
             f"Std {std_val:.4f} too far from expected {config.noise_std}"
         )
 
+    def test_generate_normal_scalar_within_range(self) -> None:
+        """Draw scalar readings across several noise-block refills and check their spread."""
+        import src.patterns.signal as signal_mod
+
+        config = SignalConfig(setpoint=100.0, noise_std=2.0)
+        n = 3 * signal_mod._NOISE_BLOCK_SIZE + 100
+
+        signal_mod._rng = np.random.Generator(np.random.PCG64DXSM(7))
+        values = np.array([generate_normal(config, t_hours=0.0) for _ in range(n)])
+
+        se = config.noise_std / math.sqrt(n)
+        assert abs(values.mean() - config.setpoint) < 5 * se, (
+            f"Mean {values.mean():.4f} too far from setpoint {config.setpoint}"
+        )
+        assert abs(values.std(ddof=1) - config.noise_std) / config.noise_std < 0.10
+        # Nothing beyond ~6 sigma for this sample size
+        assert np.all(np.abs(values - config.setpoint) < 6 * config.noise_std)
+
+        # A refill draws fresh noise rather than replaying the first block
+        block = signal_mod._NOISE_BLOCK_SIZE
+        assert not np.array_equal(values[:block], values[block : 2 * block])
+
     def test_generate_normal_reproducible(self) -> None:
         """With a fixed numpy RNG seed, verify deterministic output."""
         import src.patterns.signal as signal_mod
@@ -106,10 +132,10 @@ class TestGenerateNormal:
         config = SignalConfig(setpoint=50.0, noise_std=1.0)
 
         # Seed the module-level RNG, generate, then reseed and re-generate
-        signal_mod._rng = np.random.default_rng(seed=42)
+        signal_mod._rng = np.random.Generator(np.random.PCG64DXSM(42))
         values_a = [generate_normal(config, t_hours=0.0) for _ in range(50)]
 
-        signal_mod._rng = np.random.default_rng(seed=42)
+        signal_mod._rng = np.random.Generator(np.random.PCG64DXSM(42))
         values_b = [generate_normal(config, t_hours=0.0) for _ in range(50)]
 
         assert values_a == values_b, "Same RNG seed should produce identical sequences"
@@ -120,6 +146,14 @@ class TestGenerateNormal:
         result = generate_normal(config, t_hours=1.0)
         assert isinstance(result, float)
 
+    def test_generate_normal_batch_seasonal(self) -> None:
+        """Verify a batch over an array of times follows the seasonal curve."""
+        config = SignalConfig(setpoint=50.0, noise_std=0.0, seasonal_amplitude=5.0)
+        t_hours = np.arange(24.0)
+        values = generate_normal(config, t_hours, size=24)
+        expected = [generate_seasonal(config, t_hours=t) for t in range(24)]
+        assert values == pytest.approx(expected)
+
 
 # =========================================================================
 # Degradation signal tests
@@ -135,13 +169,11 @@ class TestGenerateDegradation:
         drift_rate = 2.0  # significant drift per hour
 
         # Generate samples at t=0 and t=100 hours
-        early_values = [generate_degradation(config, t_hours=0.0, drift_rate=drift_rate)
-                        for _ in range(50)]
-        late_values = [generate_degradation(config, t_hours=100.0, drift_rate=drift_rate)
-                       for _ in range(50)]
+        early_values = generate_degradation(config, t_hours=0.0, drift_rate=drift_rate, size=50)
+        late_values = generate_degradation(config, t_hours=100.0, drift_rate=drift_rate, size=50)
 
-        early_mean = statistics.mean(early_values)
-        late_mean = statistics.mean(late_values)
+        early_mean = early_values.mean()
+        late_mean = late_values.mean()
 
         assert late_mean > early_mean, (
             f"Expected upward drift: early_mean={early_mean:.2f}, late_mean={late_mean:.2f}"
@@ -153,9 +185,8 @@ class TestGenerateDegradation:
         drift_rate = 1.0
 
         # At t=10h with zero noise, result should be approximately setpoint + drift_rate * 10
-        values = [generate_degradation(config, t_hours=10.0, drift_rate=drift_rate)
-                  for _ in range(20)]
-        mean_val = statistics.mean(values)
+        values = generate_degradation(config, t_hours=10.0, drift_rate=drift_rate, size=20)
+        mean_val = values.mean()
 
         expected = config.setpoint + drift_rate * 10.0
         assert abs(mean_val - expected) < 2.0, (
@@ -204,9 +235,12 @@ class TestGenerateFailure:
         config = SignalConfig(setpoint=100.0, noise_std=5.0)
         spike_factor = 3.0
 
-        spikes = [generate_failure(config, spike_factor=spike_factor) for _ in range(100)]
-        deviations = [abs(s - config.setpoint) for s in spikes]
-        mean_deviation = statistics.mean(deviations)
+        spikes = np.fromiter(
+            (generate_failure(config, spike_factor=spike_factor) for _ in range(100)),
+            dtype=np.float64,
+            count=100,
+        )
+        mean_deviation = np.abs(spikes - config.setpoint).mean()
 
         expected = spike_factor * config.noise_std
         assert abs(mean_deviation - expected) < expected * 0.3, (
@@ -319,44 +353,33 @@ class TestSensorConfigs:
 # =========================================================================
 
 
-class TestGenerateReading:
-    """Tests for the ``generate_reading`` dispatcher function."""
-
-    @pytest.fixture()
-    def compressor_sensor(self) -> Sensor:
-        """A compressor discharge temperature sensor for testing."""
-        return Sensor(
-            sensor_id="TEST-COMP-S01",
-            equipment_id="TEST-COMP",
-            platform_id="TEST",
-            sensor_type=SensorType.TEMPERATURE,
-            unit="degC",
-            min_range=50.0,
-            max_range=250.0,
-            subtype="discharge_temp",
-        )
-
-    def test_generate_reading_normal(self, compressor_sensor: Sensor) -> None:
-        """Verify generate_reading with 'normal' pattern returns a clamped value."""
-        value = generate_reading(compressor_sensor, t_hours=5.0, pattern="normal")
-        assert isinstance(value, float)
-        assert compressor_sensor.min_range <= value <= compressor_sensor.max_range
+@pytest.fixture(scope="module")
+def compressor_sensor() -> Sensor:
+    """A compressor discharge temperature sensor for testing."""
+    return Sensor(
+        sensor_id="TEST-COMP-S01",
+        equipment_id="TEST-COMP",
+        platform_id="TEST",
+        sensor_type=SensorType.TEMPERATURE,
+        unit="degC",
+        min_range=50.0,
+        max_range=250.0,
+        subtype="discharge_temp",
+    )
 
-    def test_generate_reading_degradation(self, compressor_sensor: Sensor) -> None:
-        """Verify generate_reading with 'degradation' pattern returns a clamped value."""
-        value = generate_reading(compressor_sensor, t_hours=5.0, pattern="degradation")
-        assert isinstance(value, float)
-        assert compressor_sensor.min_range <= value <= compressor_sensor.max_range
 
-    def test_generate_reading_failure(self, compressor_sensor: Sensor) -> None:
-        """Verify generate_reading with 'failure' pattern returns a clamped value."""
-        value = generate_reading(compressor_sensor, t_hours=5.0, pattern="failure")
-        assert isinstance(value, float)
-        assert compressor_sensor.min_range <= value <= compressor_sensor.max_range
+class TestGenerateReading:
+    """Tests for the ``generate_reading`` dispatcher function."""
 
-    def test_generate_reading_seasonal(self, compressor_sensor: Sensor) -> None:
-        """Verify generate_reading with 'seasonal' pattern returns a clamped value."""
-        value = generate_reading(compressor_sensor, t_hours=12.0, pattern="seasonal")
+    @pytest.mark.parametrize(
+        ("pattern", "t_hours"),
+        [("normal", 5.0), ("degradation", 5.0), ("failure", 5.0), ("seasonal", 12.0)],
+    )
+    def test_generate_reading_pattern(
+        self, compressor_sensor: Sensor, pattern: str, t_hours: float
+    ) -> None:
+        """Verify generate_reading returns a clamped float for each pattern."""
+        value = generate_reading(compressor_sensor, t_hours=t_hours, pattern=pattern)
         assert isinstance(value, float)
         assert compressor_sensor.min_range <= value <= compressor_sensor.max_range
 
@@ -376,3 +399,31 @@ class TestGenerateReading:
         for _ in range(50):
             value = generate_reading(narrow_sensor, t_hours=0.0, pattern="normal")
             assert narrow_sensor.min_range <= value <= narrow_sensor.max_range
+
+    def test_generate_series_clamped_to_range(self) -> None:
+        """Verify generate_series returns one clamped value per timestamp."""
+        narrow_sensor = Sensor(
+            sensor_id="TEST-NARROW-S01",
+            equipment_id="TEST-NARROW",
+            platform_id="TEST",
+            sensor_type=SensorType.TEMPERATURE,
+            unit="degC",
+            min_range=99.0,
+            max_range=101.0,
+            subtype="discharge_temp",
+        )
+        t_hours = np.linspace(0.0, 48.0, 200)
+        for pattern in ("normal", "degradation", "failure", "seasonal"):
+            values = generate_series(narrow_sensor, t_hours, pattern=pattern)
+            assert values.shape == (200,)
+            assert ((values >= 99.0) & (values <= 101.0)).all()
+
+    @pytest.mark.parametrize("pattern", ["normal", "degradation", "failure", "seasonal"])
+    def test_generate_readings_batch_clamped_to_range(self, pattern: str) -> None:
+        """Verify generate_readings_batch returns one clamped value per sensor."""
+        sensors = generate_sensors_for_platform("ALPHA")
+        arrays = SensorArrays.from_sensors(sensors)
+        values = generate_readings_batch(arrays, t_hours=6.0, pattern=pattern)
+        assert values.shape == (len(sensors),)
+        for sensor, value in zip(sensors, values, strict=True):
+            assert sensor.min_range <= value <= sensor.max_range
@@ -8,6 +8,7 @@ serialized and deserialized through the sensor-reading Avro schema.
 from __future__ import annotations
 
 import datetime
+import functools
 import io
 import json
 from pathlib import Path
@@ -23,8 +24,13 @@ from src.models.reading import SensorReading
 # =========================================================================
 
 
+@functools.lru_cache(maxsize=16)
 def _load_avro_schema(schema_path: Path) -> dict:
-    """Load a .avsc file and return the parsed Avro schema dict."""
+    """Load a .avsc file and return the parsed Avro schema dict.
+
+    Cached per path so each schema is parsed once per test session; callers
+    must not mutate the returned dict.
+    """
     raw = json.loads(schema_path.read_text(encoding="utf-8"))
     return fastavro.parse_schema(raw)
 
@@ -108,9 +114,7 @@ class TestAvroRoundTrip:
         self, avro_schema_dir: Path, sample_reading: SensorReading
     ) -> None:
         """Create a SensorReading, serialize to Avro bytes, deserialize, verify round-trip."""
-        schema_path = avro_schema_dir / "sensor-reading.avsc"
-        raw_schema = json.loads(schema_path.read_text(encoding="utf-8"))
-        parsed_schema = fastavro.parse_schema(raw_schema)
+        parsed_schema = _load_avro_schema(avro_schema_dir / "sensor-reading.avsc")
 
         # Build a record matching the Avro schema field expectations
         record = {
@@ -0,0 +1,79 @@
+"""Unit tests for the per-reading classifier built by ThresholdDetector.
+
+The classifier's fast path for values inside the warning band must agree with
+the full bitmask lookup, including when the four thresholds are configured
+out of order.
+"""
+
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+import pytest
+
+from tests.unit._nifi_processors import load_processor
+
+_module = load_processor("ThresholdDetector")
+_build_classifier = _module.ThresholdDetector._build_classifier
+_CLASSIFY_TABLE = _module._CLASSIFY_TABLE
+_RULES = _module._RULES
+
+
+def _reference_severity(
+    value: float,
+    critical_high: float,
+    warning_high: float,
+    critical_low: float,
+    warning_low: float,
+) -> str:
+    """Classify with the bitmask lookup alone, without any fast path."""
+    mask = (
+        (value >= critical_high) << 3
+        | (value <= critical_low) << 2
+        | (value >= warning_high) << 1
+        | (value <= warning_low)
+    )
+    rule = _CLASSIFY_TABLE[mask]
+    return "NORMAL" if rule is None else _RULES[rule][0]
+
+
+class TestThresholdClassifier:
+    """Tests for ``ThresholdDetector._build_classifier``."""
+
+    @pytest.mark.parametrize(
+        ("value", "severity"),
+        [
+            (50.0, "NORMAL"),
+            (85.0, "WARNING"),
+            (95.0, "CRITICAL"),
+            (15.0, "WARNING"),
+            (5.0, "CRITICAL"),
+        ],
+    )
+    def test_ordered_thresholds(self, value: float, severity: str) -> None:
+        """Verify each band is classified with the default threshold ordering."""
+        classify = _build_classifier(90.0, 80.0, 10.0, 20.0)
+        assert classify(value, "S01")[0] == severity
+
+    def test_critical_high_below_warning_high(self) -> None:
+        """Verify a critical reading is not reported NORMAL when thresholds are misordered."""
+        classify = _build_classifier(90.0, 100.0, 10.0, 20.0)
+        severity, anomaly_type, threshold, _ = classify(95.0, "S01")
+        assert (severity, anomaly_type, threshold) == ("CRITICAL", "threshold_exceeded", 90.0)
+
+    def test_critical_low_above_warning_low(self) -> None:
+        """Verify the low side is also checked against the critical limit."""
+        classify = _build_classifier(90.0, 80.0, 30.0, 20.0)
+        assert classify(25.0, "S01")[0] == "CRITICAL"
+
+    def test_matches_mask_lookup_for_any_ordering(self) -> None:
+        """Verify the fast path never disagrees with the full lookup."""
+        rng = np.random.default_rng(0)
+        values = rng.uniform(-10.0, 110.0, 500).tolist()
+        for thresholds in itertools.permutations((10.0, 20.0, 80.0, 90.0)):
+            classify = _build_classifier(*thresholds)
+            for value in (*values, *thresholds):
+                assert classify(value, "S01")[0] == _reference_severity(value, *thresholds), (
+                    f"value {value} with thresholds {thresholds}"
+                )